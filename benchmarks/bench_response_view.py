@@ -0,0 +1,125 @@
+"""
+Compare reading a Responses API result through ResponseView with the old
+extraction, which called `model_dump()` once per helper (text, tool calls,
+usage and the activity summary) and walked the resulting dicts.
+
+The response is synthetic but shaped like a long tool-using turn: reasoning
+items, file_search calls with their results, and a final message.
+
+Usage:
+    python -m benchmarks.bench_response_view [--repeat N] [--items N]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from openai.types.responses import Response
+
+from storycraftr.agent.response_view import ResponseView
+
+
+def build_response(items: int = 40) -> Response:
+    output = []
+    for i in range(items):
+        output.append(
+            {
+                "type": "reasoning",
+                "id": f"rs_{i}",
+                "summary": [{"type": "summary_text", "text": "x" * 2000}],
+            }
+        )
+        output.append(
+            {
+                "type": "file_search_call",
+                "id": f"fs_{i}",
+                "status": "completed",
+                "queries": ["Elena", "the harbour"],
+                "results": [
+                    {
+                        "file_id": "f",
+                        "filename": "chapter.md",
+                        "score": 0.5,
+                        "text": "y" * 4000,
+                    }
+                    for _ in range(10)
+                ],
+            }
+        )
+    output.append(
+        {
+            "type": "message",
+            "id": "msg",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": "z" * 5000, "annotations": []}],
+        }
+    )
+    return Response.model_validate(
+        {
+            "id": "resp",
+            "object": "response",
+            "created_at": 0,
+            "model": "gpt",
+            "output": output,
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": 1000,
+                "output_tokens": 100,
+                "total_tokens": 1100,
+                "input_tokens_details": {"cached_tokens": 512},
+                "output_tokens_details": {"reasoning_tokens": 0},
+            },
+        }
+    )
+
+
+def read_with_model_dump(resp: Response) -> tuple:
+    # Each helper dumped the response to dicts before reading it
+    text = ResponseView(resp.model_dump()).text
+    tool_calls = ResponseView(resp.model_dump()).tool_calls
+    usage = ResponseView(resp.model_dump()).usage
+    searches = ResponseView(resp.model_dump()).file_search_queries
+    return text, tool_calls, usage, searches
+
+
+def read_with_view(resp: Response) -> tuple:
+    view = ResponseView(resp)
+    return view.text, view.tool_calls, view.usage, view.file_search_queries
+
+
+def measure(fn, resp: Response, repeat: int) -> tuple:
+    fn(resp)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(resp)
+    per_call = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn(resp)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_call, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--items", type=int, default=40)
+    args = parser.parse_args()
+
+    resp = build_response(args.items)
+    assert read_with_model_dump(resp) == read_with_view(resp)
+    for label, fn in (
+        ("model_dump x4", read_with_model_dump),
+        ("ResponseView", read_with_view),
+    ):
+        per_call, peak = measure(fn, resp, args.repeat)
+        print(
+            f"{label:>14}: {per_call * 1000:8.3f} ms/response  {peak / 1024:8.1f} KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
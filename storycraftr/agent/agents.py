@@ -1,25 +1,79 @@
 import os
-import glob
+import asyncio
+import atexit
+import contextvars
+import difflib
+import functools
+import hashlib
 import time
 import json
-import re
 from typing import Any, Dict, List, Optional
 import openai
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
 from rich.console import Console
 from rich.progress import Progress
 from storycraftr.prompts.story.core import FORMAT_OUTPUT
 from storycraftr.prompts.story.tools import (
+    book_search_tool_schema,
     surgical_tools_schema,
     tool_usage_guidance_for_file,
 )
-from storycraftr.utils.core import load_book_config, generate_prompt_with_hash
-from storycraftr.utils.core import load_conversation_id, save_conversation_id, clear_conversation_id
+from storycraftr.agent.bm25 import bm25_index
+from storycraftr.agent.clients import client_registry
+from storycraftr.agent.context import CONTEXT_TOKENS, assemble_file_context
+from storycraftr.agent.dense_index import (
+    LOCAL_EMBEDDING_MODEL,
+    dense_available,
+    dense_index,
+    fuse_results,
+    hashing_embedder,
+)
+from storycraftr.agent.response_cache import response_cache
+from storycraftr.agent.response_view import ResponseView
+from storycraftr.agent.scheduler import (
+    current_priority,
+    request_priority,
+    request_scheduler,
+)
+from storycraftr.agent.edit_plan import apply_edit_plan, apply_edits_checked
+from storycraftr.agent.sync import mark_book_dirty
+from storycraftr.agent.text_index import text_index
+from storycraftr.agent.runtime import background_loop, book_semaphore, run_sync
+from storycraftr.utils.core import (
+    load_book_config,
+    generate_prompt_with_hash,
+    assemble_prompt,
+)
+from storycraftr.utils.core import (
+    load_conversation_id,
+    save_conversation_id,
+    clear_conversation_id,
+)
+from storycraftr.utils.core import (
+    load_vector_store_id,
+    save_vector_store_id,
+    clear_vector_store_id,
+    load_sync_manifest,
+    save_sync_manifest,
+)
+from storycraftr.utils.journal import (
+    atomic_write_text,
+    backup_file,
+    begin_batch,
+    end_batch,
+    detach_batch,
+    interrupted_batches,
+    recover_writes,
+)
+from storycraftr.utils.locks import path_lock
+from storycraftr.utils.manifest import BOOK_CONTENT_DIRS, book_manifest
+from storycraftr.utils.outline import find_section, markdown_outline
+from storycraftr.utils.prompt_log import log_prompt
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
-import shutil
+import queue
+import threading
 
 load_dotenv()
 
@@ -31,6 +85,10 @@ DEBUG = str(os.getenv("STORYCRAFTR_DEBUG", "")).lower() in ("1", "true", "yes",
 LAST_ACTIVITY_BY_THREAD: Dict[str, str] = {}
 LAST_ACTIVITY_BY_BOOK: Dict[str, str] = {}
 LAST_EDITED_FILE_BY_BOOK: Dict[str, str] = {}
+# Latency of the most recent response (time to first text and total duration, in
+# seconds) and the input size of each request it made, in bytes
+LAST_TIMINGS_BY_THREAD: Dict[str, Dict[str, Any]] = {}
+LAST_TIMINGS_BY_BOOK: Dict[str, Dict[str, Any]] = {}
 
 
 def get_last_activity_for_book(book_path: str) -> str:
@@ -49,6 +107,14 @@ def clear_last_activity_for_book(book_path: str) -> None:
         pass
 
 
+def get_last_timings_for_book(book_path: str) -> Dict[str, Any]:
+    """Return the latency and per-request input sizes of the book's last response."""
+    try:
+        return dict(LAST_TIMINGS_BY_BOOK.get(str(book_path), {}) or {})
+    except Exception:
+        return {}
+
+
 def get_last_edited_file_for_book(book_path: str) -> str:
     """Return the last file path (relative to book) that the agent edited with changes > 0."""
     try:
@@ -67,30 +133,248 @@ def _debug(msg: str):
 
 def initialize_openai_client(book_path: str):
     """
-    Initialize the OpenAI client with the configuration from the book.
+    Return the shared OpenAI client for the book's configured endpoint.
+
+    Clients are pooled process-wide by (openai_url, API key), so repeated calls
+    reuse the same keep-alive connections instead of opening new ones.
 
     Args:
         book_path (str): Path to the book directory.
     """
     config = load_book_config(book_path)
     api_base = getattr(config, "openai_url", "https://api.openai.com/v1")
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=api_base)
-    return client
+    request_scheduler.configure(
+        api_base,
+        getattr(config, "requests_per_minute", 0),
+        getattr(config, "tokens_per_minute", 0),
+    )
+    return client_registry.get(api_base, os.getenv("OPENAI_API_KEY"))
+
+
+def initialize_async_openai_client(book_path: str):
+    """
+    Return the shared AsyncOpenAI client for the book's endpoint on the running loop.
+
+    Args:
+        book_path (str): Path to the book directory.
+    """
+    config = load_book_config(book_path)
+    api_base = getattr(config, "openai_url", "https://api.openai.com/v1")
+    request_scheduler.configure(
+        api_base,
+        getattr(config, "requests_per_minute", 0),
+        getattr(config, "tokens_per_minute", 0),
+    )
+    return client_registry.get_async(api_base, os.getenv("OPENAI_API_KEY"))
+
+
+def get_client_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Return request/connection counters for every pooled OpenAI client."""
+    return client_registry.stats()
+
+
+def _report_usage_stats():
+    for base_url, stats in get_client_pool_stats().items():
+        _debug(
+            f"HTTP pool {base_url}: requests={stats['requests']}, "
+            f"opened={stats['connections_opened']}, reused={stats['connections_reused']}"
+        )
+    stats = get_prompt_cache_stats()
+    if stats["requests"]:
+        _debug(
+            f"Prompt cache: {stats['cached_tokens']}/{stats['input_tokens']} input tokens cached "
+            f"({stats['hit_rate']:.0%}) over {stats['requests']} requests"
+        )
+    stats = request_scheduler.stats()
+    if stats["requests"]:
+        _debug(
+            f"Scheduler: requests={stats['requests']}, throttled={stats['throttled']}, "
+            f"retries={stats['retries']}, rate_limited={stats['rate_limited']}"
+        )
+    if response_cache.enabled:
+        stats = response_cache.stats()
+        _debug(
+            f"Response cache: hits={stats['hits']}, misses={stats['misses']}, "
+            f"stores={stats['stores']}, evictions={stats['evictions']}"
+        )
+
+
+atexit.register(_report_usage_stats)
+
+
+# Resolved vector store ids keyed by (book path, store name). Backed by
+# vector_store.json in the book folder so later processes skip the lookup too.
+_VECTOR_STORE_IDS: Dict[tuple, str] = {}
+_VECTOR_STORE_LOCK = threading.Lock()
+RETRIEVAL_MODES = ("remote", "local", "hybrid")
+_STORE_CACHE_REFRESH = {"requested": False, "refreshed": set()}
+
+
+def refresh_vector_store_cache() -> None:
+    """
+    Ignore cached vector store ids (memory and disk) the next time each book's
+    store is resolved in this process. Backs the --refresh-store-cache flag.
+    """
+    with _VECTOR_STORE_LOCK:
+        _STORE_CACHE_REFRESH["requested"] = True
+        _STORE_CACHE_REFRESH["refreshed"].clear()
+        _VECTOR_STORE_IDS.clear()
+
+
+def invalidate_vector_store_id(
+    book_path: str, assistant_name: str | None = None
+) -> None:
+    """
+    Drop the cached vector store id for a book so the next lookup lists stores again.
+
+    Args:
+        book_path (str): Path to the book directory.
+        assistant_name (str, optional): Assistant name; defaults to the book folder name.
+    """
+    name = assistant_name or Path(book_path).name
+    expected_name = f"{name} Docs"
+    with _VECTOR_STORE_LOCK:
+        _VECTOR_STORE_IDS.pop((_book_key(book_path), expected_name), None)
+    clear_vector_store_id(book_path, expected_name)
+
+
+def _retrieval_mode(config) -> str:
+    """The book's `retrieval` setting, falling back to "remote" when unset or unknown."""
+    mode = str(getattr(config, "retrieval", "remote") or "remote").strip().lower()
+    if mode not in RETRIEVAL_MODES:
+        _debug(f"Unknown retrieval mode '{mode}'; using 'remote'.")
+        return "remote"
+    return mode
+
+
+def _embedder(book_path: str, config):
+    """Return (embed function, model name) for the book's dense index."""
+    model = str(getattr(config, "embedding_model", "") or LOCAL_EMBEDDING_MODEL)
+    if model == LOCAL_EMBEDDING_MODEL:
+        return hashing_embedder(), model
+    client = initialize_openai_client(book_path)
+
+    def embed(texts):
+        response = client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+
+    return embed, model
+
+
+def refresh_local_indexes(book_path: str, config=None) -> Dict[str, int]:
+    """
+    Bring the book's local retrieval indexes up to date: the BM25 index, and
+    for hybrid retrieval also the dense index (embedding only new chunks).
+
+    Returns:
+        dict: The BM25 refresh counts, plus `embedded` for hybrid retrieval.
+    """
+    config = config or load_book_config(book_path)
+    counts = bm25_index.refresh(book_path)
+    if _retrieval_mode(config) == "hybrid" and dense_available():
+        try:
+            embed, model = _embedder(book_path, config)
+            counts["embedded"] = dense_index.refresh(book_path, embed, model)[
+                "embedded"
+            ]
+        except Exception as e:
+            console.print(
+                f"[bold yellow]Could not update the dense index: {str(e)}[/bold yellow]"
+            )
+    return counts
 
 
-def get_vector_store_id_by_name(assistant_name: str, client) -> str:
+def _book_search(
+    book_path: str, retrieval: str, config, args: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Run the book_search tool: BM25 alone, or in hybrid mode BM25 fused with
+    the dense index (falling back to BM25 if embedding fails).
+    """
+    query = args.get("query", "")
+    max_results = min(20, int(args.get("max_results") or 5))
+    path_prefix = args.get("path_prefix")
+    if retrieval != "hybrid" or not dense_available():
+        return bm25_index.search(
+            book_path, query, max_results=max_results, path_prefix=path_prefix
+        )
+    # Fetch deeper lists from both rankers so fusion has something to merge
+    result = bm25_index.search(
+        book_path, query, max_results=max_results * 2, path_prefix=path_prefix
+    )
+    if result.get("error"):
+        return result
+    try:
+        embed, model = _embedder(book_path, config)
+        dense_index.refresh(book_path, embed, model)
+        dense = dense_index.search(
+            book_path,
+            embed([query])[0],
+            max_results=max_results * 2,
+            path_prefix=path_prefix,
+        )
+    except Exception as e:
+        _debug(f"Dense search failed ({e}); using BM25 results only.")
+        result["results"] = result["results"][:max_results]
+        return result
+    result["results"] = fuse_results(result["results"], dense, max_results=max_results)
+    return result
+
+
+def _book_key(book_path: str | None) -> str:
+    if not book_path:
+        return ""
+    try:
+        return str(Path(book_path).resolve())
+    except Exception:
+        return str(book_path)
+
+
+def _find_vector_store_id(client, expected_name: str) -> str | None:
+    # Iterating the page object follows the pagination cursor across all pages
+    for vector_store in client.vector_stores.list(limit=100):
+        if getattr(vector_store, "name", None) == expected_name:
+            return vector_store.id
+    return None
+
+
+def get_vector_store_id_by_name(
+    assistant_name: str, client, book_path: str = None
+) -> str:
     """
     Retrieve the vector store ID by the assistant's name.
 
+    When book_path is given, the resolved id is cached in memory and in the book
+    folder, so only the first lookup lists the account's vector stores.
+
     Args:
         assistant_name (str): The name of the assistant.
         client (OpenAI): The OpenAI client.
+        book_path (str, optional): Path to the book directory used for caching.
 
     Returns:
         str: The ID of the vector store associated with the assistant's name, or None if not found.
     """
+    expected_name = f"{assistant_name} Docs"
+    key = (_book_key(book_path), expected_name)
+
+    with _VECTOR_STORE_LOCK:
+        bypass = (
+            _STORE_CACHE_REFRESH["requested"]
+            and key not in _STORE_CACHE_REFRESH["refreshed"]
+        )
+        cached = None if bypass else _VECTOR_STORE_IDS.get(key)
+    if cached:
+        return cached
+    if book_path and not bypass:
+        cached = load_vector_store_id(book_path, expected_name)
+        if cached:
+            with _VECTOR_STORE_LOCK:
+                _VECTOR_STORE_IDS[key] = cached
+            return cached
+
     try:
-        vector_stores = client.vector_stores.list()
+        vector_store_id = _find_vector_store_id(client, expected_name)
     except Exception as e:
         console.print(
             f"[bold red]Error: The OpenAI API version being used does not support vector stores. Please ensure you are using a compatible version.[/bold red]"
@@ -98,15 +382,67 @@ def get_vector_store_id_by_name(assistant_name: str, client) -> str:
         console.print(f"[bold red]Error details: {str(e)}[/bold red]")
         return None
 
-    expected_name = f"{assistant_name} Docs"
-    for vector_store in vector_stores.data:
-        if vector_store.name == expected_name:
-            return vector_store.id
+    with _VECTOR_STORE_LOCK:
+        if bypass:
+            _STORE_CACHE_REFRESH["refreshed"].add(key)
+    if vector_store_id is None:
+        if book_path:
+            clear_vector_store_id(book_path, expected_name)
+        console.print(
+            f"[bold red]No vector store found with name '{expected_name}'.[/bold red]"
+        )
+        return None
 
-    console.print(
-        f"[bold red]No vector store found with name '{expected_name}'.[/bold red]"
+    _remember_vector_store_id(book_path, expected_name, vector_store_id)
+    return vector_store_id
+
+
+def _remember_vector_store_id(
+    book_path: str | None, store_name: str, vector_store_id: str
+) -> None:
+    with _VECTOR_STORE_LOCK:
+        _VECTOR_STORE_IDS[(_book_key(book_path), store_name)] = vector_store_id
+    if book_path:
+        save_vector_store_id(book_path, store_name, vector_store_id)
+
+
+def _call_with_vector_store(book_path: str, assistant_name: str, client, fn):
+    """
+    Call fn(vector_store_id) and, if the cached id turns out to be stale (404),
+    invalidate it, resolve the store again and retry once.
+    """
+    vector_store_id = get_vector_store_id_by_name(assistant_name, client, book_path)
+    try:
+        return fn(vector_store_id)
+    except openai.NotFoundError:
+        if not vector_store_id:
+            raise
+        _debug(f"Vector store '{vector_store_id}' not found; refreshing cached id.")
+        invalidate_vector_store_id(book_path, assistant_name)
+        return fn(get_vector_store_id_by_name(assistant_name, client, book_path))
+
+
+async def _acall_with_vector_store(book_path: str, assistant_name: str, client, fn):
+    """
+    Async counterpart of _call_with_vector_store: awaits fn(vector_store_id) and
+    retries once with a freshly resolved id on a 404. Store lookups use the
+    synchronous client in a worker thread (they are cached after the first call).
+    """
+    vector_store_id = await asyncio.to_thread(
+        get_vector_store_id_by_name, assistant_name, client, book_path
     )
-    return None
+    try:
+        return await fn(vector_store_id)
+    except openai.NotFoundError:
+        if not vector_store_id:
+            raise
+        _debug(f"Vector store '{vector_store_id}' not found; refreshing cached id.")
+        invalidate_vector_store_id(book_path, assistant_name)
+        return await fn(
+            await asyncio.to_thread(
+                get_vector_store_id_by_name, assistant_name, client, book_path
+            )
+        )
 
 
 def upload_markdown_files_to_vector_store(
@@ -175,33 +511,14 @@ def load_markdown_files(book_path: str) -> list:
     console.print(
         f"[bold blue]Loading Markdown files from chapters/ outline/ worldbuilding/ in '{book_path}'...[/bold blue]"
     )
-    md_files = glob.glob(os.path.join(book_path, "**", "*.md"), recursive=True)
-
-    allowed_top_dirs = {"chapters", "outline", "worldbuilding"}
-    excluded_filenames = {"iterate.md", "chat.md", "getting_started.md"}
-
+    # Line counts come from the book manifest, which only re-reads edited files
     valid_md_files = []
-    for file_path in md_files:
-        try:
-            # Exclude any file inside the storycraftr docs folder
-            if os.sep + "storycraftr" + os.sep in file_path:
-                continue
-
-            # Ensure the file is under one of the allowed top-level folders
-            rel_path = os.path.relpath(file_path, book_path)
-            top_component = rel_path.split(os.sep)[0]
-            if top_component not in allowed_top_dirs:
-                continue
-
-            # Exclude explicitly undesired doc filenames
-            if os.path.basename(file_path) in excluded_filenames:
-                continue
-
-            with open(file_path, "r", encoding="utf-8") as file:
-                if sum(1 for _ in file) > 3:
-                    valid_md_files.append(file_path)
-        except UnicodeDecodeError:
+    for entry in book_manifest.files(book_path, content=True):
+        file_path = os.path.join(book_path, *entry["path"].split("/"))
+        if entry.get("error"):
             console.print(f"[bold red]Error reading file: {file_path}[/bold red]")
+        elif entry.get("lines", 0) > 3:
+            valid_md_files.append(file_path)
 
     console.print(
         f"[bold green]Loaded {len(valid_md_files)} Markdown files with more than 3 lines from allowed folders.[/bold green]"
@@ -223,15 +540,17 @@ def delete_assistant(book_path: str):
     name = os.path.basename(book_path)
     expected_name = f"{name} Docs"
     try:
-        vector_stores = client.vector_stores.list()
-        for vs in vector_stores.data:
-            if getattr(vs, "name", None) == expected_name:
-                console.print(f"[bold blue]Deleting vector store '{expected_name}'...[/bold blue]")
-                client.vector_stores.delete(vector_store_id=vs.id)
-                console.print(
-                    f"[bold green]Vector store '{expected_name}' deleted successfully.[/bold green]"
-                )
-                return
+        vector_store_id = _find_vector_store_id(client, expected_name)
+        invalidate_vector_store_id(book_path, name)
+        if vector_store_id:
+            console.print(
+                f"[bold blue]Deleting vector store '{expected_name}'...[/bold blue]"
+            )
+            client.vector_stores.delete(vector_store_id=vector_store_id)
+            console.print(
+                f"[bold green]Vector store '{expected_name}' deleted successfully.[/bold green]"
+            )
+            return
         console.print(f"[bold yellow]No vector store named '{expected_name}' found.[/bold yellow]")
     except Exception as e:
         console.print(f"[bold red]Error deleting resources: {str(e)}[/bold red]")
@@ -262,15 +581,25 @@ def create_or_get_assistant(book_path: str):
 
     name = Path(book_path).name
 
-    # Ensure vector store exists (create if missing)
-    vector_store_id = get_vector_store_id_by_name(name, client)
-    if vector_store_id is None:
+    retrieval = _retrieval_mode(config)
+    if retrieval != "remote":
+        # book_search reads local indexes; build them or bring them up to date
+        refresh_local_indexes(book_path, config)
+
+    # Ensure vector store exists (create if missing); local retrieval needs none
+    vector_store_id = (
+        None
+        if retrieval == "local"
+        else get_vector_store_id_by_name(name, client, book_path)
+    )
+    if vector_store_id is None and retrieval != "local":
         try:
             console.print(f"[bold blue]Creating vector store for {name}...[/bold blue]")
             vector_store = client.vector_stores.create(name=f"{name} Docs")
+            _remember_vector_store_id(book_path, f"{name} Docs", vector_store.id)
 
             console.print(f"[bold blue]Loading book files from {book_path}...[/bold blue]")
-            upload_markdown_files_to_vector_store(vector_store.id, book_path, client)
+            sync_vector_store_files(book_path, vector_store.id, client)
 
             console.print("[bold blue]Waiting for files to be processed...[/bold blue]")
             time.sleep(5)
@@ -278,7 +607,11 @@ def create_or_get_assistant(book_path: str):
             vector_store_id = vector_store.id
         except Exception as e:
             console.print(f"[bold red]Error preparing vector store: {str(e)}[/bold red]")
-            raise
+            if retrieval == "remote":
+                raise
+            console.print(
+                "[bold yellow]Continuing with the local book_search index only.[/bold yellow]"
+            )
 
     # Return a lightweight assistant-like object
     class LightweightAssistant:
@@ -318,161 +651,109 @@ def _detect_line_ending(text: str) -> str:
     return "\n"
 
 
-def _read_text_file(book_path: str, path: str) -> Dict[str, Any]:
+def _read_text_file(
+    book_path: str,
+    path: str,
+    *,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    start_byte: Optional[int] = None,
+    end_byte: Optional[int] = None,
+    section: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Read a book file, whole or in part.
+
+    Only one mode applies, checked in this order: a markdown section by heading
+    title, a 1-based inclusive line range, or a UTF-8 byte range (end exclusive,
+    trimmed to whole characters). With no range the whole file is returned.
+    The `sha256` of the whole file is always included so an edit can pass it
+    back as `if_match`.
+    """
     file_path = _normalize_path(book_path, path)
     if not file_path.exists():
         return {"path": str(file_path), "exists": False, "content": ""}
     content = file_path.read_text(encoding="utf-8")
-    return {"path": str(file_path), "exists": True, "content": content}
-
-
-def _build_anchor_pattern(
-    anchor: str,
-    *,
-    use_regex: bool,
-    case_sensitive: bool,
-    loose_whitespace: bool,
-    normalize_quotes: bool,
-):
-    if use_regex:
-        flags = 0 if case_sensitive else re.IGNORECASE
-        return re.compile(anchor, flags)
-
-    pattern = re.escape(anchor)
-    if loose_whitespace:
-        # Replace any escaped whitespace runs with \s+
-        pattern = re.sub(r"\\\s+", r"\\s+", pattern)
-        pattern = re.sub(r"(?:\\\s)+", r"\\s+", pattern)
-        pattern = re.sub(r"\\\n|\\\r", r"\\s+", pattern)
-        pattern = re.sub(r"\\\t", r"\\s+", pattern)
-        pattern = pattern.replace(" ", r"\s+")
-
-    if normalize_quotes:
-        # Allow curly quotes and dashes variations in target
-        pattern = (
-            pattern
-            .replace(re.escape("\""), r"[\"“”]")
-            .replace(re.escape("'"), r"['‘’]")
-            .replace(re.escape("-"), r"[-–—]")
+    result: Dict[str, Any] = {
+        "path": str(file_path),
+        "exists": True,
+        "sha256": _content_hash(content),
+    }
+    if section:
+        entry = find_section(content, section)
+        if entry is None:
+            result.update(
+                content="",
+                error=f"No heading matches '{section}'. Use fs_outline to list the headings.",
+            )
+            return result
+        start_line, end_line = entry["start_line"], entry["end_line"]
+        result["section"] = entry["title"]
+    if start_line is not None or end_line is not None:
+        lines = content.splitlines(keepends=True)
+        first = max(1, int(start_line or 1))
+        last = min(len(lines), int(end_line or len(lines)))
+        result.update(
+            content="".join(lines[first - 1 : last]),
+            start_line=first,
+            end_line=last,
+            total_lines=len(lines),
         )
-
-    flags = 0 if case_sensitive else re.IGNORECASE
-    return re.compile(pattern, flags)
+        return result
+    if start_byte is not None or end_byte is not None:
+        data = content.encode("utf-8")
+        first = max(0, int(start_byte or 0))
+        last = min(len(data), int(end_byte if end_byte is not None else len(data)))
+        result.update(
+            content=data[first:last].decode("utf-8", errors="ignore"),
+            start_byte=first,
+            end_byte=last,
+            total_bytes=len(data),
+        )
+        return result
+    result["content"] = content
+    return result
 
 
-def _apply_replace_text(
-    content: str,
-    find: str,
-    replace: str,
-    *,
-    use_regex: bool = False,
-    case_sensitive: bool = True,
-    loose_whitespace: bool = False,
-    normalize_quotes: bool = False,
-    occurrence: Optional[int] = None,  # 1-based; None means all
-) -> Dict[str, Any]:
-    replaced = 0
-    new_content = content
-    # Use compiled pattern that can be loose on whitespace/quotes
-    pattern = _build_anchor_pattern(
-        find,
-        use_regex=use_regex,
-        case_sensitive=case_sensitive,
-        loose_whitespace=loose_whitespace,
-        normalize_quotes=normalize_quotes,
-    )
-    if occurrence is None:
-        new_content, replaced = pattern.subn(replace, content)
-    else:
-        cnt = 0
-        def _n(m):
-            nonlocal cnt, replaced
-            cnt += 1
-            if cnt == occurrence:
-                replaced += 1
-                return replace
-            return m.group(0)
-        new_content = pattern.sub(_n, content)
-
-    return {"content": new_content, "replaced": replaced}
+def _fs_outline(book_path: str, path: str) -> Dict[str, Any]:
+    """Return the heading tree of a book file with line and byte offsets."""
+    file_path = _normalize_path(book_path, path)
+    if not file_path.exists():
+        return {"path": str(file_path), "exists": False, "headings": []}
+    content = file_path.read_text(encoding="utf-8")
+    return {
+        "path": str(file_path),
+        "exists": True,
+        "total_lines": len(content.splitlines()),
+        "total_bytes": len(content.encode("utf-8")),
+        "headings": markdown_outline(content),
+    }
 
 
-def _apply_replace_between(
-    content: str,
-    start_marker: str,
-    end_marker: str,
-    replacement: str,
-    *,
-    include_markers: bool = False,
-    occurrence: Optional[int] = 1,  # default first between pair
-    case_sensitive: bool = True,
-    loose_whitespace: bool = False,
-    normalize_quotes: bool = False,
-) -> Dict[str, Any]:
-    start_pat = _build_anchor_pattern(
-        start_marker,
-        use_regex=False,
-        case_sensitive=case_sensitive,
-        loose_whitespace=loose_whitespace,
-        normalize_quotes=normalize_quotes,
-    )
-    end_pat = _build_anchor_pattern(
-        end_marker,
-        use_regex=False,
-        case_sensitive=case_sensitive,
-        loose_whitespace=loose_whitespace,
-        normalize_quotes=normalize_quotes,
-    )
-    start_pos = 0
-    for i in range(occurrence or 1):
-        m_start = start_pat.search(content, start_pos)
-        if not m_start:
-            return {"content": content, "replaced": 0}
-        m_end = end_pat.search(content, m_start.end())
-        if not m_end:
-            return {"content": content, "replaced": 0}
-        start_pos = m_end.end()
-    s0, s1 = m_start.span()
-    e0, e1 = m_end.span()
-    if include_markers:
-        new_content = content[:s0] + replacement + content[e1:]
-    else:
-        new_content = content[:s1] + replacement + content[e0:]
-    return {"content": new_content, "replaced": 1}
+def _content_hash(text: str) -> str:
+    """Hash of a file's text, independent of its line endings."""
+    normalized = text.replace("\r\n", "\n").replace("\r", "\n")
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
-def _apply_insert(
-    content: str,
-    anchor: str,
-    insertion: str,
-    *,
-    position: str = "after",  # "before" | "after"
-    occurrence: Optional[int] = 1,
-    case_sensitive: bool = True,
-    loose_whitespace: bool = False,
-    normalize_quotes: bool = False,
-) -> Dict[str, Any]:
-    pat = _build_anchor_pattern(
-        anchor,
-        use_regex=False,
-        case_sensitive=case_sensitive,
-        loose_whitespace=loose_whitespace,
-        normalize_quotes=normalize_quotes,
+def _changed_spans(before: str, after: str) -> List[Dict[str, int]]:
+    """Line spans (1-based, in the new text) that differ between two versions."""
+    matcher = difflib.SequenceMatcher(
+        None, before.splitlines(), after.splitlines(), autojunk=False
     )
-    start = 0
-    m = None
-    for i in range(occurrence or 1):
-        m = pat.search(content, start)
-        if not m:
-            return {"content": content, "inserted": 0}
-        start = m.end()
-    if position == "before":
-        idx = m.start()
-        new_content = content[:idx] + insertion + content[idx:]
-    else:
-        idx = m.end()
-        new_content = content[:idx] + insertion + content[idx:]
-    return {"content": new_content, "inserted": 1}
+    spans = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        spans.append(
+            {
+                "start_line": j1 + 1,
+                "end_line": j2,
+                "old_lines": i2 - i1,
+                "new_lines": j2 - j1,
+            }
+        )
+    return spans
 
 
 def _fs_apply_text_edits(
@@ -481,84 +762,72 @@ def _fs_apply_text_edits(
     edits: List[Dict[str, Any]],
     *,
     create_if_missing: bool = True,
+    if_match: Optional[str] = None,
 ) -> Dict[str, Any]:
+    """
+    Apply surgical edits to a book file under a per-path lock.
+
+    When `if_match` is given and the file no longer has that hash, the edits
+    are replayed on the current text if every anchor still resolves; otherwise
+    nothing is written and a conflict is returned.
+    """
     file_path = _normalize_path(book_path, path)
-    exists = file_path.exists()
-    text = file_path.read_text(encoding="utf-8") if exists else ""
-    original_newline = _detect_line_ending(text) if exists else os.linesep
-    total_changes = 0
-    for edit in edits:
-        etype = edit.get("type")
-        if etype == "replace_text":
-            res = _apply_replace_text(
-                text,
-                edit.get("find", ""),
-                edit.get("replace", ""),
-                use_regex=bool(edit.get("use_regex", False)),
-                case_sensitive=bool(edit.get("case_sensitive", True)),
-                loose_whitespace=bool(edit.get("loose_whitespace", True)),
-                normalize_quotes=bool(edit.get("normalize_quotes", True)),
-                occurrence=edit.get("occurrence"),
-            )
-            total_changes += int(res.get("replaced", 0))
-            text = res.get("content", text)
-        elif etype == "replace_between":
-            res = _apply_replace_between(
-                text,
-                edit.get("start_marker", ""),
-                edit.get("end_marker", ""),
-                edit.get("replacement", ""),
-                include_markers=bool(edit.get("include_markers", False)),
-                occurrence=edit.get("occurrence", 1),
-                case_sensitive=bool(edit.get("case_sensitive", True)),
-                loose_whitespace=bool(edit.get("loose_whitespace", True)),
-                normalize_quotes=bool(edit.get("normalize_quotes", True)),
-            )
-            total_changes += int(res.get("replaced", 0))
-            text = res.get("content", text)
-        elif etype in ("insert_before", "insert_after"):
-            res = _apply_insert(
-                text,
-                edit.get("anchor", ""),
-                edit.get("insert", ""),
-                position="before" if etype == "insert_before" else "after",
-                occurrence=edit.get("occurrence", 1),
-                case_sensitive=bool(edit.get("case_sensitive", True)),
-                loose_whitespace=bool(edit.get("loose_whitespace", True)),
-                normalize_quotes=bool(edit.get("normalize_quotes", True)),
-            )
-            total_changes += int(res.get("inserted", 0))
-            text = res.get("content", text)
+    with path_lock(book_path, str(file_path)):
+        exists = file_path.exists()
+        text = file_path.read_text(encoding="utf-8") if exists else ""
+        original_text = text
+        original_newline = _detect_line_ending(text) if exists else os.linesep
+        current_hash = _content_hash(text) if exists else None
+        rebased = bool(if_match) and if_match != current_hash
+        if rebased:
+            plan = apply_edits_checked(text, edits)
+            if plan["unresolved"]:
+                return {
+                    "path": str(file_path),
+                    "conflict": True,
+                    "changes": 0,
+                    "sha256": current_hash,
+                    "expected_sha256": if_match,
+                    "unresolved_edits": plan["unresolved"],
+                    "error": "The file changed since it was read and some anchors no longer match. Read it again and retry.",
+                }
         else:
-            # Unknown edit type; skip
-            continue
-
-    if not exists and not create_if_missing:
-        return {
-            "path": str(file_path),
-            "created": False,
-            "changes": total_changes,
-            "preview": text[:2000],
-        }
-
-    # Ensure parent dir exists
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    # Normalize newline endings to original style
-    normalized = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
-    text_to_write = original_newline.join(normalized)
-    file_path.write_text(text_to_write, encoding="utf-8")
-    return {
+            plan = apply_edit_plan(text, edits)
+        text, total_changes = plan["content"], plan["changes"]
+
+        # Compact result: a content hash and the changed line spans, not the text
+        if not exists and not create_if_missing:
+            return {
+                "path": str(file_path),
+                "created": False,
+                "changes": total_changes,
+                "sha256": _content_hash(text),
+                "spans": _changed_spans(original_text, text),
+            }
+
+        # Ensure parent dir exists
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Normalize newline endings to original style
+        normalized = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        text_to_write = original_newline.join(normalized)
+        atomic_write_text(file_path, text_to_write, book_path=book_path)
+        text_index.update(book_path, str(file_path), text_to_write)
+    result = {
         "path": str(file_path),
         "created": not exists,
         "changes": total_changes,
-        "preview": text[:2000],
+        "sha256": _content_hash(text_to_write),
+        "spans": _changed_spans(original_text, text),
     }
+    if rebased:
+        result["rebased"] = True
+    return result
 
 
  
 
 
-def create_message(
+async def acreate_message(
     book_path: str,
     thread_id: str,
     content: str,
@@ -566,9 +835,18 @@ def create_message(
     file_path: str = None,
     progress: Progress = None,
     task_id=None,
+    on_delta=None,
+    priority: str | None = None,
+    context_tokens: int | None = None,
 ) -> str:
     """
-    Create a message in the thread and return a single complete response.
+    Create a message in the thread and return a single complete response (async).
+
+    Model requests go through the shared AsyncOpenAI client and are bounded by
+    the book's max_concurrency semaphore, so many generations can share one
+    event loop. When `on_delta` is given the responses are streamed and every
+    text delta is passed to it as it arrives, including text produced between
+    tool calls.
 
     Args:
         book_path (str): Path to the book directory.
@@ -578,16 +856,43 @@ def create_message(
         file_path (str, optional): The path to a file to attach as an attachment. Defaults to None.
         progress (Progress, optional): Progress object for tracking. Defaults to None.
         task_id (int, optional): Task ID for the progress bar.
+        on_delta (callable, optional): Called with each streamed text delta. Defaults to None.
+        priority (str, optional): Scheduler lane for the requests; defaults to the caller's lane.
+        context_tokens (int, optional): Token budget for the content of `file_path`
+            sent with the request; defaults to the book's `context_tokens`.
 
     Returns:
         str: The generated response text from the assistant.
     """
-    client = initialize_openai_client(book_path)
+    if priority is not None:
+        # Task-local: only requests made by this call are affected
+        with request_priority(priority):
+            return await acreate_message(
+                book_path,
+                thread_id,
+                content,
+                assistant,
+                file_path=file_path,
+                progress=progress,
+                task_id=task_id,
+                on_delta=on_delta,
+                context_tokens=context_tokens,
+            )
+    client = initialize_async_openai_client(book_path)
+    sync_client = initialize_openai_client(book_path)
     config = load_book_config(book_path)
-    should_print = progress is None
+    concurrency = book_semaphore(book_path, getattr(config, "max_concurrency", 4))
+    retrieval = _retrieval_mode(config)
+    function_tools = surgical_tools_schema()
+    if retrieval != "remote":
+        function_tools.append(book_search_tool_schema())
+    streaming = on_delta is not None
+    should_print = progress is None and not streaming
+    started_at = time.monotonic()
+    first_text_at: Optional[float] = None
 
     internal_progress = False
-    if progress is None:
+    if progress is None and not streaming:
         progress = Progress()
         task_id = progress.add_task("[cyan]Waiting for assistant response...", total=50)
         internal_progress = True
@@ -599,6 +904,9 @@ def create_message(
 
     # Track which files we've backed up during this invocation to avoid overwriting
     backed_up_files: set[str] = set()
+    tool_guidance = ""
+    book_context = ""
+    context_stats: Optional[Dict[str, Any]] = None
 
     if file_path and os.path.exists(file_path):
         if should_print:
@@ -607,13 +915,10 @@ def create_message(
             )
         with open(file_path, "r", encoding="utf-8") as f:
             file_content = f.read()
-            # Create/overwrite backup of existing file as .md.back (or .back if not .md)
+            # Create/overwrite backup of existing file as .md.back (or .back if not .md);
+            # the previous text is also kept in the journal's backups
             try:
-                backup_path = file_path + ".back"
-                if file_path.lower().endswith(".md"):
-                    backup_path = file_path + ".back"
-                # Ensure parent dir exists, then copy
-                shutil.copyfile(file_path, backup_path)
+                backup_path = backup_file(file_path, book_path)
                 _debug(f"Backed up '{file_path}' to '{backup_path}'.")
                 try:
                     backed_up_files.add(str(Path(file_path).resolve()))
@@ -628,9 +933,24 @@ def create_message(
             except Exception:
                 rel_path = file_path
             tool_guidance = tool_usage_guidance_for_file(rel_path)
-            content = (
-                f"{tool_guidance}\n\nHere is the existing content to improve (for context):\n{file_content}\n\n{content}"
+            # Long files are sent as an outline plus the passages relevant to
+            # the request; the tools fetch the rest on demand
+            budget = context_tokens
+            if budget is None:
+                budget = getattr(config, "context_tokens", CONTEXT_TOKENS)
+            book_context, context_stats = assemble_file_context(
+                file_content,
+                rel_path,
+                content,
+                budget_tokens=budget,
+                sha256=_content_hash(file_content),
             )
+            if context_stats["partial"]:
+                _debug(
+                    f"Context for '{rel_path}': {context_stats['chunks']}/{context_stats['chunks_total']} passages, "
+                    f"~{context_stats['context_tokens']} of {context_stats['file_tokens']} tokens "
+                    f"(saved ~{context_stats['saved_tokens']})."
+                )
             _debug(f"Editing existing file detected; advising tool usage for '{rel_path}'.")
     else:
         if should_print:
@@ -638,9 +958,47 @@ def create_message(
                 f"[bold blue]Using provided prompt to generate new content...[/bold blue]"
             )
 
+    # Stable sections first, so requests share a cacheable prefix
+    request_prompt = assemble_prompt(
+        FORMAT_OUTPUT.format(
+            reference_author=config.reference_author, language=config.primary_language
+        ),
+        content,
+        tool_guidance=tool_guidance,
+        book_context=book_context,
+    )
+
+    # Replay an identical earlier request from the on-disk cache (opt-in). The key
+    # is built before the date phrase is added, since that phrase is random.
+    cache_key = None
+    if response_cache.enabled:
+        cache_key = response_cache.make_key(
+            assistant.model,
+            getattr(assistant, "instructions", ""),
+            request_prompt,
+            file_hashes=_request_file_hashes(book_path, file_path, retrieval),
+            tools=function_tools,
+        )
+        cached = response_cache.get(book_path, cache_key)
+        if cached is not None:
+            _debug(f"Response cache hit ({cache_key[:12]}).")
+            # Replayed prompts are still logged, marked as served from the cache
+            log_prompt(
+                book_path,
+                {
+                    "date": datetime.now().strftime("%B %d, %Y"),
+                    "original_prompt": request_prompt,
+                    "cached": True,
+                },
+            )
+            cached_text = cached.get("text", "") or ""
+            if streaming and cached_text:
+                on_delta(cached_text)
+            return cached_text
+
     # Generar el prompt con hash
     prompt_with_hash = generate_prompt_with_hash(
-        f"{FORMAT_OUTPUT.format(reference_author=config.reference_author, language=config.primary_language)}\n\n{content}",
+        request_prompt,
         datetime.now().strftime("%B %d, %Y"),
         book_path=book_path,
     )
@@ -649,91 +1007,27 @@ def create_message(
         if internal_progress:
             progress.start()
 
-        # Helper to extract text robustly from Responses API
-        def _extract_text(resp) -> str:
-            # Prefer convenience property if present
-            for attr in ("output_text",):
-                try:
-                    val = getattr(resp, attr)
-                    if isinstance(val, str) and val:
-                        return val
-                except Exception:
-                    pass
-            # Fallback to dict parsing for generic shapes
-            data = None
-            # Accept raw dicts from HTTP fallback
-            if isinstance(resp, dict):
-                data = resp
-            for to_dict in (getattr(resp, "model_dump", None), getattr(resp, "to_dict", None)):
-                try:
-                    if callable(to_dict):
-                        data = to_dict()
-                        break
-                except Exception:
-                    pass
-            if not isinstance(data, dict):
-                return ""
-            if isinstance(data.get("output_text"), str):
-                return data["output_text"]
-            # Helper: deduplicate while preserving order
-            def _dedup_preserve_order(chunks: list[str]) -> list[str]:
-                seen: set[str] = set()
-                result: list[str] = []
-                for chunk in chunks:
-                    if not isinstance(chunk, str):
-                        continue
-                    s = chunk.strip()
-                    if not s:
-                        continue
-                    if s in seen:
-                        continue
-                    # Avoid immediate repeats differing only by whitespace
-                    if result and s == result[-1].strip():
-                        continue
-                    seen.add(s)
-                    result.append(chunk)
-                return result
-
-            output_text_chunks = []
-            text_value_chunks = []
-            output = data.get("output")
-            if isinstance(output, list):
-                for item in output:
-                    if not isinstance(item, dict):
-                        continue
-                    contents = item.get("content")
-                    if isinstance(contents, list):
-                        for c in contents:
-                            if not isinstance(c, dict):
-                                continue
-                            # Example structure: {"type": "output_text", "text": "..."}
-                            if c.get("type") == "output_text" and isinstance(c.get("text"), str):
-                                output_text_chunks.append(c.get("text"))
-                            # Older structure: {"type": "text", "text": {"value": "..."}}
-                            elif c.get("type") == "text":
-                                inner = c.get("text")
-                                if isinstance(inner, dict) and isinstance(inner.get("value"), str):
-                                    text_value_chunks.append(inner.get("value"))
-            # Prefer output_text chunks if present; else fall back to text.value
-            if output_text_chunks:
-                deduped = _dedup_preserve_order(output_text_chunks)
-                return "\n".join(deduped)
-            if text_value_chunks:
-                deduped = _dedup_preserve_order(text_value_chunks)
-                return "\n".join(deduped)
-            return ""
-
         # Compose base instruction + user input
         base_instructions = assistant.instructions if hasattr(assistant, "instructions") else ""
-        vector_store_id = get_vector_store_id_by_name(assistant.name, client)
-
-        def _create_response(input_items):
-            tools: List[Dict[str, Any]] = (
-                [{"type": "file_search", "vector_store_ids": [vector_store_id]}]
-                if vector_store_id
-                else [{"type": "file_search"}]
-            )
-            tools.extend(surgical_tools_schema())
+        vector_store_id = None
+        request_sizes: List[int] = []
+        usage = {"input_tokens": 0, "cached_tokens": 0}
+
+        # Every response is wrapped in a ResponseView once, here; the tool loop,
+        # usage accounting and activity summary all read from that view
+        async def _create_response(
+            input_items, previous_response_id=None
+        ) -> ResponseView:
+            nonlocal first_text_at
+            tools: List[Dict[str, Any]] = []
+            if vector_store_id:
+                tools.append(
+                    {"type": "file_search", "vector_store_ids": [vector_store_id]}
+                )
+            elif retrieval == "remote":
+                tools.append({"type": "file_search"})
+            # In hybrid mode without a reachable store, book_search is the only retrieval
+            tools.extend(function_tools)
             kwargs = dict(
                 model=assistant.model,
                 input=input_items,
@@ -742,173 +1036,246 @@ def create_message(
                 top_p=1.0,
                 tools=tools,
                 tool_choice="auto",
-                parallel_tool_calls=False
+                parallel_tool_calls=True,
             )
-            _debug("Creating response with tools: file_search + surgical (fs_read_text, fs_apply_text_edits)")
-            return client.responses.create(**kwargs)
-
-        def _extract_tool_calls(resp) -> List[Dict[str, Any]]:
-            data = None
-            # Accept raw dicts or SDK objects
-            if isinstance(resp, dict):
-                data = resp
-            else:
-                for to_dict in (getattr(resp, "model_dump", None), getattr(resp, "to_dict", None)):
-                    try:
-                        if callable(to_dict):
-                            data = to_dict()
-                            break
-                    except Exception:
-                        pass
-            if not isinstance(data, dict):
-                return []
-            calls: List[Dict[str, Any]] = []
-            # Pattern 1: Output contains function_call/tool_use items
-            output = data.get("output")
-            if isinstance(output, list):
-                for item in output:
-                    if not isinstance(item, dict):
-                        continue
-                    t = item.get("type")
-                    if t in ("function_call", "tool_use"):
-                        name = item.get("name") or (item.get("function", {}) or {}).get("name")
-                        args = item.get("arguments") or (item.get("function", {}) or {}).get("arguments")
-                        call_id = (
-                            item.get("call_id")
-                            or item.get("id")
-                            or (item.get("function", {}) or {}).get("id")
-                        )
-                        if name and call_id:
-                            calls.append({"name": name, "arguments": args, "call_id": call_id})
-            # Pattern 2: required_action submit_tool_outputs
-            ra = data.get("required_action") or {}
-            ra_type = ra.get("type")
-            if ra_type == "submit_tool_outputs":
-                tool_calls = (
-                    (ra.get("submit_tool_outputs") or {}).get("tool_calls")
-                    or ra.get("tool_calls")
-                    or []
+            if previous_response_id:
+                kwargs["previous_response_id"] = previous_response_id
+            request_sizes.append(_input_size(input_items))
+            _debug(
+                f"Request {len(request_sizes)}: {request_sizes[-1]} bytes of input"
+                + (
+                    f" (chained on {previous_response_id})"
+                    if previous_response_id
+                    else ""
                 )
-                for c in tool_calls:
-                    if not isinstance(c, dict):
-                        continue
-                    fn = c.get("function") or {}
-                    name = fn.get("name") or c.get("name")
-                    args = fn.get("arguments") or c.get("arguments")
-                    call_id = c.get("id") or c.get("tool_call_id") or c.get("call_id")
-                    if name and call_id:
-                        calls.append({"name": name, "arguments": args, "call_id": call_id})
-            return calls
+            )
+            _debug(
+                "Creating response with tools: "
+                + ", ".join(t.get("name") or t["type"] for t in tools)
+            )
+            async with concurrency:
+                if not streaming:
+                    view = ResponseView(await client.responses.create(**kwargs))
+                    if first_text_at is None and view.text:
+                        first_text_at = time.monotonic()
+                    _record_usage(view, usage)
+                    return view
+                final = None
+                stream = await client.responses.create(stream=True, **kwargs)
+                async for event in stream:
+                    event_type = getattr(event, "type", "")
+                    if event_type == "response.output_text.delta":
+                        delta = getattr(event, "delta", "") or ""
+                        if delta:
+                            if first_text_at is None:
+                                first_text_at = time.monotonic()
+                            on_delta(delta)
+                    elif event_type in ("response.completed", "response.incomplete"):
+                        final = event.response
+                    elif event_type == "response.failed":
+                        error = getattr(getattr(event, "response", None), "error", None)
+                        raise RuntimeError(
+                            f"Streaming response failed: {getattr(error, 'message', None) or 'unknown error'}"
+                        )
+                    elif event_type == "error":
+                        raise RuntimeError(
+                            f"Streaming response failed: {getattr(event, 'message', None) or 'unknown error'}"
+                        )
+                if final is None:
+                    raise RuntimeError("Streaming response ended before completion.")
+                view = ResponseView(final)
+                _record_usage(view, usage)
+                return view
 
         # Track applied edits and activity for UI summary
         tool_edit_invocations = {"fs_apply_text_edits": 0, "changes": 0}
+        tool_batches = {"calls": 0, "batches": 0}
         activity_lines: List[str] = []
+        if context_stats and context_stats["partial"]:
+            activity_lines.append(
+                f"context: sent ~{context_stats['context_tokens']} of {context_stats['file_tokens']} tokens "
+                f"of {rel_path} ({context_stats['chunks']}/{context_stats['chunks_total']} passages, "
+                f"saved ~{context_stats['saved_tokens']})"
+            )
 
-        def _resolve_tools_loop(input_items, last_response):
+        async def _resolve_tools_loop(input_items, last_response):
             response_obj = last_response
             safety_counter = 0
+            chaining = True
             while True:
                 safety_counter += 1
                 if safety_counter > 8:
                     break
                 # Append the model's output (including reasoning and function_call items)
-                try:
-                    if hasattr(response_obj, "output") and isinstance(response_obj.output, list):
-                        input_items += response_obj.output
-                    else:
-                        data = response_obj if isinstance(response_obj, dict) else None
-                        if data is None:
-                            for to_dict in (getattr(response_obj, "model_dump", None), getattr(response_obj, "to_dict", None)):
-                                if callable(to_dict):
-                                    try:
-                                        data = to_dict()
-                                        break
-                                    except Exception:
-                                        pass
-                        if isinstance(data, dict) and isinstance(data.get("output"), list):
-                            input_items += data.get("output")
-                except Exception:
-                    pass
+                input_items += response_obj.output
 
-                calls = _extract_tool_calls(response_obj)
+                calls = response_obj.tool_calls
                 if calls:
                     _debug(f"Model requested {len(calls)} tool call(s): " + ", ".join([c.get("name") or "?" for c in calls]))
                 if not calls:
                     break
+                outputs_start = len(input_items)
 
-                # Execute tools and append function_call_output items
+                # Execute tools and append function_call_output items. Calls on
+                # different paths run concurrently; calls on the same path keep the
+                # model's order, so reads see earlier edits and edits never interleave.
+                parsed = []
                 for call in calls:
+                    name = call.get("name")
+                    args_raw = call.get("arguments") or "{}"
                     try:
-                        name = call.get("name")
-                        args_raw = call.get("arguments") or "{}"
+                        args = (
+                            json.loads(args_raw)
+                            if isinstance(args_raw, str)
+                            else args_raw
+                        )
+                    except Exception:
+                        args = {}
+                    if not isinstance(args, dict):
+                        args = {}
+                    if DEBUG:
+                        args_preview = json.dumps(args)[:300]
+                        _debug(f"Calling tool {name} with args {args_preview}...")
+                    # Log the tool call succinctly for UI
+                    try:
+                        args_preview_ui = json.dumps(args)
+                        if len(args_preview_ui) > 200:
+                            args_preview_ui = args_preview_ui[:200] + "..."
+                        activity_lines.append(f"tool: {name} args={args_preview_ui}")
+                    except Exception:
+                        pass
+                    parsed.append((call, name, args))
+
+                def _run_tool(name, args):
+                    if name == "fs_read_text":
+                        return _read_text_file(
+                            book_path,
+                            args.get("path", ""),
+                            start_line=args.get("start_line"),
+                            end_line=args.get("end_line"),
+                            start_byte=args.get("start_byte"),
+                            end_byte=args.get("end_byte"),
+                            section=args.get("section"),
+                        )
+                    if name == "fs_outline":
+                        return _fs_outline(book_path, args.get("path", ""))
+                    if name == "fs_search":
+                        return text_index.search(
+                            book_path,
+                            args.get("query", ""),
+                            use_regex=bool(args.get("use_regex", False)),
+                            case_sensitive=bool(args.get("case_sensitive", False)),
+                            path_prefix=args.get("path_prefix"),
+                            max_results=int(args.get("max_results") or 50),
+                        )
+                    if name == "book_search":
+                        return _book_search(book_path, retrieval, config, args)
+                    if name == "fs_apply_text_edits":
+                        # Before applying edits, ensure backup exists once per file for this invocation
                         try:
-                            args = json.loads(args_raw) if isinstance(args_raw, str) else args_raw
-                        except Exception:
-                            args = {}
-                        if DEBUG:
-                            args_preview = json.dumps(args)[:300]
-                            _debug(f"Calling tool {name} with args {args_preview}...")
-                        # Log the tool call succinctly for UI
+                            target_rel = args.get("path", "") or ""
+                            target_abs = _normalize_path(book_path, target_rel)
+                            target_abs_str = str(target_abs)
+                            if (
+                                target_abs.exists()
+                                and target_abs_str not in backed_up_files
+                            ):
+                                backup_file(target_abs_str, book_path)
+                                backed_up_files.add(target_abs_str)
+                        except Exception as be:
+                            _debug(
+                                f"Backup before edits failed for '{args.get('path', '')}': {be}"
+                            )
+                        return _fs_apply_text_edits(
+                            book_path,
+                            args.get("path", ""),
+                            args.get("edits", []) or [],
+                            create_if_missing=bool(args.get("create_if_missing", True)),
+                            if_match=args.get("if_match"),
+                        )
+                    return {"error": f"Unknown tool: {name}"}
+
+                # Searches span every file, so they run after the batch's edits land
+                groups: Dict[str, List[int]] = {}
+                searches: List[int] = []
+                for index, (_, name, args) in enumerate(parsed):
+                    if name in ("fs_search", "book_search"):
+                        searches.append(index)
+                        continue
+                    groups.setdefault(
+                        _tool_path_key(book_path, args.get("path", "")), []
+                    ).append(index)
+                results: List[Any] = [None] * len(parsed)
+
+                async def _run_group(indexes):
+                    for index in indexes:
+                        _, name, args = parsed[index]
                         try:
-                            args_preview_ui = json.dumps(args)
-                            if len(args_preview_ui) > 200:
-                                args_preview_ui = args_preview_ui[:200] + "..."
-                            activity_lines.append(f"tool: {name} args={args_preview_ui}")
+                            results[index] = await asyncio.to_thread(
+                                _run_tool, name, args
+                            )
+                        except Exception as e:
+                            results[index] = e
+
+                await asyncio.gather(
+                    *[_run_group(indexes) for indexes in groups.values()]
+                )
+                await _run_group(searches)
+                tool_batches["calls"] += len(parsed)
+                tool_batches["batches"] += 1
+
+                for (call, name, args), result in zip(parsed, results):
+                    if isinstance(result, Exception):
+                        result = {"error": str(result)}
+                    elif name == "fs_apply_text_edits":
+                        try:
+                            tool_edit_invocations["fs_apply_text_edits"] += 1
+                            tool_edit_invocations["changes"] += int(
+                                result.get("changes", 0)
+                            )
+                            # Track last edited file (only if changes > 0)
+                            if int(result.get("changes", 0)) > 0:
+                                try:
+                                    # Normalize and store relative path
+                                    norm_abs = _normalize_path(
+                                        book_path, args.get("path", "")
+                                    )
+                                    rel = os.path.relpath(str(norm_abs), book_path)
+                                    LAST_EDITED_FILE_BY_BOOK[str(book_path)] = rel
+                                except Exception:
+                                    LAST_EDITED_FILE_BY_BOOK[str(book_path)] = args.get(
+                                        "path", ""
+                                    )
                         except Exception:
                             pass
-                        if name == "fs_read_text":
-                            result = _read_text_file(book_path, args.get("path", ""))
-                        elif name == "fs_apply_text_edits":
-                            # Before applying edits, ensure backup exists once per file for this invocation
-                            try:
-                                target_rel = args.get("path", "") or ""
-                                target_abs = _normalize_path(book_path, target_rel)
-                                target_abs_str = str(target_abs)
-                                if target_abs.exists() and target_abs_str not in backed_up_files:
-                                    backup_abs = Path(target_abs_str + ".back")
-                                    shutil.copyfile(target_abs_str, str(backup_abs))
-                                    backed_up_files.add(target_abs_str)
-                            except Exception as be:
-                                _debug(f"Backup before edits failed for '{args.get('path', '')}': {be}")
-                            result = _fs_apply_text_edits(
-                                book_path,
-                                args.get("path", ""),
-                                args.get("edits", []) or [],
-                                create_if_missing=bool(args.get("create_if_missing", True)),
-                            )
-                            try:
-                                tool_edit_invocations["fs_apply_text_edits"] += 1
-                                tool_edit_invocations["changes"] += int(result.get("changes", 0))
-                                # Track last edited file (only if changes > 0)
-                                if int(result.get("changes", 0)) > 0:
-                                    try:
-                                        # Normalize and store relative path
-                                        norm_abs = _normalize_path(book_path, args.get("path", ""))
-                                        rel = os.path.relpath(str(norm_abs), book_path)
-                                        LAST_EDITED_FILE_BY_BOOK[str(book_path)] = rel
-                                    except Exception:
-                                        LAST_EDITED_FILE_BY_BOOK[str(book_path)] = args.get("path", "")
-                            except Exception:
-                                pass
-                        else:
-                            result = {"error": f"Unknown tool: {name}"}
-                        if DEBUG:
-                            res_preview = json.dumps(result)[:300]
-                            _debug(f"Tool {name} -> {res_preview}")
-                        input_items.append({
+                    if DEBUG:
+                        res_preview = json.dumps(result)[:300]
+                        _debug(f"Tool {name} -> {res_preview}")
+                    input_items.append(
+                        {
                             "type": "function_call_output",
                             "call_id": call.get("call_id"),
                             "output": json.dumps(result),
-                        })
-                    except Exception as e:
-                        input_items.append({
-                            "type": "function_call_output",
-                            "call_id": call.get("call_id"),
-                            "output": json.dumps({"error": str(e)}),
-                        })
-
-                # Ask the model to continue with tool outputs available
-                response_obj = _create_response(input_items)
+                        }
+                    )
+
+                # Ask the model to continue with tool outputs available. Chain on the
+                # previous response so only the new tool outputs are sent; endpoints
+                # that cannot chain get the full transcript instead.
+                previous_id = response_obj.id
+                if chaining and previous_id:
+                    try:
+                        response_obj = await _create_response(
+                            input_items[outputs_start:],
+                            previous_response_id=previous_id,
+                        )
+                        continue
+                    except (openai.BadRequestError, openai.NotFoundError) as e:
+                        _debug(
+                            f"Response chaining unavailable ({e}); resending the full transcript."
+                        )
+                        chaining = False
+                response_obj = await _create_response(input_items)
             return response_obj
 
         # Seed the input sequence with the user's request
@@ -916,58 +1283,45 @@ def create_message(
             {"role": "user", "content": prompt_with_hash}
         ]
 
-        # First response and tool resolution
-        response = _create_response(input_items)
-        response = _resolve_tools_loop(input_items, response)
-        response_text = _extract_text(response)
+        # First response and tool resolution (re-resolves a stale cached store id on 404)
+        async def _first_response(resolved_id):
+            nonlocal vector_store_id
+            vector_store_id = resolved_id
+            return await _create_response(input_items)
 
-        # Build activity summary from the final response object
-        def _to_dict(obj) -> Dict[str, Any]:
-            if isinstance(obj, dict):
-                return obj
-            for to_dict in (getattr(obj, "model_dump", None), getattr(obj, "to_dict", None)):
-                try:
-                    if callable(to_dict):
-                        return to_dict()
-                except Exception:
-                    pass
-            return {}
+        if retrieval == "local":
+            response = await _create_response(input_items)
+        else:
+            response = await _acall_with_vector_store(
+                book_path, assistant.name, sync_client, _first_response
+            )
+        response = await _resolve_tools_loop(input_items, response)
+        response_text = response.text
 
+        # Build activity summary from the final response object
         try:
-            data = _to_dict(response)
-            # Reasoning summary (if present)
-            reasoning = data.get("reasoning") or {}
-            reason_summary = reasoning.get("summary")
-            if isinstance(reason_summary, str) and reason_summary.strip():
-                activity_lines.insert(0, f"reasoning: {reason_summary.strip()}")
+            if response.reasoning_summary:
+                activity_lines.insert(0, f"reasoning: {response.reasoning_summary}")
             # File search calls and function calls in output
-            output_items = data.get("output") or []
-            for item in output_items:
-                try:
-                    if not isinstance(item, dict):
-                        continue
-                    t = item.get("type")
-                    if t == "file_search_call":
-                        queries = item.get("queries") or []
-                        if queries:
-                            activity_lines.append("file_search: " + ", ".join([str(q) for q in queries]))
-                    elif t in ("function_call", "tool_use"):
-                        nm = item.get("name")
-                        args = item.get("arguments")
-                        if isinstance(args, str):
-                            argsp = args
-                        else:
-                            argsp = json.dumps(args or {})
-                        if len(argsp) > 200:
-                            argsp = argsp[:200] + "..."
-                        activity_lines.append(f"model_call: {nm} args={argsp}")
-                except Exception:
-                    pass
+            for queries in response.file_search_queries:
+                activity_lines.append("file_search: " + ", ".join(queries))
+            for call in response.model_calls:
+                args = call["arguments"]
+                argsp = args if isinstance(args, str) else json.dumps(args or {})
+                if len(argsp) > 200:
+                    argsp = argsp[:200] + "..."
+                activity_lines.append(f"model_call: {call['name']} args={argsp}")
         except Exception:
             pass
 
         # Append edit summary if applicable
         try:
+            saved_round_trips = tool_batches["calls"] - tool_batches["batches"]
+            if saved_round_trips > 0:
+                activity_lines.append(
+                    f"parallel_tools: {tool_batches['calls']} call(s) in {tool_batches['batches']} batch(es), "
+                    f"saved {saved_round_trips} model round-trip(s)"
+                )
             if tool_edit_invocations["fs_apply_text_edits"] > 0:
                 activity_lines.append(
                     f"applied_edits: {tool_edit_invocations['fs_apply_text_edits']} call(s), changes={tool_edit_invocations['changes']}"
@@ -985,9 +1339,43 @@ def create_message(
         if DEBUG:
             _debug(f"Initial response text len={len(response_text)}")
 
+        timings = {
+            "time_to_first_token": (
+                round(first_text_at - started_at, 3)
+                if first_text_at is not None
+                else None
+            ),
+            "total": round(time.monotonic() - started_at, 3),
+            "streamed": streaming,
+            "request_bytes": list(request_sizes),
+            "input_tokens": usage["input_tokens"],
+            "cached_tokens": usage["cached_tokens"],
+            "context_tokens": context_stats["context_tokens"]
+            if context_stats
+            else None,
+            "context_saved_tokens": context_stats["saved_tokens"]
+            if context_stats
+            else 0,
+        }
+        try:
+            LAST_TIMINGS_BY_THREAD[str(thread_id)] = timings
+            LAST_TIMINGS_BY_BOOK[str(book_path)] = timings
+        except Exception:
+            pass
+        _debug(
+            f"Response timings: first token={timings['time_to_first_token']}s, total={timings['total']}s, "
+            f"cached input tokens={usage['cached_tokens']}/{usage['input_tokens']}"
+        )
+
         if internal_progress:
             progress.stop()
 
+        # Responses that edited files are not replayable; only cache read-only answers
+        if cache_key and response_text and tool_edit_invocations["changes"] == 0:
+            response_cache.put(
+                book_path, cache_key, response_text, model=assistant.model
+            )
+
         if DEBUG:
             _debug(
                 f"Tool edit summary: fs_apply_text_edits calls={tool_edit_invocations['fs_apply_text_edits']}, total changes={tool_edit_invocations['changes']}"
@@ -1001,6 +1389,155 @@ def create_message(
         raise
 
 
+def create_message(
+    book_path: str,
+    thread_id: str,
+    content: str,
+    assistant,
+    file_path: str = None,
+    progress: Progress = None,
+    task_id=None,
+    context_tokens: int | None = None,
+) -> str:
+    """
+    Create a message in the thread and return a single complete response.
+
+    Thin synchronous wrapper that runs acreate_message on the shared background
+    loop, in the caller's request scheduler lane.
+
+    Args:
+        book_path (str): Path to the book directory.
+        thread_id (str): ID of the thread where the message will be created.
+        content (str): The content of the message.
+        assistant (object): The assistant object with an ID.
+        file_path (str, optional): The path to a file to attach as an attachment. Defaults to None.
+        progress (Progress, optional): Progress object for tracking. Defaults to None.
+        task_id (int, optional): Task ID for the progress bar.
+        context_tokens (int, optional): Token budget for the content of `file_path`;
+            defaults to the book's `context_tokens`.
+
+    Returns:
+        str: The generated response text from the assistant.
+    """
+    return run_sync(
+        acreate_message(
+            book_path,
+            thread_id=thread_id,
+            content=content,
+            assistant=assistant,
+            file_path=file_path,
+            progress=progress,
+            task_id=task_id,
+            priority=current_priority(),
+            context_tokens=context_tokens,
+        )
+    )
+
+
+async def astream_message(
+    book_path: str,
+    thread_id: str,
+    content: str,
+    assistant,
+    file_path: str = None,
+):
+    """
+    Stream the assistant's reply as text deltas (async generator).
+
+    Surgical tool calls are still executed between model turns; their output
+    is not yielded, only the model's text.
+
+    Args:
+        book_path (str): Path to the book directory.
+        thread_id (str): ID of the thread where the message will be created.
+        content (str): The content of the message.
+        assistant (object): The assistant object with an ID.
+        file_path (str, optional): The path to a file to improve. Defaults to None.
+
+    Yields:
+        str: Text deltas in the order they were generated.
+    """
+    deltas: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def _run():
+        try:
+            return await acreate_message(
+                book_path,
+                thread_id=thread_id,
+                content=content,
+                assistant=assistant,
+                file_path=file_path,
+                on_delta=deltas.put_nowait,
+            )
+        finally:
+            deltas.put_nowait(done)
+
+    task = asyncio.ensure_future(_run())
+    try:
+        while True:
+            item = await deltas.get()
+            if item is done:
+                break
+            yield item
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def stream_message(
+    book_path: str,
+    thread_id: str,
+    content: str,
+    assistant,
+    file_path: str = None,
+):
+    """
+    Stream the assistant's reply as text deltas from synchronous code.
+
+    The request runs on the shared background loop; deltas are handed over
+    through a queue as they arrive.
+
+    Args:
+        book_path (str): Path to the book directory.
+        thread_id (str): ID of the thread where the message will be created.
+        content (str): The content of the message.
+        assistant (object): The assistant object with an ID.
+        file_path (str, optional): The path to a file to improve. Defaults to None.
+
+    Yields:
+        str: Text deltas in the order they were generated.
+
+    Returns:
+        str: The complete response text (the generator's return value).
+    """
+    deltas: queue.Queue = queue.Queue()
+    done = object()
+    future = background_loop.submit(
+        acreate_message(
+            book_path,
+            thread_id=thread_id,
+            content=content,
+            assistant=assistant,
+            file_path=file_path,
+            on_delta=deltas.put,
+            priority=current_priority(),
+        )
+    )
+    future.add_done_callback(lambda _: deltas.put(done))
+    try:
+        while True:
+            item = deltas.get()
+            if item is done:
+                break
+            yield item
+        return future.result()
+    finally:
+        if not future.done():
+            future.cancel()
+
+
 def get_thread(book_path: str, agent_name: str | None = None):
     """
     Create a conversation compatible with the Responses API.
@@ -1075,47 +1612,374 @@ def delete_files_in_parallel(vector_stores_api, files_api, vector_store_id, file
             future.result()
 
 
+# Prompt-cache usage accumulated over the process (one CLI command)
+_PROMPT_CACHE_USAGE = {"requests": 0, "input_tokens": 0, "cached_tokens": 0}
+_PROMPT_CACHE_LOCK = threading.Lock()
+
+
+def _record_usage(resp, usage: Dict[str, int]) -> None:
+    """Add a response's input and cached token counts to the call and process totals."""
+    counts = ResponseView.of(resp).usage
+    input_tokens = counts["input_tokens"]
+    cached_tokens = counts["cached_tokens"]
+    usage["input_tokens"] += input_tokens
+    usage["cached_tokens"] += cached_tokens
+    with _PROMPT_CACHE_LOCK:
+        _PROMPT_CACHE_USAGE["requests"] += 1
+        _PROMPT_CACHE_USAGE["input_tokens"] += input_tokens
+        _PROMPT_CACHE_USAGE["cached_tokens"] += cached_tokens
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """Return input and cached token totals for this process, with the cache hit rate."""
+    with _PROMPT_CACHE_LOCK:
+        stats: Dict[str, Any] = dict(_PROMPT_CACHE_USAGE)
+    stats["hit_rate"] = (
+        round(stats["cached_tokens"] / stats["input_tokens"], 3)
+        if stats["input_tokens"]
+        else 0.0
+    )
+    return stats
+
+
+def _tool_path_key(book_path: str, rel_path: str) -> str:
+    """Key that groups tool calls touching the same file."""
+    try:
+        return str(_normalize_path(book_path, rel_path or ""))
+    except Exception:
+        return str(rel_path or "")
+
+
+def _input_size(input_items) -> int:
+    """Approximate size in bytes of the input items sent with a request."""
+
+    def _jsonable(obj):
+        dump = getattr(obj, "model_dump", None)
+        return dump() if callable(dump) else str(obj)
+
+    try:
+        return len(json.dumps(input_items, default=_jsonable).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def _request_file_hashes(
+    book_path: str, file_path: str | None, retrieval: str = "remote"
+) -> Dict[str, str]:
+    """
+    Content hashes a response depends on: the file being improved, plus the
+    uploaded book files recorded in the sync manifest (what file_search sees)
+    and, for local retrieval, the files in the local index (what book_search sees).
+    """
+    hashes: Dict[str, str] = {}
+    if file_path and os.path.exists(file_path):
+        try:
+            hashes[f"file:{os.path.relpath(file_path, book_path)}"] = _hash_file(
+                file_path
+            )[0]
+        except OSError:
+            pass
+    for rel, entry in (load_sync_manifest(book_path).get("files") or {}).items():
+        if isinstance(entry, dict) and entry.get("sha256"):
+            hashes[f"store:{rel}"] = entry["sha256"]
+    if retrieval != "remote":
+        for rel, digest in bm25_index.file_hashes(book_path).items():
+            hashes[f"local:{rel}"] = digest
+    return hashes
+
+
+def _hash_file(file_path: str) -> tuple:
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _upload_file(files_api, file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        uploaded = files_api.create(
+            file=(os.path.basename(file_path), f.read()), purpose="assistants"
+        )
+    return uploaded.id
+
+
+def sync_vector_store_files(
+    book_path: str, vector_store_id: str, client
+) -> Dict[str, int]:
+    """
+    Incrementally sync the book's markdown files into the vector store.
+
+    A manifest in the book folder maps each relative path to its sha256 and the
+    id of the uploaded file. Only new or changed files are uploaded, and only
+    files whose path was removed, whose content changed, or that the manifest
+    does not know about are deleted; everything else is left in place.
+
+    Args:
+        book_path (str): Path to the book directory.
+        vector_store_id (str): ID of the book's vector store.
+        client (OpenAI): The OpenAI client.
+
+    Returns:
+        dict: Counts of added, updated, removed and unchanged files, plus bytes_uploaded.
+    """
+    result = {
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+        "unchanged": 0,
+        "bytes_uploaded": 0,
+    }
+    manifest = load_sync_manifest(book_path)
+    entries = (
+        manifest["files"] if manifest.get("vector_store_id") == vector_store_id else {}
+    )
+
+    # Hashes come from the book manifest, so unchanged files are not read again
+    local: Dict[str, Dict[str, Any]] = {}
+    md_files = load_markdown_files(book_path)
+    manifest_entries = book_manifest.refresh(book_path)
+    for file_path in md_files:
+        rel = Path(os.path.relpath(file_path, book_path)).as_posix()
+        known = manifest_entries.get(rel) or {}
+        if known.get("sha256"):
+            digest, size = known["sha256"], known["size"]
+        else:
+            digest, size = _hash_file(file_path)
+        local[rel] = {"path": file_path, "sha256": digest, "size": size}
+
+    # Iterating the page object follows the pagination cursor across all pages
+    remote_ids = {
+        f.id
+        for f in client.vector_stores.files.list(
+            vector_store_id=vector_store_id, limit=100
+        )
+    }
+
+    kept: Dict[str, Dict[str, Any]] = {}
+    to_upload: List[str] = []
+    replaced_ids: set = set()
+    for rel, info in local.items():
+        entry = entries.get(rel)
+        if (
+            entry
+            and entry.get("file_id") in remote_ids
+            and entry.get("sha256") == info["sha256"]
+        ):
+            kept[rel] = entry
+            result["unchanged"] += 1
+            continue
+        to_upload.append(rel)
+        if entry:
+            result["updated"] += 1
+            if entry.get("file_id") in remote_ids:
+                replaced_ids.add(entry["file_id"])
+        else:
+            result["added"] += 1
+
+    # Anything remote that is not an unchanged tracked file is stale
+    to_delete = remote_ids - {entry.get("file_id") for entry in kept.values()}
+    result["removed"] = len(to_delete - replaced_ids)
+
+    files_api = client.files
+    if to_upload:
+        console.print(
+            f"[bold blue]Uploading {len(to_upload)} new or changed files...[/bold blue]"
+        )
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = {
+                # Copy the context so uploads stay in the caller's scheduler lane
+                rel: executor.submit(
+                    contextvars.copy_context().run,
+                    _upload_file,
+                    files_api,
+                    local[rel]["path"],
+                )
+                for rel in to_upload
+            }
+            for rel, future in futures.items():
+                info = local[rel]
+                kept[rel] = {
+                    "sha256": info["sha256"],
+                    "file_id": future.result(),
+                    "size": info["size"],
+                }
+                result["bytes_uploaded"] += info["size"]
+        client.vector_stores.file_batches.create_and_poll(
+            vector_store_id=vector_store_id,
+            file_ids=[kept[rel]["file_id"] for rel in to_upload],
+        )
+
+    if to_delete:
+        console.print(
+            f"[bold blue]Deleting {len(to_delete)} stale files from vector store and files storage...[/bold blue]"
+        )
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    delete_file,
+                    client.vector_stores,
+                    files_api,
+                    vector_store_id,
+                    file_id,
+                )
+                for file_id in to_delete
+            ]
+            for future in futures:
+                future.result()
+
+    save_sync_manifest(book_path, {"vector_store_id": vector_store_id, "files": kept})
+    console.print(
+        f"[bold green]Vector store sync: added={result['added']}, updated={result['updated']}, "
+        f"removed={result['removed']}, unchanged={result['unchanged']}, "
+        f"bytes_uploaded={result['bytes_uploaded']}[/bold green]"
+    )
+    return result
+
+
 def update_agent_files(book_path: str, assistant):
     """
     Update the assistant's knowledge with new files from the book path.
 
+    Only files that were added, changed or removed since the last sync are
+    uploaded or deleted (see sync_vector_store_files). With local or hybrid
+    retrieval the book's BM25 index is refreshed the same way.
+
     Args:
         book_path (str): Path to the book directory.
         assistant (object): The assistant object.
+
+    Returns:
+        dict: The sync counts (the local index counts when retrieval is local),
+        or None if the vector store could not be found.
     """
+    config = load_book_config(book_path)
+    retrieval = _retrieval_mode(config)
+    if retrieval != "remote":
+        counts = refresh_local_indexes(book_path, config)
+        console.print(
+            f"[bold green]Local search index: added={counts['added']}, updated={counts['updated']}, "
+            f"removed={counts['removed']}, unchanged={counts['unchanged']}"
+            + (
+                f", embedded={counts['embedded']} passage(s)"
+                if "embedded" in counts
+                else ""
+            )
+            + "[/bold green]"
+        )
+        if retrieval == "local":
+            return counts
+
     client = initialize_openai_client(book_path)
     assistant_name = assistant.name
-    vector_store_id = get_vector_store_id_by_name(assistant_name, client)
 
-    if not vector_store_id:
+    def _sync(resolved_id):
+        if not resolved_id:
+            return None
+        return sync_vector_store_files(book_path, resolved_id, client)
+
+    try:
+        console.print(f"[bold blue]Loading book files from {book_path}...[/bold blue]")
+        result = _call_with_vector_store(book_path, assistant_name, client, _sync)
+    except Exception as e:
+        console.print(f"[bold red]Error updating files: {str(e)}[/bold red]")
+        raise
+
+    if result is None:
         console.print(
             f"[bold red]Error: Could not find vector store for assistant '{assistant_name}'.[/bold red]"
         )
-        return
+        return None
 
-    try:
-        # Obtener los archivos actuales del vector store
-        vector_stores_api = client.vector_stores
-        files_api = client.files
-        files = vector_stores_api.files.list(vector_store_id=vector_store_id)
+    console.print(
+        f"[bold green]Files updated successfully in assistant '{assistant.name}'.[/bold green]"
+    )
+    return result
 
-        # Eliminar archivos en paralelo (vector store + files storage)
-        if files.data:
-            console.print(
-                f"[bold blue]Deleting {len(files.data)} old files from vector store and files storage...[/bold blue]"
-            )
-            delete_files_in_parallel(vector_stores_api, files_api, vector_store_id, files)
 
-        # Cargar archivos del libro
-        console.print(f"[bold blue]Loading book files from {book_path}...[/bold blue]")
-        upload_markdown_files_to_vector_store(vector_store_id, book_path, client)
+async def _aprocess_files_concurrently(
+    save_to_markdown,
+    book_path: str,
+    files_to_process: List[str],
+    prompt: str,
+    file_suffix: str,
+    agent_name: str | None,
+    jobs: int,
+    progress: Progress,
+    task_chapters,
+):
+    """
+    Run one create_message round-trip per file with up to `jobs` workers.
 
-        console.print(
-            f"[bold green]Files updated successfully in assistant '{assistant.name}'.[/bold green]"
+    Each worker slot has its own conversation (agent name suffixed with the slot
+    number) and its own progress row. A failure in one file is recorded and does
+    not stop the others.
+
+    Returns:
+        tuple: (assistant, list of (file path, exception) failures)
+    """
+    assistant = await asyncio.to_thread(create_or_get_assistant, book_path)
+    base_agent = agent_name or "process-chapters"
+    slots: asyncio.Queue = asyncio.Queue()
+    worker_tasks = {}
+    threads = {}
+    for slot in range(jobs):
+        worker_tasks[slot] = progress.add_task(
+            f"[green]Worker {slot + 1}: idle", total=1
         )
-    except Exception as e:
-        console.print(f"[bold red]Error updating files: {str(e)}[/bold red]")
-        raise
+        slots.put_nowait(slot)
+    save_lock = asyncio.Lock()
+    failures: List[tuple] = []
+
+    async def _process_one(chapter_path: str):
+        slot = await slots.get()
+        task_id = worker_tasks[slot]
+        try:
+            if slot not in threads:
+                threads[slot] = await asyncio.to_thread(
+                    get_thread, book_path, f"{base_agent}-{slot + 1}"
+                )
+            progress.reset(
+                task_id,
+                description=f"[green]Worker {slot + 1}: {os.path.basename(chapter_path)}",
+            )
+            refined_text = await acreate_message(
+                book_path,
+                thread_id=threads[slot].id,
+                content=prompt,
+                assistant=assistant,
+                progress=progress,
+                task_id=task_id,
+                file_path=chapter_path,
+                # The reply is saved over the whole file, so send all of it
+                context_tokens=0,
+                priority="batch",
+            )
+            # One save at a time so files are never written concurrently
+            async with save_lock:
+                save_to_markdown(
+                    book_path,
+                    os.path.join("chapters", chapter_path),
+                    file_suffix,
+                    refined_text,
+                    progress=progress,
+                    task=task_chapters,
+                )
+        except Exception as e:
+            failures.append((chapter_path, e))
+            console.print(
+                f"[bold red]Failed to process {os.path.relpath(chapter_path, book_path)}: {str(e)}[/bold red]"
+            )
+        finally:
+            progress.update(task_chapters, advance=1)
+            progress.update(task_id, description=f"[green]Worker {slot + 1}: idle")
+            slots.put_nowait(slot)
+
+    await asyncio.gather(*[_process_one(path) for path in files_to_process])
+    return assistant, failures
 
 
 def process_chapters(
@@ -1125,6 +1989,7 @@ def process_chapters(
     task_description: str,
     file_suffix: str,
     agent_name: str | None = None,
+    jobs: int = 1,
     **prompt_kwargs,
 ):
     """
@@ -1136,6 +2001,8 @@ def process_chapters(
         prompt_template (str): The template for the prompt.
         task_description (str): Description of the task for progress display.
         file_suffix (str): Suffix for the output file.
+        agent_name (str, optional): Conversation name; parallel workers append their slot number.
+        jobs (int, optional): Number of files to process concurrently. Defaults to 1.
         **prompt_kwargs: Additional arguments for the prompt template.
     """
     # Directories to process
@@ -1151,21 +2018,106 @@ def process_chapters(
     # Files to exclude
     excluded_files = ["cover.md", "back-cover.md"]
 
-    # Get Markdown files from each directory, excluding the unwanted files
+    # Markdown files directly inside each directory, from the book manifest,
+    # excluding the unwanted files
     files_to_process = []
-    for dir_path in [chapters_dir, outline_dir, worldbuilding_dir]:
-        files = [
-            f
-            for f in os.listdir(dir_path)
-            if f.endswith(".md") and f not in excluded_files
-        ]
-        files_to_process.extend([os.path.join(dir_path, f) for f in files])
+    for entry in book_manifest.files(book_path, suffix=".md"):
+        top, _, name = entry["path"].partition("/")
+        if top in BOOK_CONTENT_DIRS and "/" not in name and name not in excluded_files:
+            files_to_process.append(os.path.join(book_path, top, name))
 
     if not files_to_process:
         raise FileNotFoundError(
             "No Markdown (.md) files were found in the chapter directory."
         )
 
+    # Repair writes torn by a crash, then skip files an interrupted run of the
+    # same task already finished, using only the write journal
+    recover_writes(book_path)
+    batch_name = agent_name or task_description
+    for batch in interrupted_batches(book_path):
+        if batch["name"] != batch_name:
+            continue
+        done = {os.path.normpath(os.path.join(book_path, p)) for p in batch["done"]}
+        skipped = [f for f in files_to_process if os.path.normpath(f) in done]
+        files_to_process = [
+            f for f in files_to_process if os.path.normpath(f) not in done
+        ]
+        end_batch(book_path, batch["id"], status="resumed")
+        if skipped:
+            console.print(
+                f"[yellow]Resuming interrupted run of '{batch_name}': skipping {len(skipped)} "
+                "file(s) it already finished.[/yellow]"
+            )
+    if not files_to_process:
+        console.print(
+            "[green]All files were already processed by the interrupted run.[/green]"
+        )
+        return
+
+    batch_id = begin_batch(book_path, batch_name, files_to_process)
+    try:
+        _process_files(
+            # Saves are journaled as finishing this batch's files
+            functools.partial(save_to_markdown, batch=batch_id),
+            book_path,
+            files_to_process,
+            prompt_template,
+            task_description,
+            file_suffix,
+            agent_name,
+            jobs,
+            chapters_dir,
+            **prompt_kwargs,
+        )
+    except BaseException:
+        # Leave the batch open so the next run resumes after the finished files
+        detach_batch(book_path, batch_id)
+        raise
+    end_batch(book_path, batch_id)
+
+
+def _process_files(
+    save_to_markdown,
+    book_path: str,
+    files_to_process: List[str],
+    prompt_template: str,
+    task_description: str,
+    file_suffix: str,
+    agent_name: str | None,
+    jobs: int,
+    chapters_dir: str,
+    **prompt_kwargs,
+):
+    """Run the prompt over each file, concurrently when `jobs` allows."""
+    jobs = max(1, int(jobs or 1))
+    if jobs > 1:
+        with Progress() as progress:
+            task_chapters = progress.add_task(
+                f"[cyan]{task_description}", total=len(files_to_process)
+            )
+            assistant, failures = run_sync(
+                _aprocess_files_concurrently(
+                    save_to_markdown,
+                    book_path,
+                    files_to_process,
+                    prompt_template.format(**prompt_kwargs),
+                    file_suffix,
+                    agent_name,
+                    min(jobs, len(files_to_process)),
+                    progress,
+                    task_chapters,
+                )
+            )
+        # A single sync for the whole run
+        mark_book_dirty(book_path, assistant)
+        if failures:
+            raise RuntimeError(
+                f"{len(failures)} of {len(files_to_process)} files failed: "
+                + ", ".join(os.path.relpath(path, book_path) for path, _ in failures)
+            )
+        return
+
     with Progress() as progress:
         task_chapters = progress.add_task(
             f"[cyan]{task_description}", total=len(files_to_process)
@@ -1180,15 +2132,19 @@ def process_chapters(
             thread = get_thread(book_path, agent_name=agent_name)
 
             progress.reset(task_openai)
-            refined_text = create_message(
-                book_path,
-                thread_id=thread.id,
-                content=prompt,
-                assistant=assistant,
-                progress=progress,
-                task_id=task_openai,
-                file_path=chapter_path,
-            )
+            # Chapter-wide runs yield to interactive requests when rate limited
+            with request_priority("batch"):
+                refined_text = create_message(
+                    book_path,
+                    thread_id=thread.id,
+                    content=prompt,
+                    assistant=assistant,
+                    progress=progress,
+                    task_id=task_openai,
+                    file_path=chapter_path,
+                    # The reply is saved over the whole file, so send all of it
+                    context_tokens=0,
+                )
 
             save_to_markdown(
                 book_path,
@@ -1200,4 +2156,4 @@ def process_chapters(
             )
             progress.update(task_chapters, advance=1)
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
@@ -0,0 +1,403 @@
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from rich.console import Console
+
+from storycraftr.utils.chunker import iter_chunks
+from storycraftr.utils.core import list_book_content_files
+
+console = Console()
+
+INDEX_DIR_NAME = os.path.join(".storycraftr", "index", "bm25")
+INDEX_VERSION = 2
+# BM25 parameters (the usual Lucene defaults)
+K1 = 1.2
+B = 0.75
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens of a text (Unicode letters, digits, underscore)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _count(tokens: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+def _idf(passages: int, df: int) -> float:
+    return math.log(1 + (passages - df + 0.5) / (df + 0.5))
+
+
+def _term_score(tf: int, length: int, avg_length: float, idf: float) -> float:
+    norm = K1 * (1 - B + B * length / avg_length)
+    return idf * tf * (K1 + 1) / (tf + norm)
+
+
+def score_passages(passages: List[str], query: str) -> Dict[int, float]:
+    """
+    Score passages against a query with BM25, the passages being the whole
+    collection (no index is built or saved).
+
+    Args:
+        passages (list): Passage texts.
+        query (str): Free-text query; word order and case are ignored.
+
+    Returns:
+        dict: Passage position -> score, for passages sharing a term with the query.
+    """
+    terms = set(tokenize(query or ""))
+    if not terms or not passages:
+        return {}
+    counts = [_count(tokenize(text)) for text in passages]
+    lengths = [sum(tf.values()) for tf in counts]
+    avg_length = sum(lengths) / len(passages) or 1.0
+    scores: Dict[int, float] = {}
+    for term in terms:
+        matches = [i for i, tf in enumerate(counts) if term in tf]
+        if not matches:
+            continue
+        idf = _idf(len(passages), len(matches))
+        for i in matches:
+            scores[i] = scores.get(i, 0.0) + _term_score(
+                counts[i][term], lengths[i], avg_length, idf
+            )
+    return scores
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class _BookIndex:
+    """Inverted index of one book: postings of term -> {(path, chunk): tf}."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.loaded = False
+        # rel path -> {sha256, mtime_ns, size, chunks: [{start_line, end_line, length, tf}]}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, Dict[Tuple[str, int], int]] = {}
+        self.lengths: Dict[Tuple[str, int], int] = {}
+        self.total_length = 0
+        # Per-term BM25 weights, valid until the next change to the index
+        self.weights: Dict[str, List[Tuple[Tuple[str, int], float]]] = {}
+
+    @property
+    def directory(self) -> Path:
+        return self.root / INDEX_DIR_NAME
+
+    def segment_path(self, digest: str) -> Path:
+        return self.directory / "segments" / f"{digest}.json"
+
+    def add(self, rel: str, entry: Dict[str, Any]) -> None:
+        self.files[rel] = entry
+        for i, chunk in enumerate(entry["chunks"]):
+            key = (rel, i)
+            self.lengths[key] = chunk["length"]
+            self.total_length += chunk["length"]
+            for term, tf in chunk["tf"].items():
+                self.postings.setdefault(term, {})[key] = tf
+        self.weights.clear()
+
+    def remove(self, rel: str) -> None:
+        entry = self.files.pop(rel, None)
+        if entry is None:
+            return
+        for i, chunk in enumerate(entry["chunks"]):
+            key = (rel, i)
+            self.total_length -= self.lengths.pop(key, 0)
+            for term in chunk["tf"]:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(key, None)
+                    if not postings:
+                        del self.postings[term]
+        self.weights.clear()
+
+    def term_weights(self, term: str) -> List[Tuple[Tuple[str, int], float]]:
+        cached = self.weights.get(term)
+        if cached is not None:
+            return cached
+        postings = self.postings.get(term) or {}
+        n = len(self.lengths)
+        weights = []
+        if postings and n:
+            idf = _idf(n, len(postings))
+            avg_length = self.total_length / n or 1.0
+            lengths = self.lengths
+            for key, tf in postings.items():
+                weights.append((key, _term_score(tf, lengths[key], avg_length, idf)))
+        self.weights[term] = weights
+        return weights
+
+
+class BM25Index:
+    """
+    Local BM25 retrieval over a book's content files, persisted per book.
+
+    The files are those `load_markdown_files` selects (markdown under
+    `chapters/`, `outline/` and `worldbuilding/` with more than three lines),
+    split into passages by `storycraftr.utils.chunker.iter_chunks`. Each file's term counts are stored
+    in `.storycraftr/index/bm25/segments/<sha256>.json`, named by the file's
+    content hash, with a manifest mapping paths to hashes. A refresh only
+    stats the files and re-tokenizes those whose content hash changed.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, _BookIndex] = {}
+        self._lock = threading.Lock()
+
+    def _book(self, book_path: str) -> _BookIndex:
+        root = Path(book_path).resolve()
+        key = str(root)
+        if key not in self._books:
+            self._books[key] = _BookIndex(root)
+        return self._books[key]
+
+    def _load(self, book: _BookIndex) -> Dict[str, Dict[str, Any]]:
+        """Read the manifest saved by an earlier process, if any."""
+        book.loaded = True
+        try:
+            manifest = json.loads(
+                (book.directory / "manifest.json").read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or manifest.get("version") != INDEX_VERSION:
+            return {}
+        files = manifest.get("files")
+        return files if isinstance(files, dict) else {}
+
+    def refresh(self, book_path: str) -> Dict[str, int]:
+        """
+        Bring a book's index up to date with its files.
+
+        Args:
+            book_path (str): Path to the book directory.
+
+        Returns:
+            dict: Counts of added, updated, removed and unchanged files.
+        """
+        result = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            book = self._book(book_path)
+            saved = self._load(book) if not book.loaded else {}
+            seen = set()
+            changed = False
+            root = str(book.root)
+            for file_path in list_book_content_files(root):
+                rel = file_path[len(root) + 1 :].replace(os.sep, "/")
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                seen.add(rel)
+                entry = book.files.get(rel)
+                known = entry or saved.get(rel)
+                if known and (known.get("mtime_ns"), known.get("size")) == (
+                    st.st_mtime_ns,
+                    st.st_size,
+                ):
+                    # Unchanged since it was indexed, in this process or an earlier one
+                    if entry is not None or self._load_segment(book, rel, known):
+                        continue
+                try:
+                    text = Path(file_path).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    seen.discard(rel)
+                    continue
+                changed = True
+                stamp = {
+                    "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                }
+                if known and known.get("sha256") == stamp["sha256"]:
+                    # Touched but not edited
+                    if entry is not None:
+                        entry.update(stamp)
+                        continue
+                    if self._load_segment(book, rel, stamp):
+                        continue
+                result["updated" if known else "added"] += 1
+                book.remove(rel)
+                if not self._load_segment(book, rel, stamp):
+                    book.add(
+                        rel,
+                        dict(
+                            stamp, chunks=self._index_text(book, stamp["sha256"], text)
+                        ),
+                    )
+            gone = (set(book.files) | set(saved)) - seen
+            for rel in gone:
+                book.remove(rel)
+            result["removed"] = len(gone)
+            result["unchanged"] = len(book.files) - result["added"] - result["updated"]
+            if changed or gone:
+                self._save(book)
+        return result
+
+    def _load_segment(self, book: _BookIndex, rel: str, stamp: Dict[str, Any]) -> bool:
+        try:
+            data = json.loads(
+                book.segment_path(stamp["sha256"]).read_text(encoding="utf-8")
+            )
+            chunks = data["chunks"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        book.add(
+            rel,
+            {key: stamp[key] for key in ("sha256", "mtime_ns", "size")}
+            | {"chunks": chunks},
+        )
+        return True
+
+    def _index_text(
+        self, book: _BookIndex, digest: str, text: str
+    ) -> List[Dict[str, Any]]:
+        chunks = []
+        # Same rule as load_markdown_files: short files are not book content
+        if len(text.splitlines()) > 3:
+            for chunk in iter_chunks(text):
+                tokens = tokenize(chunk["text"])
+                chunks.append(
+                    {
+                        "start_line": chunk["start_line"],
+                        "end_line": chunk["end_line"],
+                        "length": len(tokens),
+                        "tf": _count(tokens),
+                    }
+                )
+        try:
+            _write_json(
+                book.segment_path(digest), {"version": INDEX_VERSION, "chunks": chunks}
+            )
+        except OSError as e:
+            console.print(f"[yellow]Could not save search index segment: {e}[/yellow]")
+        return chunks
+
+    def _save(self, book: _BookIndex) -> None:
+        files = {
+            rel: {key: entry[key] for key in ("sha256", "mtime_ns", "size")}
+            for rel, entry in book.files.items()
+        }
+        try:
+            _write_json(
+                book.directory / "manifest.json",
+                {"version": INDEX_VERSION, "files": files},
+            )
+            # Drop segments no file refers to any more
+            live = {entry["sha256"] for entry in files.values()}
+            for segment in (book.directory / "segments").glob("*.json"):
+                if segment.stem not in live:
+                    segment.unlink(missing_ok=True)
+        except OSError as e:
+            console.print(f"[yellow]Could not save search index: {e}[/yellow]")
+
+    def search(
+        self,
+        book_path: str,
+        query: str,
+        *,
+        max_results: int = 5,
+        path_prefix: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Rank the book's passages against a query with BM25.
+
+        Args:
+            book_path (str): Path to the book directory.
+            query (str): Free-text query; word order and case are ignored.
+            max_results (int): Number of passages to return.
+            path_prefix (str, optional): Only rank passages of files under this path.
+
+        Returns:
+            dict: `results` as `{path, start_line, end_line, score, text}`, best
+            first, plus `passages` (how many passages are indexed), or an
+            `error` message.
+        """
+        terms = set(tokenize(query or ""))
+        if not terms:
+            return {"query": query, "error": "Empty query", "results": []}
+        self.refresh(book_path)
+        prefix = (path_prefix or "").strip("/")
+        with self._lock:
+            book = self._book(book_path)
+            # Seed the scores with the longest postings list (copied in C), then
+            # add the others to it
+            postings = sorted(
+                (book.term_weights(term) for term in terms), key=len, reverse=True
+            )
+            scores: Dict[Tuple[str, int], float] = dict(postings[0])
+            for weights in postings[1:]:
+                for key, weight in weights:
+                    scores[key] = scores.get(key, 0.0) + weight
+            if prefix:
+                scores = {
+                    key: score
+                    for key, score in scores.items()
+                    if key[0] == prefix or key[0].startswith(prefix + "/")
+                }
+            top = heapq.nlargest(
+                max(1, int(max_results)), scores.items(), key=itemgetter(1)
+            )
+            hits = [
+                (key, score, book.files[key[0]]["chunks"][key[1]]) for key, score in top
+            ]
+            passages = len(book.lengths)
+        results = []
+        lines_by_path: Dict[str, List[str]] = {}
+        for (rel, _), score, chunk in hits:
+            if rel not in lines_by_path:
+                try:
+                    lines_by_path[rel] = (
+                        (Path(book_path) / rel).read_text(encoding="utf-8").splitlines()
+                    )
+                except (OSError, UnicodeDecodeError):
+                    lines_by_path[rel] = []
+            lines = lines_by_path[rel][chunk["start_line"] - 1 : chunk["end_line"]]
+            results.append(
+                {
+                    "path": rel,
+                    "start_line": chunk["start_line"],
+                    "end_line": chunk["end_line"],
+                    "score": round(score, 4),
+                    "text": "\n".join(lines),
+                }
+            )
+        return {"query": query, "results": results, "passages": passages}
+
+    def file_hashes(self, book_path: str) -> Dict[str, str]:
+        """Content hash of every indexed file, keyed by path relative to the book."""
+        self.refresh(book_path)
+        with self._lock:
+            return {
+                rel: entry["sha256"]
+                for rel, entry in self._book(book_path).files.items()
+            }
+
+    def clear(self) -> None:
+        """Forget the in-memory indexes; the files on disk are kept."""
+        with self._lock:
+            self._books.clear()
+
+
+bm25_index = BM25Index()
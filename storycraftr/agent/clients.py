@@ -0,0 +1,240 @@
+import asyncio
+import atexit
+import hashlib
+import threading
+import weakref
+from typing import Dict, Tuple
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from storycraftr.agent.scheduler import (
+    AsyncSchedulingTransport,
+    SchedulingTransport,
+    request_scheduler,
+)
+
+# Same pool sizes the OpenAI SDK uses by default
+_CONNECTION_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+
+
+class PoolStats:
+    """
+    Thread-safe counters describing how an HTTP connection pool is being used.
+
+    Attributes:
+        requests (int): Number of HTTP requests sent through the pool.
+        connections_opened (int): Number of new TCP connections established.
+        connections_reused (int): Number of requests served on a kept-alive connection.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    def record_request(self, opened_connection: bool) -> None:
+        """
+        Record a completed request.
+
+        Args:
+            opened_connection (bool): True if the request had to open a new connection.
+        """
+        with self._lock:
+            self.requests += 1
+            if opened_connection:
+                self.connections_opened += 1
+            else:
+                self.connections_reused += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.connections_reused,
+            }
+
+
+def _instrumented_http_client(stats: PoolStats, base_url: str) -> DefaultHttpxClient:
+    """
+    Build an httpx client (with the OpenAI SDK defaults) that reports connection
+    reuse to the given stats object through the httpcore trace extension and
+    sends every request through the request scheduler.
+    """
+
+    def _on_request(request):
+        state = {"connected": False}
+
+        def _trace(event_name, info):
+            if event_name in (
+                "connection.connect_tcp.complete",
+                "connection.connect_unix_socket.complete",
+            ):
+                state["connected"] = True
+
+        request.extensions["trace"] = _trace
+        request.extensions["storycraftr_trace_state"] = state
+
+    def _on_response(response):
+        state = response.request.extensions.get("storycraftr_trace_state") or {}
+        stats.record_request(bool(state.get("connected")))
+
+    return DefaultHttpxClient(
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+        transport=SchedulingTransport(
+            httpx.HTTPTransport(limits=_CONNECTION_LIMITS), request_scheduler, base_url
+        ),
+    )
+
+
+def _instrumented_async_http_client(
+    stats: PoolStats, base_url: str
+) -> DefaultAsyncHttpxClient:
+    """
+    Async counterpart of _instrumented_http_client (httpx and httpcore require
+    coroutine hooks and trace callbacks on async clients).
+    """
+
+    async def _on_request(request):
+        state = {"connected": False}
+
+        async def _trace(event_name, info):
+            if event_name in (
+                "connection.connect_tcp.complete",
+                "connection.connect_unix_socket.complete",
+            ):
+                state["connected"] = True
+
+        request.extensions["trace"] = _trace
+        request.extensions["storycraftr_trace_state"] = state
+
+    async def _on_response(response):
+        state = response.request.extensions.get("storycraftr_trace_state") or {}
+        stats.record_request(bool(state.get("connected")))
+
+    return DefaultAsyncHttpxClient(
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+        transport=AsyncSchedulingTransport(
+            httpx.AsyncHTTPTransport(limits=_CONNECTION_LIMITS),
+            request_scheduler,
+            base_url,
+        ),
+    )
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of OpenAI clients keyed by (base URL, API key).
+
+    Every caller that targets the same endpoint with the same credentials shares
+    one client, and therefore one keep-alive connection pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str], OpenAI] = {}
+        self._stats: Dict[Tuple[str, str], PoolStats] = {}
+        # Async connection pools are bound to the event loop that uses them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _key(base_url: str, api_key: str | None) -> Tuple[str, str]:
+        # Never keep the raw key around as a dictionary key
+        digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        return (str(base_url).rstrip("/"), digest)
+
+    def get(self, base_url: str, api_key: str | None) -> OpenAI:
+        """
+        Return the shared client for the endpoint, creating it on first use.
+
+        Args:
+            base_url (str): The OpenAI-compatible API base URL.
+            api_key (str): The API key used for authentication.
+
+        Returns:
+            OpenAI: A client whose connection pool is shared process-wide.
+        """
+        key = self._key(base_url, api_key)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                stats = self._stats.setdefault(key, PoolStats())
+                # Retries and backoff are owned by the request scheduler
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_retries=0,
+                    http_client=_instrumented_http_client(stats, base_url),
+                )
+                self._clients[key] = client
+            return client
+
+    def get_async(self, base_url: str, api_key: str | None) -> AsyncOpenAI:
+        """
+        Return the shared async client for the endpoint on the running event loop.
+
+        Async clients are pooled per event loop; their statistics are merged with
+        the synchronous client for the same endpoint.
+
+        Args:
+            base_url (str): The OpenAI-compatible API base URL.
+            api_key (str): The API key used for authentication.
+
+        Returns:
+            AsyncOpenAI: A client whose connection pool is shared within the loop.
+        """
+        loop = asyncio.get_running_loop()
+        key = self._key(base_url, api_key)
+        with self._lock:
+            per_loop = self._async_clients.setdefault(loop, {})
+            client = per_loop.get(key)
+            if client is None:
+                stats = self._stats.setdefault(key, PoolStats())
+                client = AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    max_retries=0,
+                    http_client=_instrumented_async_http_client(stats, base_url),
+                )
+                per_loop[key] = client
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return pool statistics for every registered client, keyed by base URL.
+        """
+        with self._lock:
+            items = list(self._stats.items())
+        result: Dict[str, Dict[str, int]] = {}
+        for (base_url, key_digest), stats in items:
+            label = base_url if base_url not in result else f"{base_url}#{key_digest}"
+            result[label] = stats.as_dict()
+        return result
+
+    def close_all(self) -> None:
+        """
+        Close every registered synchronous client and forget all clients.
+
+        Async clients are dropped without closing; their loops own the sockets.
+        """
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+            self._stats.clear()
+        for client in clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+# Singleton shared by the CLI, the chat REPL and the Gradio server
+client_registry = ClientRegistry()
+atexit.register(client_registry.close_all)
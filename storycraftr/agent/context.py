@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Tuple
+
+from storycraftr.agent.bm25 import score_passages
+from storycraftr.utils.chunker import count_tokens, iter_chunks
+from storycraftr.utils.outline import markdown_outline
+
+# Default token budget for the file context of one request (0 = whole file)
+CONTEXT_TOKENS = 6000
+# The heading outline may use at most this share of the budget
+OUTLINE_SHARE = 0.25
+# Tokens of a passage's line-range label and the omitted-lines marker before it
+LABEL_TOKENS = 16
+
+INLINE_TEMPLATE = "Here is the existing content to improve (for context):\n{text}"
+
+
+def _outline_lines(text: str, budget: int) -> List[str]:
+    lines: List[str] = []
+    used = 0
+    entries = markdown_outline(text)
+    for i, entry in enumerate(entries):
+        line = (
+            "  " * (entry["level"] - 1)
+            + f"- {'#' * entry['level']} {entry['title']} (lines {entry['start_line']}-{entry['end_line']})"
+        )
+        tokens = count_tokens(line)
+        if used + tokens > budget:
+            lines.append(
+                f"- ... {len(entries) - i} more heading(s); use fs_outline to list them"
+            )
+            break
+        lines.append(line)
+        used += tokens
+    return lines
+
+
+def _rank_chunks(chunks: List[Dict[str, Any]], request: str) -> List[int]:
+    """Chunk positions by BM25 relevance to the request, best first (matches only)."""
+    scores = score_passages([chunk["text"] for chunk in chunks], request)
+    return sorted(scores, key=lambda i: (-scores[i], i))
+
+
+def assemble_file_context(
+    text: str,
+    rel_path: str,
+    request: str,
+    budget_tokens: int = CONTEXT_TOKENS,
+    sha256: str = "",
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build the book context for a request that works on an existing file.
+
+    A file within the token budget is inlined whole, as before. A longer file
+    is replaced by its heading outline and the passages (`iter_chunks`) most
+    relevant to the request, ranked by BM25 over the file's own passages, so
+    the ranking always matches the text on disk. The opening passage is always
+    kept for voice and setting; any budget left after the relevant passages is
+    filled in document order. Omitted line ranges are marked so the model can
+    fetch them with fs_read_text.
+
+    Args:
+        text (str): Current text of the file.
+        rel_path (str): Path of the file relative to the book.
+        request (str): The request the context is assembled for.
+        budget_tokens (int): Token budget for the context; 0 or less inlines
+            the whole file.
+        sha256 (str): Content hash of the file, passed on so the model can
+            edit without reading the file again.
+
+    Returns:
+        tuple: The context text and stats with file_tokens, context_tokens,
+        saved_tokens, chunks, chunks_total and partial.
+    """
+    file_tokens = count_tokens(text)
+    if budget_tokens <= 0 or file_tokens <= budget_tokens:
+        context = INLINE_TEMPLATE.format(text=text)
+        return context, {
+            "file_tokens": file_tokens,
+            "context_tokens": file_tokens,
+            "saved_tokens": 0,
+            "chunks": None,
+            "chunks_total": None,
+            "partial": False,
+        }
+
+    total_lines = text.count("\n") + (0 if text.endswith("\n") else 1)
+    parts = [
+        f"The file {rel_path} is long ({total_lines} lines, ~{file_tokens} tokens), so only its "
+        "outline and the passages most relevant to this request are shown. Read omitted lines "
+        "with fs_read_text (start_line/end_line or section) before changing them, and edit with "
+        "fs_apply_text_edits; do not rewrite the file from this partial view."
+        + (f" Current sha256 (use as if_match): {sha256}" if sha256 else ""),
+    ]
+    chunks = list(iter_chunks(text, rel_path))
+    outline = _outline_lines(text, int(budget_tokens * OUTLINE_SHARE))
+    remaining = (
+        budget_tokens
+        - count_tokens(parts[0])
+        - sum(count_tokens(line) for line in outline)
+    )
+
+    selected = set()
+    order = [0] + _rank_chunks(chunks, request) + list(range(len(chunks)))
+    for i in order:
+        cost = chunks[i]["tokens"] + LABEL_TOKENS
+        if i in selected or cost > remaining:
+            continue
+        selected.add(i)
+        remaining -= cost
+
+    if outline:
+        parts.append("Outline:\n" + "\n".join(outline))
+    passages: List[str] = []
+    next_line = 1
+    for i in sorted(selected):
+        chunk = chunks[i]
+        if chunk["start_line"] > next_line:
+            passages.append(f"[Lines {next_line}-{chunk['start_line'] - 1} omitted]")
+        passages.append(
+            f"[Lines {chunk['start_line']}-{chunk['end_line']}]\n{chunk['text']}"
+        )
+        next_line = chunk["end_line"] + 1
+    if next_line <= total_lines:
+        passages.append(f"[Lines {next_line}-{total_lines} omitted]")
+    parts.append("Selected passages:\n" + "\n\n".join(passages))
+    context = "\n\n".join(parts)
+
+    context_tokens = count_tokens(context)
+    return context, {
+        "file_tokens": file_tokens,
+        "context_tokens": context_tokens,
+        "saved_tokens": max(0, file_tokens - context_tokens),
+        "chunks": len(selected),
+        "chunks_total": len(chunks),
+        "partial": True,
+    }
@@ -0,0 +1,401 @@
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy hybrid retrieval uses BM25 alone
+    np = None
+
+from rich.console import Console
+
+from storycraftr.agent.bm25 import tokenize
+from storycraftr.utils.chunker import iter_chunks
+from storycraftr.utils.core import list_book_content_files
+
+console = Console()
+
+INDEX_DIR_NAME = os.path.join(".storycraftr", "index", "dense")
+INDEX_VERSION = 2
+# Texts sent per embeddings request
+EMBED_BATCH = 64
+# Rows scored per NumPy block, so a search never pages in more than this at once
+SCORE_BLOCK_ROWS = 16384
+LOCAL_EMBEDDING_MODEL = "local"
+LOCAL_EMBEDDING_DIM = 512
+
+Embedder = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def dense_available() -> bool:
+    """True when NumPy is installed, which the dense index needs."""
+    return np is not None
+
+
+def hashing_embedder(dim: int = LOCAL_EMBEDDING_DIM) -> Embedder:
+    """
+    Local stand-in for an embeddings endpoint: signed feature hashing of the
+    text's word tokens into `dim` dimensions. Deterministic across processes.
+    """
+
+    def embed(texts: List[str]):
+        vectors = np.zeros((len(texts), dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                h = zlib.crc32(token.encode("utf-8"))
+                vectors[row, h % dim] += -1.0 if h & 0x80000000 else 1.0
+        return vectors
+
+    return embed
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class _OpenIndex:
+    """A book's chunk table plus its memory-mapped vector matrix."""
+
+    def __init__(self, meta: Dict[str, Any], vectors, signature):
+        self.meta = meta
+        self.rows: List[Dict[str, Any]] = meta.get("rows", [])
+        self.vectors = vectors
+        self.signature = signature
+
+
+class DenseIndex:
+    """
+    Embedding index of a book's content files, stored on disk per book.
+
+    Passages are the same `iter_chunks` chunks the BM25 index uses. Their
+    unit-length float32 vectors live in `.storycraftr/index/dense/vectors.npy`,
+    opened with `mmap_mode="r"` so only the pages a search touches are read,
+    next to `chunks.json`, which lists each row's file, line range and
+    content hash. A refresh re-chunks only files whose size or modification
+    time changed and embeds only chunks whose hash is not already stored.
+    """
+
+    def __init__(self):
+        self._open: Dict[str, _OpenIndex] = {}
+        self._lock = threading.Lock()
+        # Serializes refreshes, which embed outside `_lock` so searches keep running
+        self._refresh_lock = threading.Lock()
+
+    @staticmethod
+    def _dir(book_path: str) -> Path:
+        return Path(book_path).resolve() / INDEX_DIR_NAME
+
+    def _signature(self, directory: Path):
+        try:
+            st = os.stat(directory / "chunks.json")
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def open(self, book_path: str) -> Optional[_OpenIndex]:
+        """
+        Open a book's saved index without reading the vectors into memory.
+
+        Returns:
+            The open index, or None if there is none (or NumPy is missing).
+        """
+        if np is None:
+            return None
+        directory = self._dir(book_path)
+        signature = self._signature(directory)
+        key = str(directory)
+        with self._lock:
+            current = self._open.get(key)
+            if current is not None and current.signature == signature:
+                return current
+            if signature is None:
+                self._open.pop(key, None)
+                return None
+            try:
+                meta = json.loads(
+                    (directory / "chunks.json").read_text(encoding="utf-8")
+                )
+                if meta.get("version") != INDEX_VERSION:
+                    return None
+                vectors = None
+                if meta.get("rows"):
+                    vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+                    if vectors.shape[0] != len(meta["rows"]):
+                        return None
+            except (OSError, ValueError, AttributeError) as e:
+                console.print(f"[yellow]Could not open the dense index: {e}[/yellow]")
+                return None
+            current = _OpenIndex(meta, vectors, signature)
+            self._open[key] = current
+            return current
+
+    def refresh(self, book_path: str, embed: Embedder, model: str) -> Dict[str, int]:
+        """
+        Bring a book's dense index up to date, embedding only new chunks.
+
+        Args:
+            book_path (str): Path to the book directory.
+            embed (callable): Maps a list of texts to one vector per text.
+            model (str): Embedding model name; changing it re-embeds everything.
+
+        Returns:
+            dict: `files_changed`, `chunks` (rows in the index) and `embedded`
+            (chunks sent to `embed`).
+        """
+        result = {"files_changed": 0, "chunks": 0, "embedded": 0}
+        if np is None:
+            return result
+        with self._refresh_lock:
+            return self._refresh(book_path, embed, model, result)
+
+    def _refresh(
+        self, book_path: str, embed: Embedder, model: str, result: Dict[str, int]
+    ):
+        base = Path(book_path).resolve()
+        root = str(base)
+        current = self.open(book_path)
+        meta = (
+            current.meta
+            if current is not None and current.meta.get("model") == model
+            else {}
+        )
+        old_files: Dict[str, Any] = meta.get("files", {})
+        old_rows: List[Dict[str, Any]] = meta.get("rows", []) if meta else []
+        rows_by_path: Dict[str, List[int]] = {}
+        for index, row in enumerate(old_rows):
+            rows_by_path.setdefault(row["path"], []).append(index)
+        row_by_hash = {row["sha256"]: index for index, row in enumerate(old_rows)}
+
+        files: Dict[str, Any] = {}
+        # Each new row is ("old", row index) or ("new", position in to_embed)
+        rows: List[Dict[str, Any]] = []
+        sources: List[tuple] = []
+        to_embed: List[str] = []
+        changed = False
+        for file_path in list_book_content_files(root):
+            rel = file_path[len(root) + 1 :].replace(os.sep, "/")
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            stamp = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            if old_files.get(rel) == stamp:
+                files[rel] = stamp
+                for index in rows_by_path.get(rel, []):
+                    rows.append(old_rows[index])
+                    sources.append(("old", index))
+                continue
+            try:
+                text = Path(file_path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+            changed = True
+            result["files_changed"] += 1
+            files[rel] = stamp
+            # Same rule as load_markdown_files: short files are not book content
+            if len(text.splitlines()) <= 3:
+                continue
+            for chunk in iter_chunks(text, path=rel):
+                digest = chunk["sha256"]
+                rows.append(
+                    {
+                        "id": chunk["id"],
+                        "path": rel,
+                        "start_line": chunk["start_line"],
+                        "end_line": chunk["end_line"],
+                        "sha256": digest,
+                    }
+                )
+                if digest in row_by_hash:
+                    sources.append(("old", row_by_hash[digest]))
+                else:
+                    sources.append(("new", len(to_embed)))
+                    to_embed.append(chunk["text"])
+        if set(old_files) - set(files):
+            changed = True
+        result["chunks"] = len(rows)
+        if not changed and meta:
+            return result
+
+        new_vectors = None
+        if to_embed:
+            batches = [
+                np.asarray(embed(to_embed[i : i + EMBED_BATCH]), dtype=np.float32)
+                for i in range(0, len(to_embed), EMBED_BATCH)
+            ]
+            new_vectors = _normalize(np.concatenate(batches))
+            result["embedded"] = len(to_embed)
+        self._save(base, current, model, files, rows, sources, new_vectors)
+        return result
+
+    def _save(
+        self, base: Path, current, model, files, rows, sources, new_vectors
+    ) -> None:
+        directory = base / INDEX_DIR_NAME
+        directory.mkdir(parents=True, exist_ok=True)
+        old_vectors = current.vectors if current is not None else None
+        dim = (
+            new_vectors.shape[1]
+            if new_vectors is not None
+            else (old_vectors.shape[1] if old_vectors is not None else 0)
+        )
+        with self._lock:
+            if rows:
+                tmp_path = directory / f".vectors.{os.getpid()}.npy.tmp"
+                matrix = np.lib.format.open_memmap(
+                    tmp_path, mode="w+", dtype=np.float32, shape=(len(rows), dim)
+                )
+                old = [
+                    (i, src) for i, (kind, src) in enumerate(sources) if kind == "old"
+                ]
+                new = [
+                    (i, src) for i, (kind, src) in enumerate(sources) if kind == "new"
+                ]
+                if old:
+                    targets, picks = (np.array(column) for column in zip(*old))
+                    matrix[targets] = old_vectors[picks]
+                if new:
+                    targets, picks = (np.array(column) for column in zip(*new))
+                    matrix[targets] = new_vectors[picks]
+                matrix.flush()
+                del matrix
+                # Drop our own mapping before replacing the file it points to
+                self._open.pop(str(directory), None)
+                if current is not None:
+                    current.vectors = None
+                os.replace(tmp_path, directory / "vectors.npy")
+            else:
+                (directory / "vectors.npy").unlink(missing_ok=True)
+            _write_json(
+                directory / "chunks.json",
+                {
+                    "version": INDEX_VERSION,
+                    "model": model,
+                    "dim": dim,
+                    "files": files,
+                    "rows": rows,
+                },
+            )
+
+    def search(
+        self,
+        book_path: str,
+        query_vector,
+        *,
+        max_results: int = 5,
+        path_prefix: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank the indexed passages by cosine similarity to a query vector.
+
+        Rows are scored in blocks of SCORE_BLOCK_ROWS with one matrix-vector
+        product each, keeping the best `max_results` of every block.
+
+        Returns:
+            list: `{path, start_line, end_line, score, text}`, best first.
+        """
+        current = self.open(book_path)
+        if current is None or current.vectors is None:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))[0]
+        vectors = current.vectors
+        if query.shape[0] != vectors.shape[1]:
+            return []
+        k = max(1, int(max_results))
+        prefix = (path_prefix or "").strip("/")
+        allowed = None
+        if prefix:
+            allowed = np.array(
+                [
+                    row["path"] == prefix or row["path"].startswith(prefix + "/")
+                    for row in current.rows
+                ]
+            )
+        best_rows: List[Any] = []
+        best_scores: List[Any] = []
+        for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+            scores = vectors[start : start + SCORE_BLOCK_ROWS] @ query
+            if allowed is not None:
+                scores = np.where(allowed[start : start + len(scores)], scores, -np.inf)
+            top = (
+                np.argpartition(-scores, k - 1)[:k]
+                if len(scores) > k
+                else np.arange(len(scores))
+            )
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        rows = np.concatenate(best_rows)
+        scores = np.concatenate(best_scores)
+        order = np.argsort(-scores)[:k]
+
+        results = []
+        lines_by_path: Dict[str, List[str]] = {}
+        for position in order:
+            score = float(scores[position])
+            if score == -np.inf:
+                continue
+            row = current.rows[int(rows[position])]
+            rel = row["path"]
+            if rel not in lines_by_path:
+                try:
+                    lines_by_path[rel] = (
+                        (Path(book_path) / rel).read_text(encoding="utf-8").splitlines()
+                    )
+                except (OSError, UnicodeDecodeError):
+                    lines_by_path[rel] = []
+            results.append(
+                {
+                    "path": rel,
+                    "start_line": row["start_line"],
+                    "end_line": row["end_line"],
+                    "score": round(score, 4),
+                    "text": "\n".join(
+                        lines_by_path[rel][row["start_line"] - 1 : row["end_line"]]
+                    ),
+                }
+            )
+        return results
+
+    def clear(self) -> None:
+        """Close the open indexes; the files on disk are kept."""
+        with self._lock:
+            self._open.clear()
+
+
+def fuse_results(
+    *rankings: List[Dict[str, Any]], max_results: int = 5, k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked passage lists with reciprocal rank fusion.
+
+    Passages are matched by file and line range; each gets the sum of
+    1 / (k + rank) over the lists it appears in, stored as `score`.
+    """
+    fused: Dict[tuple, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            key = (result["path"], result["start_line"], result["end_line"])
+            entry = fused.setdefault(key, dict(result, score=0.0))
+            entry["score"] += 1.0 / (k + rank)
+    ordered = sorted(fused.values(), key=lambda r: r["score"], reverse=True)[
+        :max_results
+    ]
+    for result in ordered:
+        result["score"] = round(result["score"], 4)
+    return ordered
+
+
+dense_index = DenseIndex()
@@ -0,0 +1,463 @@
+import functools
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# Text edits for the surgical fs_apply_text_edits tool. The _apply_* helpers
+# define the semantics: edits run one after another, each on the result of the
+# previous one. apply_edit_plan produces the same result in a single pass when
+# it can prove the edits do not interact, and falls back to them otherwise.
+
+
+@functools.lru_cache(maxsize=256)
+def _build_anchor_pattern(
+    anchor: str,
+    *,
+    use_regex: bool,
+    case_sensitive: bool,
+    loose_whitespace: bool,
+    normalize_quotes: bool,
+):
+    if use_regex:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        return re.compile(anchor, flags)
+
+    pattern = re.escape(anchor)
+    if loose_whitespace:
+        # Replace any escaped whitespace runs with \s+
+        pattern = re.sub(r"\\\s+", r"\\s+", pattern)
+        pattern = re.sub(r"(?:\\\s)+", r"\\s+", pattern)
+        pattern = re.sub(r"\\\n|\\\r", r"\\s+", pattern)
+        pattern = re.sub(r"\\\t", r"\\s+", pattern)
+        pattern = pattern.replace(" ", r"\s+")
+
+    if normalize_quotes:
+        # Allow curly quotes and dashes variations in target
+        pattern = (
+            pattern.replace(re.escape('"'), r"[\"“”]")
+            .replace(re.escape("'"), r"['‘’]")
+            .replace(re.escape("-"), r"[-–—]")
+        )
+
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.compile(pattern, flags)
+
+
+def _apply_replace_text(
+    content: str,
+    find: str,
+    replace: str,
+    *,
+    use_regex: bool = False,
+    case_sensitive: bool = True,
+    loose_whitespace: bool = False,
+    normalize_quotes: bool = False,
+    occurrence: Optional[int] = None,  # 1-based; None means all
+) -> Dict[str, Any]:
+    replaced = 0
+    new_content = content
+    # Use compiled pattern that can be loose on whitespace/quotes
+    pattern = _build_anchor_pattern(
+        find,
+        use_regex=use_regex,
+        case_sensitive=case_sensitive,
+        loose_whitespace=loose_whitespace,
+        normalize_quotes=normalize_quotes,
+    )
+    if occurrence is None:
+        new_content, replaced = pattern.subn(replace, content)
+    else:
+        cnt = 0
+
+        def _n(m):
+            nonlocal cnt, replaced
+            cnt += 1
+            if cnt == occurrence:
+                replaced += 1
+                return replace
+            return m.group(0)
+
+        new_content = pattern.sub(_n, content)
+
+    return {"content": new_content, "replaced": replaced}
+
+
+def _apply_replace_between(
+    content: str,
+    start_marker: str,
+    end_marker: str,
+    replacement: str,
+    *,
+    include_markers: bool = False,
+    occurrence: Optional[int] = 1,  # default first between pair
+    case_sensitive: bool = True,
+    loose_whitespace: bool = False,
+    normalize_quotes: bool = False,
+) -> Dict[str, Any]:
+    start_pat = _build_anchor_pattern(
+        start_marker,
+        use_regex=False,
+        case_sensitive=case_sensitive,
+        loose_whitespace=loose_whitespace,
+        normalize_quotes=normalize_quotes,
+    )
+    end_pat = _build_anchor_pattern(
+        end_marker,
+        use_regex=False,
+        case_sensitive=case_sensitive,
+        loose_whitespace=loose_whitespace,
+        normalize_quotes=normalize_quotes,
+    )
+    start_pos = 0
+    for i in range(occurrence or 1):
+        m_start = start_pat.search(content, start_pos)
+        if not m_start:
+            return {"content": content, "replaced": 0}
+        m_end = end_pat.search(content, m_start.end())
+        if not m_end:
+            return {"content": content, "replaced": 0}
+        start_pos = m_end.end()
+    s0, s1 = m_start.span()
+    e0, e1 = m_end.span()
+    if include_markers:
+        new_content = content[:s0] + replacement + content[e1:]
+    else:
+        new_content = content[:s1] + replacement + content[e0:]
+    return {"content": new_content, "replaced": 1}
+
+
+def _apply_insert(
+    content: str,
+    anchor: str,
+    insertion: str,
+    *,
+    position: str = "after",  # "before" | "after"
+    occurrence: Optional[int] = 1,
+    case_sensitive: bool = True,
+    loose_whitespace: bool = False,
+    normalize_quotes: bool = False,
+) -> Dict[str, Any]:
+    pat = _build_anchor_pattern(
+        anchor,
+        use_regex=False,
+        case_sensitive=case_sensitive,
+        loose_whitespace=loose_whitespace,
+        normalize_quotes=normalize_quotes,
+    )
+    start = 0
+    m = None
+    for i in range(occurrence or 1):
+        m = pat.search(content, start)
+        if not m:
+            return {"content": content, "inserted": 0}
+        start = m.end()
+    if position == "before":
+        idx = m.start()
+        new_content = content[:idx] + insertion + content[idx:]
+    else:
+        idx = m.end()
+        new_content = content[:idx] + insertion + content[idx:]
+    return {"content": new_content, "inserted": 1}
+
+
+def _apply_edit(text: str, edit: Dict[str, Any]) -> Tuple[str, int]:
+    """Apply one edit with the sequential helpers; returns (text, changes)."""
+    etype = edit.get("type")
+    if etype == "replace_text":
+        res = _apply_replace_text(
+            text,
+            edit.get("find", ""),
+            edit.get("replace", ""),
+            use_regex=bool(edit.get("use_regex", False)),
+            case_sensitive=bool(edit.get("case_sensitive", True)),
+            loose_whitespace=bool(edit.get("loose_whitespace", True)),
+            normalize_quotes=bool(edit.get("normalize_quotes", True)),
+            occurrence=edit.get("occurrence"),
+        )
+        return res.get("content", text), int(res.get("replaced", 0))
+    if etype == "replace_between":
+        res = _apply_replace_between(
+            text,
+            edit.get("start_marker", ""),
+            edit.get("end_marker", ""),
+            edit.get("replacement", ""),
+            include_markers=bool(edit.get("include_markers", False)),
+            occurrence=edit.get("occurrence", 1),
+            case_sensitive=bool(edit.get("case_sensitive", True)),
+            loose_whitespace=bool(edit.get("loose_whitespace", True)),
+            normalize_quotes=bool(edit.get("normalize_quotes", True)),
+        )
+        return res.get("content", text), int(res.get("replaced", 0))
+    if etype in ("insert_before", "insert_after"):
+        res = _apply_insert(
+            text,
+            edit.get("anchor", ""),
+            edit.get("insert", ""),
+            position="before" if etype == "insert_before" else "after",
+            occurrence=edit.get("occurrence", 1),
+            case_sensitive=bool(edit.get("case_sensitive", True)),
+            loose_whitespace=bool(edit.get("loose_whitespace", True)),
+            normalize_quotes=bool(edit.get("normalize_quotes", True)),
+        )
+        return res.get("content", text), int(res.get("inserted", 0))
+    # Unknown edit type; skip
+    return text, 0
+
+
+def apply_edits_sequentially(text: str, edits: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """
+    Apply edits one after another, each on the output of the previous one.
+
+    Args:
+        text (str): The original text.
+        edits (list): Edit dicts as accepted by fs_apply_text_edits.
+
+    Returns:
+        tuple: The edited text and the total number of changes.
+    """
+    total = 0
+    for edit in edits:
+        text, changes = _apply_edit(text, edit)
+        total += changes
+    return text, total
+
+
+def apply_edits_checked(text: str, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply edits sequentially and report the ones whose anchors did not resolve.
+
+    Used to replay edits on content that changed after the caller read it:
+    the replay is only safe if every edit still finds its anchor.
+
+    Args:
+        text (str): The current text.
+        edits (list): Edit dicts as accepted by fs_apply_text_edits.
+
+    Returns:
+        dict: `content`, `changes`, and `unresolved` (indexes of edits that
+        made no change).
+    """
+    total = 0
+    unresolved = []
+    for index, edit in enumerate(edits):
+        text, changes = _apply_edit(text, edit)
+        total += changes
+        if changes == 0:
+            unresolved.append(index)
+    return {"content": text, "changes": total, "unresolved": unresolved}
+
+
+class _Span(NamedTuple):
+    start: int
+    end: int
+    text: str
+    edit: int
+
+
+class _NotIndependent(Exception):
+    """The plan cannot be resolved against the original text in one pass."""
+
+
+def _pattern(anchor: Any, edit: Dict[str, Any]):
+    if not isinstance(anchor, str) or not anchor:
+        raise _NotIndependent()
+    return _build_anchor_pattern(
+        anchor,
+        use_regex=False,
+        case_sensitive=bool(edit.get("case_sensitive", True)),
+        loose_whitespace=bool(edit.get("loose_whitespace", True)),
+        normalize_quotes=bool(edit.get("normalize_quotes", True)),
+    )
+
+
+def _nth_search(pattern, text: str, occurrence: Any, start: int = 0):
+    """Mirror the search loop of the insert/between helpers."""
+    m = None
+    for _ in range(occurrence or 1):
+        m = pattern.search(text, start)
+        if not m:
+            return None
+        start = m.end()
+    return m
+
+
+def _resolve(text: str, index: int, edit: Dict[str, Any]):
+    """
+    Resolve one edit against the original text.
+
+    Returns:
+        tuple: (spans, changes, [(pattern, anchor length)]) for the edit.
+    """
+    etype = edit.get("type")
+    if etype == "replace_text":
+        if edit.get("use_regex", False):
+            # Arbitrary patterns may look anywhere in the text
+            raise _NotIndependent()
+        find = edit.get("find", "")
+        pattern = _pattern(find, edit)
+        replace = edit.get("replace", "")
+        occurrence = edit.get("occurrence")
+        spans = []
+        if occurrence is None:
+            # subn parses the template even when nothing matches
+            pattern.sub(replace, "")
+            spans = [
+                _Span(m.start(), m.end(), m.expand(replace), index)
+                for m in pattern.finditer(text)
+            ]
+        else:
+            for count, m in enumerate(pattern.finditer(text), start=1):
+                if count == occurrence:
+                    spans = [_Span(m.start(), m.end(), replace, index)]
+                    break
+        return spans, len(spans), [(pattern, len(find))]
+    if etype == "replace_between":
+        start_marker = edit.get("start_marker", "")
+        end_marker = edit.get("end_marker", "")
+        start_pat = _pattern(start_marker, edit)
+        end_pat = _pattern(end_marker, edit)
+        patterns = [(start_pat, len(start_marker)), (end_pat, len(end_marker))]
+        m_start = m_end = None
+        position = 0
+        for _ in range(edit.get("occurrence", 1) or 1):
+            m_start = start_pat.search(text, position)
+            m_end = end_pat.search(text, m_start.end()) if m_start else None
+            if not m_end:
+                return [], 0, patterns
+            position = m_end.end()
+        replacement = edit.get("replacement", "")
+        if edit.get("include_markers", False):
+            span = _Span(m_start.start(), m_end.end(), replacement, index)
+        else:
+            span = _Span(m_start.end(), m_end.start(), replacement, index)
+        return [span], 1, patterns
+    if etype in ("insert_before", "insert_after"):
+        anchor = edit.get("anchor", "")
+        pattern = _pattern(anchor, edit)
+        m = _nth_search(pattern, text, edit.get("occurrence", 1))
+        if not m:
+            return [], 0, [(pattern, len(anchor))]
+        at = m.start() if etype == "insert_before" else m.end()
+        return (
+            [_Span(at, at, edit.get("insert", ""), index)],
+            1,
+            [(pattern, len(anchor))],
+        )
+    return [], 0, []
+
+
+def _window(text: str, start: int, end: int, reach: int) -> Tuple[int, int]:
+    """
+    Widen [start, end) by `reach` non-whitespace characters on each side.
+
+    Built anchors match at most as many non-whitespace characters as the anchor
+    has, plus runs of whitespace, so any match touching the span fits inside.
+    """
+    left, seen = start, 0
+    while left > 0 and seen <= reach:
+        left -= 1
+        if not text[left].isspace():
+            seen += 1
+    right, seen = end, 0
+    while right < len(text) and seen <= reach:
+        if not text[right].isspace():
+            seen += 1
+        right += 1
+    return left, right
+
+
+def _touches(pattern, window: str, region_start: int, region_end: int) -> bool:
+    """True if any match of `pattern` in `window` overlaps or abuts the region."""
+    position = 0
+    while position <= region_end:
+        m = pattern.search(window, position)
+        if not m or m.start() > region_end:
+            return False
+        if m.end() >= region_start:
+            return True
+        position = m.start() + 1
+    return False
+
+
+def apply_edit_plan(text: str, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply a list of edits, matching `apply_edits_sequentially` exactly.
+
+    All anchors are resolved against the original text and the output is built
+    once from the resulting spans. That is only valid when no edit can see the
+    effect of an earlier one, so the plan is checked first:
+
+    - every anchor is a literal (regex edits fall back),
+    - spans from different edits neither overlap nor touch,
+    - no anchor of a later edit matches across or next to an earlier edit's
+      span, either before or after that span is rewritten.
+
+    Any plan that fails a check, or has a single edit, runs sequentially.
+
+    Args:
+        text (str): The original text.
+        edits (list): Edit dicts as accepted by fs_apply_text_edits.
+
+    Returns:
+        dict: `content`, `changes`, and `compiled` (False when the plan ran
+        sequentially).
+    """
+    if len(edits) > 1:
+        try:
+            content, changes = _apply_compiled(text, edits)
+            return {"content": content, "changes": changes, "compiled": True}
+        except _NotIndependent:
+            pass
+        except Exception:
+            # Malformed edits raise (or not) exactly as the sequential path does
+            pass
+    content, changes = apply_edits_sequentially(text, edits)
+    return {"content": content, "changes": changes, "compiled": False}
+
+
+def _apply_compiled(text: str, edits: List[Dict[str, Any]]) -> Tuple[str, int]:
+    spans: List[_Span] = []
+    patterns: List[List[Tuple[Any, int]]] = []
+    total = 0
+    for index, edit in enumerate(edits):
+        edit_spans, changes, edit_patterns = _resolve(text, index, edit)
+        spans.extend(edit_spans)
+        patterns.append(edit_patterns)
+        total += changes
+
+    spans.sort(key=lambda span: (span.start, span.end))
+    for prev, span in zip(spans, spans[1:]):
+        if span.start < prev.end or (span.edit != prev.edit and span.start <= prev.end):
+            raise _NotIndependent()
+
+    for position, span in enumerate(spans):
+        later = [
+            pattern
+            for edit_patterns in patterns[span.edit + 1 :]
+            for pattern in edit_patterns
+        ]
+        if not later:
+            continue
+        reach = max(length for _, length in later)
+        left, right = _window(text, span.start, span.end, reach)
+        # The window must hold only this span's own text, untouched by others
+        if position > 0 and spans[position - 1].end > left:
+            raise _NotIndependent()
+        if position + 1 < len(spans) and spans[position + 1].start < right:
+            raise _NotIndependent()
+        before = text[left:right]
+        after = text[left : span.start] + span.text + text[span.end : right]
+        region = span.start - left
+        for pattern, _ in later:
+            if _touches(pattern, before, region, region + span.end - span.start):
+                raise _NotIndependent()
+            if _touches(pattern, after, region, region + len(span.text)):
+                raise _NotIndependent()
+
+    pieces = []
+    cursor = 0
+    for span in spans:
+        pieces.append(text[cursor : span.start])
+        pieces.append(span.text)
+        cursor = span.end
+    pieces.append(text[cursor:])
+    return "".join(pieces), total
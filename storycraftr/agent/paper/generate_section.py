@@ -6,8 +6,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.paper.generate_section import (
     INTRODUCTION_PROMPT_NEW,
@@ -58,6 +58,7 @@ def _generate_section(
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     save_to_markdown(
@@ -67,7 +68,7 @@ def _generate_section(
     console.print(
         f"[bold green]✔ {section_name.title()} generated successfully[/bold green]"
     )
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return section_content
 
 
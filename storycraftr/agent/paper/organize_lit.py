@@ -6,8 +6,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.paper.organize_lit import (
     LIT_SUMMARY_PROMPT_NEW,
@@ -54,6 +54,7 @@ def generate_lit_summary(book_path: str, prompt: str) -> str:
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     # Save the result
@@ -67,5 +68,5 @@ def generate_lit_summary(book_path: str, prompt: str) -> str:
         "[bold green]✔ Literature summary generated successfully[/bold green]"
     )
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return lit_summary_content
@@ -6,8 +6,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.paper.outline_sections import (
     OUTLINE_SECTIONS_PROMPT_NEW,
@@ -56,11 +56,12 @@ def generate_outline(book_path: str, prompt: str) -> str:
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     # Save the result
     save_to_markdown(book_path, "sections/outline.md", "Paper Outline", outline_content)
     console.print("[bold green]✔ Paper outline generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return outline_content
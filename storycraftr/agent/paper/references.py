@@ -6,8 +6,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.paper.references import (
     ADD_REFERENCE_PROMPT,
@@ -57,7 +57,7 @@ def add_reference(book_path: str, prompt: str) -> str:
 
     console.print("[bold green]✔ Reference added successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return reference_content
 
 
@@ -90,6 +90,7 @@ def format_references(book_path: str, prompt: str) -> str:
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     # Save the formatted references
@@ -98,7 +99,7 @@ def format_references(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ References formatted successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return formatted_references
 
 
@@ -131,6 +132,7 @@ def check_citations(book_path: str, prompt: str) -> str:
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     # Save the citation check report
@@ -139,7 +141,7 @@ def check_citations(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ Citations checked successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return citation_report
 
 
@@ -183,7 +185,7 @@ def generate_citation(book_path: str, prompt: str, citation_format: str) -> str:
 
     console.print("[bold green]✔ Citation generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return citation_content
 
 
@@ -218,6 +220,7 @@ def generate_bibtex(book_path: str, bibtex_style: str) -> str:
         content=content,
         assistant=assistant,
         file_path=file_path,
+        context_tokens=0,
     )
 
     # Save the BibTeX content
@@ -226,5 +229,5 @@ def generate_bibtex(book_path: str, bibtex_style: str) -> str:
     )
     console.print("[bold green]✔ BibTeX references generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return bibtex_content
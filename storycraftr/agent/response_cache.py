@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from rich.console import Console
+
+# Read .env before the singleton below picks up its settings
+load_dotenv()
+
+console = Console()
+
+# Bump when the key layout changes so old entries are never matched
+CACHE_KEY_VERSION = 1
+CACHE_DIR_NAME = os.path.join(".storycraftr", "responses")
+
+
+def _env_flag(name: str, default: str = "") -> bool:
+    return str(os.getenv(name, default)).lower() in ("1", "true", "yes", "on")
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_instructions(instructions: str | None) -> str:
+    """Collapse whitespace so cosmetic edits to behavior files do not miss the cache."""
+    return re.sub(r"\s+", " ", instructions or "").strip()
+
+
+class ResponseCache:
+    """
+    Opt-in on-disk cache of final response texts, stored per book under
+    `.storycraftr/responses/` and keyed by a content hash of the request.
+
+    Entries expire after `ttl` seconds; when a book holds more than
+    `max_entries` entries the least recently used ones are evicted (file
+    mtimes are bumped on every hit).
+
+    Attributes:
+        enabled (bool): Whether lookups and stores happen at all.
+        ttl (float): Maximum entry age in seconds.
+        max_entries (int): Maximum number of entries kept per book.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self._lock = threading.Lock()
+        self.enabled = (
+            enabled if enabled is not None else _env_flag("STORYCRAFTR_RESPONSE_CACHE")
+        )
+        self.ttl = float(
+            ttl
+            if ttl is not None
+            else os.getenv("STORYCRAFTR_RESPONSE_CACHE_TTL", str(7 * 24 * 3600))
+        )
+        self.max_entries = int(
+            max_entries
+            if max_entries is not None
+            else os.getenv("STORYCRAFTR_RESPONSE_CACHE_MAX_ENTRIES", "500")
+        )
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Turn the cache on or off for this process (backs --no-cache)."""
+        self.enabled = bool(enabled)
+
+    def make_key(
+        self,
+        model: str,
+        instructions: str | None,
+        prompt: str,
+        file_hashes: Dict[str, str] | None = None,
+        tools: Any = None,
+    ) -> str:
+        """
+        Build the cache key for a request.
+
+        The prompt must be the text before generate_prompt_with_hash adds its
+        random date phrase; otherwise no two requests would ever match.
+
+        Args:
+            model (str): Model name.
+            instructions (str): Assistant instructions (normalized here).
+            prompt (str): The user prompt without the nonce.
+            file_hashes (dict, optional): Content hashes of every file the answer depends on.
+            tools (any, optional): The tool schema sent with the request.
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = {
+            "v": CACHE_KEY_VERSION,
+            "model": model or "",
+            "instructions": normalize_instructions(instructions),
+            "prompt": prompt,
+            "files": dict(sorted((file_hashes or {}).items())),
+            "tools": _sha256_text(json.dumps(tools or [], sort_keys=True, default=str)),
+        }
+        return _sha256_text(json.dumps(payload, sort_keys=True))
+
+    def _dir(self, book_path: str) -> Path:
+        return Path(book_path) / CACHE_DIR_NAME
+
+    def get(self, book_path: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached entry for the key, or None on a miss or expired entry.
+        """
+        if not self.enabled:
+            return None
+        path = self._dir(book_path) / f"{key}.json"
+        entry = None
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Corrupt entry; drop it
+            self._remove(path)
+        if (
+            entry is not None
+            and time.time() - float(entry.get("created_at", 0)) > self.ttl
+        ):
+            self._remove(path)
+            entry = None
+        with self._lock:
+            self._counters["hits" if entry is not None else "misses"] += 1
+        if entry is not None:
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+        return entry
+
+    def put(self, book_path: str, key: str, text: str, **metadata) -> None:
+        """
+        Store a response text under the key and evict old entries. Best-effort.
+        """
+        if not self.enabled:
+            return
+        directory = self._dir(book_path)
+        entry = {"created_at": time.time(), "text": text, **metadata}
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = directory / f"{key}.json.tmp"
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, directory / f"{key}.json")
+        except Exception as e:
+            console.print(f"[yellow]Could not store cached response: {str(e)}[/yellow]")
+            return
+        with self._lock:
+            self._counters["stores"] += 1
+        self._evict(directory)
+
+    def _evict(self, directory: Path) -> None:
+        try:
+            entries = [p for p in directory.glob("*.json") if p.is_file()]
+        except OSError:
+            return
+        now = time.time()
+        survivors = []
+        for path in entries:
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if now - mtime > self.ttl:
+                self._remove(path, evicted=True)
+            else:
+                survivors.append((mtime, path))
+        overflow = len(survivors) - max(0, self.max_entries)
+        if overflow > 0:
+            for _, path in sorted(survivors)[:overflow]:
+                self._remove(path, evicted=True)
+
+    def _remove(self, path: Path, evicted: bool = False) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            return
+        if evicted:
+            with self._lock:
+                self._counters["evictions"] += 1
+
+    def clear(self, book_path: str) -> int:
+        """Delete every cached response for the book. Returns the number removed."""
+        removed = 0
+        for path in self._dir(book_path).glob("*.json"):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/store/eviction counters for this process."""
+        with self._lock:
+            return dict(self._counters)
+
+
+# Singleton shared by every generator in the process
+response_cache = ResponseCache()
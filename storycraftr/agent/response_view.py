@@ -0,0 +1,156 @@
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    """Read a field from an SDK object or a plain dict without copying it."""
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    try:
+        return getattr(obj, name, default)
+    except Exception:
+        return default
+
+
+def _dedup_preserve_order(chunks: List[str]) -> List[str]:
+    seen: set = set()
+    result: List[str] = []
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            continue
+        s = chunk.strip()
+        if not s or s in seen:
+            continue
+        # Avoid immediate repeats differing only by whitespace
+        if result and s == result[-1].strip():
+            continue
+        seen.add(s)
+        result.append(chunk)
+    return result
+
+
+class ResponseView:
+    """
+    Normalized, read-only view of a Responses API result.
+
+    Works on SDK objects and on raw dicts (HTTP fallbacks, tests) alike. Fields
+    are read in place rather than through `model_dump()`, and each property is
+    computed once on first use, so a response is walked at most once however
+    many helpers look at it.
+    """
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+
+    @classmethod
+    def of(cls, resp: Any) -> "ResponseView":
+        return resp if isinstance(resp, cls) else cls(resp)
+
+    @cached_property
+    def id(self) -> Optional[str]:
+        return _field(self.raw, "id")
+
+    @cached_property
+    def output(self) -> List[Any]:
+        """The output items as returned, for replaying into the next request."""
+        output = _field(self.raw, "output")
+        return output if isinstance(output, list) else []
+
+    @cached_property
+    def text(self) -> str:
+        # Prefer the SDK convenience property when present
+        value = _field(self.raw, "output_text")
+        if isinstance(value, str) and value:
+            return value
+        output_text_chunks = []
+        text_value_chunks = []
+        for item in self.output:
+            contents = _field(item, "content")
+            if not isinstance(contents, list):
+                continue
+            for c in contents:
+                ctype = _field(c, "type")
+                inner = _field(c, "text")
+                # Example structure: {"type": "output_text", "text": "..."}
+                if ctype == "output_text" and isinstance(inner, str):
+                    output_text_chunks.append(inner)
+                # Older structure: {"type": "text", "text": {"value": "..."}}
+                elif ctype == "text" and isinstance(_field(inner, "value"), str):
+                    text_value_chunks.append(_field(inner, "value"))
+        # Prefer output_text chunks if present; else fall back to text.value
+        chunks = output_text_chunks or text_value_chunks
+        return "\n".join(_dedup_preserve_order(chunks)) if chunks else ""
+
+    @cached_property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        """Function calls the model asked for, as {name, arguments, call_id}."""
+        calls: List[Dict[str, Any]] = []
+        # Pattern 1: Output contains function_call/tool_use items
+        for item in self.output:
+            if _field(item, "type") not in ("function_call", "tool_use"):
+                continue
+            fn = _field(item, "function") or {}
+            name = _field(item, "name") or _field(fn, "name")
+            args = _field(item, "arguments") or _field(fn, "arguments")
+            call_id = _field(item, "call_id") or _field(item, "id") or _field(fn, "id")
+            if name and call_id:
+                calls.append({"name": name, "arguments": args, "call_id": call_id})
+        # Pattern 2: required_action submit_tool_outputs
+        ra = _field(self.raw, "required_action") or {}
+        if _field(ra, "type") == "submit_tool_outputs":
+            tool_calls = (
+                _field(_field(ra, "submit_tool_outputs") or {}, "tool_calls")
+                or _field(ra, "tool_calls")
+                or []
+            )
+            for c in tool_calls:
+                fn = _field(c, "function") or {}
+                name = _field(fn, "name") or _field(c, "name")
+                args = _field(fn, "arguments") or _field(c, "arguments")
+                call_id = (
+                    _field(c, "id") or _field(c, "tool_call_id") or _field(c, "call_id")
+                )
+                if name and call_id:
+                    calls.append({"name": name, "arguments": args, "call_id": call_id})
+        return calls
+
+    @cached_property
+    def model_calls(self) -> List[Dict[str, Any]]:
+        """Every function_call/tool_use output item as {name, arguments}."""
+        return [
+            {"name": _field(item, "name"), "arguments": _field(item, "arguments")}
+            for item in self.output
+            if _field(item, "type") in ("function_call", "tool_use")
+        ]
+
+    @cached_property
+    def file_search_queries(self) -> List[List[str]]:
+        """Queries of each file_search call, one list per call."""
+        searches = []
+        for item in self.output:
+            if _field(item, "type") == "file_search_call":
+                queries = _field(item, "queries") or []
+                if queries:
+                    searches.append([str(q) for q in queries])
+        return searches
+
+    @cached_property
+    def reasoning_summary(self) -> Optional[str]:
+        summary = _field(_field(self.raw, "reasoning"), "summary")
+        if isinstance(summary, str) and summary.strip():
+            return summary.strip()
+        return None
+
+    @cached_property
+    def usage(self) -> Dict[str, int]:
+        """Input and cached input token counts (zero when not reported)."""
+        usage = _field(self.raw, "usage")
+        details = _field(usage, "input_tokens_details")
+        try:
+            input_tokens = int(_field(usage, "input_tokens") or 0)
+            cached_tokens = int(_field(details, "cached_tokens") or 0)
+        except (TypeError, ValueError):
+            input_tokens = cached_tokens = 0
+        return {"input_tokens": input_tokens, "cached_tokens": cached_tokens}
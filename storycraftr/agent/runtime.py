@@ -0,0 +1,90 @@
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+from typing import Dict, Tuple
+
+
+class BackgroundLoop:
+    """
+    A long-lived event loop running on a daemon thread.
+
+    The synchronous wrappers submit their coroutines here instead of calling
+    asyncio.run(), so async clients and their keep-alive connections survive
+    from one call to the next.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="storycraftr-loop", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        Schedule the coroutine on the background loop without waiting for it.
+
+        Raises:
+            RuntimeError: If called from the background loop's own thread.
+        """
+        if self._thread is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "Synchronous StoryCraftr calls cannot be made from inside the background loop; await the async API instead."
+            )
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro):
+        """
+        Run the coroutine on the background loop and block until it finishes.
+
+        Raises:
+            RuntimeError: If called from the background loop's own thread.
+        """
+        return self.submit(coro).result()
+
+
+# Singleton shared by every synchronous wrapper in the process
+background_loop = BackgroundLoop()
+
+# Per-loop semaphores keyed by book path, tagged with the limit they were built with
+_BOOK_SEMAPHORES = weakref.WeakKeyDictionary()
+_BOOK_SEMAPHORES_LOCK = threading.Lock()
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code."""
+    return background_loop.run(coro)
+
+
+def book_semaphore(book_path: str, limit: int) -> asyncio.Semaphore:
+    """
+    Return the semaphore bounding concurrent model requests for a book on the
+    running event loop. A new semaphore is created if the book's limit changes.
+
+    Args:
+        book_path (str): Path to the book directory.
+        limit (int): Maximum number of concurrent requests for the book.
+    """
+    loop = asyncio.get_running_loop()
+    limit = max(1, int(limit or 1))
+    with _BOOK_SEMAPHORES_LOCK:
+        per_loop: Dict[
+            str, Tuple[int, asyncio.Semaphore]
+        ] = _BOOK_SEMAPHORES.setdefault(loop, {})
+        entry = per_loop.get(str(book_path))
+        if entry is None or entry[0] != limit:
+            entry = (limit, asyncio.Semaphore(limit))
+            per_loop[str(book_path)] = entry
+        return entry[1]
@@ -0,0 +1,430 @@
+import asyncio
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+# Read .env before the singleton below picks up its settings
+load_dotenv()
+
+# Lanes in the order they are served when the limits are saturated
+PRIORITIES = ("interactive", "batch")
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_PRIORITY: contextvars.ContextVar = contextvars.ContextVar(
+    "storycraftr_request_priority", default="interactive"
+)
+
+
+def current_priority() -> str:
+    """Return the priority lane of requests made from the current context."""
+    return _PRIORITY.get()
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Run the enclosed requests in the given priority lane.
+
+    Args:
+        priority (str): One of PRIORITIES.
+
+    Raises:
+        ValueError: If the priority is unknown.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(
+            f"Unknown request priority '{priority}'. Use one of: {', '.join(PRIORITIES)}."
+        )
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def _parse_duration(value: str | None) -> Optional[float]:
+    """Parse rate-limit reset values such as '1s', '6m0s', '250ms' or '0.5'."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, matched = 0.0, False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total if matched else None
+
+
+def _parse_int(value: str | None) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    A per-minute budget refilled continuously. A rate of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute: float = 0):
+        self.per_minute = 0.0
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(per_minute)
+
+    def set_rate(self, per_minute: float) -> None:
+        self._refill()
+        first = self.per_minute == 0
+        self.per_minute = max(0.0, float(per_minute or 0))
+        self.tokens = self.per_minute if first else min(self.tokens, self.per_minute)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.per_minute:
+            self.tokens = min(
+                self.per_minute,
+                self.tokens + (now - self._updated) * self.per_minute / 60.0,
+            )
+        self._updated = now
+
+    def wait_time(self, cost: float) -> float:
+        """Seconds until `cost` is available (a cost above capacity waits for a full bucket)."""
+        if not self.per_minute:
+            return 0.0
+        self._refill()
+        needed = min(cost, self.per_minute) - self.tokens
+        return 0.0 if needed <= 0 else needed * 60.0 / self.per_minute
+
+    def take(self, cost: float) -> None:
+        if self.per_minute:
+            self.tokens -= min(cost, self.per_minute)
+
+    def cap(self, remaining: float) -> None:
+        """Never believe we have more budget than the server says is left."""
+        if self.per_minute:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    """
+    Request and token budgets for one endpoint, shared by sync and async callers.
+
+    Explicitly configured limits win; otherwise the limits advertised in the
+    x-ratelimit-* response headers are adopted as they are seen.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._lock = threading.Lock()
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._configured = {
+            "requests": bool(requests_per_minute),
+            "tokens": bool(tokens_per_minute),
+        }
+        self._cooldown_until = 0.0
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+
+    def configure(
+        self, requests_per_minute: int = 0, tokens_per_minute: int = 0
+    ) -> None:
+        with self._lock:
+            if requests_per_minute:
+                self.requests.set_rate(requests_per_minute)
+                self._configured["requests"] = True
+            if tokens_per_minute:
+                self.tokens.set_rate(tokens_per_minute)
+                self._configured["tokens"] = True
+
+    def _try_acquire(self, priority: str, cost: float) -> float:
+        # Returns 0 when the request may go now, otherwise seconds to wait
+        with self._lock:
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                return wait
+            rank = (
+                PRIORITIES.index(priority)
+                if priority in PRIORITIES
+                else len(PRIORITIES)
+            )
+            if any(self._waiting[p] for p in PRIORITIES[:rank]):
+                return 0.05
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(cost))
+            if wait > 0:
+                return wait
+            self.requests.take(1)
+            self.tokens.take(cost)
+            return 0.0
+
+    def _set_waiting(self, priority: str, delta: int) -> None:
+        with self._lock:
+            if priority in self._waiting:
+                self._waiting[priority] += delta
+
+    def acquire(self, priority: str, cost: float) -> float:
+        """Block until the request may be sent. Returns the seconds spent waiting."""
+        waited = 0.0
+        wait = self._try_acquire(priority, cost)
+        if wait <= 0:
+            return waited
+        self._set_waiting(priority, 1)
+        try:
+            while wait > 0:
+                delay = min(wait, 1.0)
+                time.sleep(delay)
+                waited += delay
+                wait = self._try_acquire(priority, cost)
+        finally:
+            self._set_waiting(priority, -1)
+        return waited
+
+    async def aacquire(self, priority: str, cost: float) -> float:
+        """Async counterpart of acquire()."""
+        waited = 0.0
+        wait = self._try_acquire(priority, cost)
+        if wait <= 0:
+            return waited
+        self._set_waiting(priority, 1)
+        try:
+            while wait > 0:
+                delay = min(wait, 1.0)
+                await asyncio.sleep(delay)
+                waited += delay
+                wait = self._try_acquire(priority, cost)
+        finally:
+            self._set_waiting(priority, -1)
+        return waited
+
+    def observe(self, status_code: int, headers) -> None:
+        """Adapt the budgets to the x-ratelimit-* headers of a response."""
+        now = time.monotonic()
+        with self._lock:
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                limit = _parse_int(headers.get(f"x-ratelimit-limit-{kind}"))
+                remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{kind}"))
+                reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if limit and not self._configured[kind] and limit != bucket.per_minute:
+                    bucket.set_rate(limit)
+                if remaining is not None:
+                    bucket.cap(remaining)
+                    if remaining <= 0 and reset:
+                        self._cooldown_until = max(self._cooldown_until, now + reset)
+            if status_code == 429:
+                retry_after = retry_after_seconds(headers)
+                if retry_after:
+                    self._cooldown_until = max(self._cooldown_until, now + retry_after)
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Return the server's requested retry delay in seconds, if any."""
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000.0
+        except ValueError:
+            pass
+    return _parse_duration(headers.get("retry-after"))
+
+
+class RequestScheduler:
+    """
+    Process-wide gate in front of every HTTP request to the model endpoints.
+
+    Each endpoint (base URL) has its own RateLimiter. Requests wait for budget
+    in their priority lane, and 429/5xx responses are retried with jittered
+    exponential backoff.
+
+    Attributes:
+        max_retries (int): Retries after the first attempt for retryable failures.
+        base_delay (float): First backoff step in seconds.
+        max_delay (float): Upper bound of a single backoff step in seconds.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+    ):
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, RateLimiter] = {}
+        self.max_retries = int(
+            max_retries
+            if max_retries is not None
+            else os.getenv("STORYCRAFTR_MAX_RETRIES", "4")
+        )
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._counters = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "rate_limited": 0,
+        }
+
+    @staticmethod
+    def _key(base_url: str) -> str:
+        return str(base_url).rstrip("/")
+
+    def limiter(self, base_url: str) -> RateLimiter:
+        """Return the limiter for an endpoint, creating an unlimited one on first use."""
+        key = self._key(base_url)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = RateLimiter()
+            return limiter
+
+    def configure(
+        self, base_url: str, requests_per_minute: int = 0, tokens_per_minute: int = 0
+    ) -> None:
+        """
+        Set explicit limits for an endpoint. Zero leaves a limit to the response headers.
+
+        Args:
+            base_url (str): The OpenAI-compatible API base URL.
+            requests_per_minute (int): Requests allowed per minute.
+            tokens_per_minute (int): Estimated tokens allowed per minute.
+        """
+        if requests_per_minute or tokens_per_minute:
+            self.limiter(base_url).configure(requests_per_minute, tokens_per_minute)
+
+    def backoff_delay(self, attempt: int, headers=None) -> float:
+        """Delay before retry number `attempt` (0-based): server hint or jittered exponential."""
+        hinted = retry_after_seconds(headers) if headers is not None else None
+        if hinted is not None and 0 < hinted <= self.max_delay * 2:
+            return hinted
+        step = min(self.max_delay, self.base_delay * (2**attempt))
+        return step / 2 + random.uniform(0, step / 2)  # nosec - jitter, not crypto
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self) -> Dict[str, int]:
+        """Return request/throttle/retry counters for this process."""
+        with self._lock:
+            return dict(self._counters)
+
+
+def estimate_tokens(request: httpx.Request) -> float:
+    """Rough token cost of a request: about 4 bytes per token of JSON body for model calls."""
+    if request.method != "POST" or not request.url.path.rstrip("/").endswith(
+        "/responses"
+    ):
+        return 0.0
+    try:
+        return len(request.content) / 4.0
+    except httpx.RequestNotRead:
+        return 0.0
+
+
+def _is_retryable(status_code: int) -> bool:
+    return status_code in RETRY_STATUSES
+
+
+class SchedulingTransport(httpx.BaseTransport):
+    """httpx transport that routes every request through the RequestScheduler."""
+
+    def __init__(
+        self, inner: httpx.BaseTransport, scheduler: RequestScheduler, base_url: str
+    ):
+        self._inner = inner
+        self._scheduler = scheduler
+        self._limiter = scheduler.limiter(base_url)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        cost = estimate_tokens(request)
+        attempt = 0
+        while True:
+            if self._limiter.acquire(current_priority(), cost):
+                self._scheduler._count("throttled")
+            self._scheduler._count("requests")
+            try:
+                response = self._inner.handle_request(request)
+            except httpx.ConnectError:
+                if attempt >= self._scheduler.max_retries:
+                    raise
+                time.sleep(self._scheduler.backoff_delay(attempt))
+                attempt += 1
+                self._scheduler._count("retries")
+                continue
+            self._limiter.observe(response.status_code, response.headers)
+            if (
+                not _is_retryable(response.status_code)
+                or attempt >= self._scheduler.max_retries
+            ):
+                return response
+            if response.status_code == 429:
+                self._scheduler._count("rate_limited")
+            delay = self._scheduler.backoff_delay(attempt, response.headers)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+            self._scheduler._count("retries")
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncSchedulingTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of SchedulingTransport."""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        scheduler: RequestScheduler,
+        base_url: str,
+    ):
+        self._inner = inner
+        self._scheduler = scheduler
+        self._limiter = scheduler.limiter(base_url)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cost = estimate_tokens(request)
+        attempt = 0
+        while True:
+            if await self._limiter.aacquire(current_priority(), cost):
+                self._scheduler._count("throttled")
+            self._scheduler._count("requests")
+            try:
+                response = await self._inner.handle_async_request(request)
+            except httpx.ConnectError:
+                if attempt >= self._scheduler.max_retries:
+                    raise
+                await asyncio.sleep(self._scheduler.backoff_delay(attempt))
+                attempt += 1
+                self._scheduler._count("retries")
+                continue
+            self._limiter.observe(response.status_code, response.headers)
+            if (
+                not _is_retryable(response.status_code)
+                or attempt >= self._scheduler.max_retries
+            ):
+                return response
+            if response.status_code == 429:
+                self._scheduler._count("rate_limited")
+            delay = self._scheduler.backoff_delay(attempt, response.headers)
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+            self._scheduler._count("retries")
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# Singleton shared by every pooled client in the process
+request_scheduler = RequestScheduler()
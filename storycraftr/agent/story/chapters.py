@@ -4,8 +4,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.core import load_book_config
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.story.chapters import (
@@ -73,7 +73,7 @@ def generate_chapter(book_path: str, chapter_number: int, prompt: str) -> str:
     )
 
     # Update assistant with new chapter information
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return chapter_content
 
@@ -112,7 +112,7 @@ def generate_cover(book_path: str, prompt: str) -> str:
     save_to_markdown(book_path, "chapters/cover.md", "Cover", cover_content)
     console.print("[bold green]✔ Cover generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return cover_content
 
 
@@ -153,7 +153,7 @@ def generate_back_cover(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ Back cover generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return back_cover_content
 
 
@@ -192,10 +192,11 @@ def generate_epilogue(book_path: str, prompt: str) -> str:
         content=content,
         assistant=assistant,
         file_path=str(file_path),
+        context_tokens=0,
     )
 
     save_to_markdown(book_path, "chapters/epilogue.md", "Epilogue", epilogue_content)
     console.print("[bold green]✔ Epilogue generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return epilogue_content
@@ -16,23 +16,25 @@ from storycraftr.prompts.story.iterate import (
     REWRITE_SURROUNDING_CHAPTERS_FOR_SPLIT_PROMPT,
 )
 from storycraftr.agent.agents import (
-    update_agent_files,
     create_message,
     get_thread,
     create_or_get_assistant,
     process_chapters,
 )
+from storycraftr.agent.sync import mark_book_dirty, sync_coordinator
+from storycraftr.utils.manifest import book_manifest
 from storycraftr.utils.markdown import save_to_markdown
 
 console = Console()
 
 
-def iterate_check_names(book_path: str):
+def iterate_check_names(book_path: str, jobs: int = 1):
     """
     Check for name consistency across all chapters in the book.
 
     Args:
         book_path (str): The path to the book's directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
 
     Returns:
         Corrections made to ensure name consistency.
@@ -44,11 +46,14 @@ def iterate_check_names(book_path: str):
         task_description="Checking name consistency...",
         file_suffix="Name Consistency Check",
         agent_name="check-names",
+        jobs=jobs,
     )
     return corrections
 
 
-def fix_name_in_chapters(book_path: str, original_name: str, new_name: str):
+def fix_name_in_chapters(
+    book_path: str, original_name: str, new_name: str, jobs: int = 1
+):
     """
     Update character names across all chapters.
 
@@ -56,6 +61,7 @@ def fix_name_in_chapters(book_path: str, original_name: str, new_name: str):
         book_path (str): The path to the book's directory.
         original_name (str): The original name to be replaced.
         new_name (str): The new name to replace the original.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     process_chapters(
         save_to_markdown,
@@ -66,11 +72,12 @@ def fix_name_in_chapters(book_path: str, original_name: str, new_name: str):
         original_name=original_name,
         new_name=new_name,
         agent_name="fix-name",
+        jobs=jobs,
     )
 
 
 def refine_character_motivation(
-    book_path: str, character_name: str, story_context: str
+    book_path: str, character_name: str, story_context: str, jobs: int = 1
 ):
     """
     Refine the motivations of a character across all chapters.
@@ -79,6 +86,7 @@ def refine_character_motivation(
         book_path (str): The path to the book's directory.
         character_name (str): The name of the character to refine.
         story_context (str): The story context to guide the refinement.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     process_chapters(
         save_to_markdown,
@@ -89,16 +97,18 @@ def refine_character_motivation(
         character_name=character_name,
         story_context=story_context,
         agent_name="refine-motivation",
+        jobs=jobs,
     )
 
 
-def strengthen_core_argument(book_path: str, argument: str):
+def strengthen_core_argument(book_path: str, argument: str, jobs: int = 1):
     """
     Strengthen the core argument across all chapters.
 
     Args:
         book_path (str): The path to the book's directory.
         argument (str): The core argument to strengthen across the story.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     process_chapters(
         save_to_markdown,
@@ -108,16 +118,18 @@ def strengthen_core_argument(book_path: str, argument: str):
         file_suffix="Core Argument Strengthening",
         argument=argument,
         agent_name="strengthen-argument",
+        jobs=jobs,
     )
 
 
-def check_consistency_across(book_path: str, consistency_type: str):
+def check_consistency_across(book_path: str, consistency_type: str, jobs: int = 1):
     """
     Check for overall consistency across chapters.
 
     Args:
         book_path (str): The path to the book's directory.
         consistency_type (str): The type of consistency to check (e.g., plot, character).
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     process_chapters(
         save_to_markdown,
@@ -126,6 +138,7 @@ def check_consistency_across(book_path: str, consistency_type: str):
         task_description=f"Checking {consistency_type} consistency across chapters...",
         file_suffix=f"{consistency_type} Consistency Check",
         agent_name="check-consistency",
+        jobs=jobs,
         consistency_type=consistency_type,
     )
 
@@ -153,20 +166,10 @@ def insert_new_chapter(
             f"The chapter directory '{chapters_dir}' does not exist."
         )
 
-    # Función para extraer el número del capítulo
-    def extract_chapter_number(filename):
-        # Esto supone que los archivos tienen el formato "chapter-<numero>.md"
-        return int(filename.stem.split("-")[1])
-
-    # Ordenar los archivos por el número del capítulo
-    files_to_process = sorted(
-        [
-            f
-            for f in chapters_dir.iterdir()
-            if f.is_file() and f.suffix == ".md" and f.stem.startswith("chapter-")
-        ],
-        key=extract_chapter_number,
-    )
+    # Los archivos "chapter-<numero>.md", ordenados por número, del manifiesto del libro
+    files_to_process = [
+        Path(book_path) / entry["path"] for entry in book_manifest.chapters(book_path)
+    ]
 
     if len(files_to_process) < position or position < 1:
         raise ValueError(
@@ -224,8 +227,10 @@ def insert_new_chapter(
 
         progress.update(task_chapters, advance=1)
 
-        # Upload updated files to the agent's retrieval system
-        update_agent_files(book_path, assistant)
+        # Upload updated files to the agent's retrieval system now: the surrounding
+        # chapter rewrites below rely on retrieving the new chapter
+        mark_book_dirty(book_path, assistant)
+        sync_coordinator.flush(book_path)
 
         # Rewrite adjacent chapters for consistency
         if position > 1:
@@ -299,6 +304,7 @@ def rewrite_surrounding_chapter(
         progress=progress,
         task_id=task_chapters,
         file_path=str(chapter_path),
+        context_tokens=0,
     )
 
     # Save the rewritten chapter content
@@ -5,8 +5,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.story.outline import (
     GENERAL_OUTLINE_PROMPT_NEW,
@@ -74,7 +74,7 @@ def generate_general_outline(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ General outline generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return general_outline_content
 
 
@@ -128,7 +128,7 @@ def generate_character_summary(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ Character summary generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return character_summary_content
 
 
@@ -178,7 +178,7 @@ def generate_plot_points(book_path: str, prompt: str) -> str:
     )
     console.print("[bold green]✔ Main plot points generated successfully[/bold green]")
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return plot_points_content
 
 
@@ -234,5 +234,5 @@ def generate_chapter_synopsis(book_path: str, prompt: str) -> str:
         "[bold green]✔ Chapter-by-chapter synopsis generated successfully[/bold green]"
     )
 
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
     return chapter_synopsis_content
@@ -4,8 +4,8 @@ from storycraftr.agent.agents import (
     create_or_get_assistant,
     get_thread,
     create_message,
-    update_agent_files,
 )
+from storycraftr.agent.sync import mark_book_dirty
 from storycraftr.utils.core import load_book_config, file_has_more_than_three_lines
 from storycraftr.utils.markdown import save_to_markdown
 from storycraftr.prompts.story.worldbuilding import (
@@ -68,7 +68,7 @@ def generate_geography(book_path: str, prompt: str) -> str:
         book_path, "worldbuilding/geography.md", "Geography", geography_content, skip_if_exists=True
     )
     console.print("[bold green]✔ Geography generated successfully[/bold green]")
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return geography_content
 
@@ -114,7 +114,7 @@ def generate_history(book_path: str, prompt: str) -> str:
     # Save content and update agent files
     save_to_markdown(book_path, "worldbuilding/history.md", "History", history_content, skip_if_exists=True)
     console.print("[bold green]✔ History generated successfully[/bold green]")
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return history_content
 
@@ -160,7 +160,7 @@ def generate_culture(book_path: str, prompt: str) -> str:
     # Save content and update agent files
     save_to_markdown(book_path, "worldbuilding/culture.md", "Culture", culture_content, skip_if_exists=True)
     console.print("[bold green]✔ Culture generated successfully[/bold green]")
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return culture_content
 
@@ -214,7 +214,7 @@ def generate_magic_system(book_path: str, prompt: str) -> str:
     console.print(
         "[bold green]✔ Magic/Science system generated successfully[/bold green]"
     )
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return magic_system_content
 
@@ -262,6 +262,6 @@ def generate_technology(book_path: str, prompt: str) -> str:
         book_path, "worldbuilding/technology.md", "Technology", technology_content, skip_if_exists=True
     )
     console.print("[bold green]✔ Technology generated successfully[/bold green]")
-    update_agent_files(book_path, assistant)
+    mark_book_dirty(book_path, assistant)
 
     return technology_content
@@ -0,0 +1,201 @@
+import atexit
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from rich.console import Console
+
+from storycraftr.agent.scheduler import request_priority
+
+# Read .env before the singleton below picks up its settings
+load_dotenv()
+
+console = Console()
+
+SYNC_POLICIES = ("immediate", "deferred", "background")
+
+
+class SyncCoordinator:
+    """
+    Decide when a book's vector store is synced after its files change.
+
+    Policies:
+        immediate: sync as soon as a book is marked dirty (historical behaviour).
+        deferred: remember dirty books and sync each once on flush() or at process exit.
+        background: coalesce dirty marks and sync from a worker thread once a
+            book has been quiet for `quiet_period` seconds.
+
+    Dirty state is tracked per book, so a server can sync many books independently.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        quiet_period: Optional[float] = None,
+        sync_fn=None,
+    ):
+        self._cond = threading.Condition()
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._book_locks: Dict[str, threading.Lock] = {}
+        self._worker: Optional[threading.Thread] = None
+        self._sync_fn = sync_fn
+        self._policy = "immediate"
+        self.quiet_period = float(
+            quiet_period
+            if quiet_period is not None
+            else os.getenv("STORYCRAFTR_SYNC_QUIET_SECONDS", "15")
+        )
+        try:
+            self.set_policy(policy or os.getenv("STORYCRAFTR_SYNC_POLICY", "immediate"))
+        except ValueError as e:
+            console.print(
+                f"[bold yellow]{str(e)} Falling back to 'immediate'.[/bold yellow]"
+            )
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    def set_policy(self, policy: str) -> None:
+        """
+        Switch the sync policy. Books already marked dirty stay pending.
+
+        Raises:
+            ValueError: If the policy is not one of SYNC_POLICIES.
+        """
+        policy = (policy or "immediate").strip().lower()
+        if policy not in SYNC_POLICIES:
+            raise ValueError(
+                f"Unknown sync policy '{policy}'. Use one of: {', '.join(SYNC_POLICIES)}."
+            )
+        with self._cond:
+            self._policy = policy
+            if policy == "background":
+                self._ensure_worker()
+            self._cond.notify_all()
+
+    def mark_dirty(self, book_path: str, assistant):
+        """
+        Record that the book's files changed and sync according to the policy.
+
+        Args:
+            book_path (str): Path to the book directory.
+            assistant (object): The assistant whose vector store should be synced.
+
+        Returns:
+            The sync result when the policy is immediate, otherwise None.
+        """
+        if self._policy == "immediate":
+            return self._sync(str(book_path), assistant, raise_errors=True)
+        with self._cond:
+            self._dirty[str(book_path)] = {
+                "assistant": assistant,
+                "marked_at": time.monotonic(),
+            }
+            if self._policy == "background":
+                self._ensure_worker()
+            self._cond.notify_all()
+        return None
+
+    def pending(self) -> list:
+        """Return the book paths that are dirty and waiting for a sync."""
+        with self._cond:
+            return sorted(self._dirty)
+
+    def flush(self, book_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Sync dirty books now.
+
+        Args:
+            book_path (str, optional): Only flush this book. Defaults to all dirty books.
+
+        Returns:
+            dict: Sync results keyed by book path.
+        """
+        with self._cond:
+            if book_path is None:
+                due = self._dirty
+                self._dirty = {}
+            else:
+                entry = self._dirty.pop(str(book_path), None)
+                due = {str(book_path): entry} if entry else {}
+        return {
+            path: self._sync(path, entry["assistant"], raise_errors=False)
+            for path, entry in due.items()
+        }
+
+    def _sync(self, book_path: str, assistant, raise_errors: bool):
+        with self._cond:
+            lock = self._book_locks.setdefault(book_path, threading.Lock())
+        sync_fn = self._sync_fn
+        if sync_fn is None:
+            from storycraftr.agent.agents import update_agent_files
+
+            sync_fn = update_agent_files
+        # Syncs are background work; interactive requests go first when rate limited
+        with lock, request_priority("batch"):
+            try:
+                return sync_fn(book_path, assistant)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                console.print(
+                    f"[bold red]Deferred sync failed for {book_path}: {str(e)}[/bold red]"
+                )
+                return None
+
+    def _ensure_worker(self) -> None:
+        # Caller holds self._cond
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run_worker, name="storycraftr-sync", daemon=True
+            )
+            self._worker.start()
+
+    def _next_due(self) -> tuple:
+        # Caller holds self._cond. Returns (due book paths, seconds until the next one).
+        now = time.monotonic()
+        due, wait = [], None
+        for path, entry in self._dirty.items():
+            remaining = self.quiet_period - (now - entry["marked_at"])
+            if remaining <= 0:
+                due.append(path)
+            elif wait is None or remaining < wait:
+                wait = remaining
+        return due, wait
+
+    def _run_worker(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._policy != "background":
+                        self._cond.wait()
+                        continue
+                    due, wait = self._next_due()
+                    if due:
+                        batch = {path: self._dirty.pop(path) for path in due}
+                        break
+                    self._cond.wait(wait)
+            for path, entry in batch.items():
+                self._sync(path, entry["assistant"], raise_errors=False)
+
+
+# Singleton shared by every generator in the process
+sync_coordinator = SyncCoordinator()
+atexit.register(sync_coordinator.flush)
+
+
+def mark_book_dirty(book_path: str, assistant):
+    """
+    Tell the process-wide coordinator that the book's files changed.
+
+    Args:
+        book_path (str): Path to the book directory.
+        assistant (object): The assistant whose vector store should be synced.
+
+    Returns:
+        The sync result when the policy is immediate, otherwise None.
+    """
+    return sync_coordinator.mark_dirty(book_path, assistant)
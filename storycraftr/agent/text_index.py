@@ -0,0 +1,207 @@
+import bisect
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from storycraftr.utils.manifest import book_manifest
+
+# Folders the index covers, relative to the book root
+INDEXED_DIRS = ("chapters", "outline", "worldbuilding")
+SNIPPET_CHARS = 160
+
+
+class _IndexedFile:
+    """Text of one book file plus the offsets needed to map matches to lines."""
+
+    __slots__ = ("mtime_ns", "size", "text", "lower", "line_starts")
+
+    def __init__(self, text: str, mtime_ns: int, size: int):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.text = text
+        # Lets literal queries skip non-matching files with a plain substring test
+        self.lower = text.lower()
+        self.line_starts = [0]
+        self.line_starts.extend(m.end() for m in re.finditer("\n", text))
+
+    def line_at(self, offset: int) -> int:
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def line_text(self, number: int) -> str:
+        start = self.line_starts[number - 1]
+        end = (
+            self.line_starts[number] - 1
+            if number < len(self.line_starts)
+            else len(self.text)
+        )
+        return self.text[start:end].rstrip("\r")
+
+
+def _snippet(line: str, start: int, end: int) -> str:
+    """Clip a line to SNIPPET_CHARS around the match at [start, end)."""
+    if len(line) <= SNIPPET_CHARS:
+        return line.strip()
+    pad = max(0, (SNIPPET_CHARS - (end - start)) // 2)
+    left = max(0, start - pad)
+    right = min(len(line), left + SNIPPET_CHARS)
+    left = max(0, right - SNIPPET_CHARS)
+    clipped = line[left:right].strip()
+    return ("…" if left else "") + clipped + ("…" if right < len(line) else "")
+
+
+class BookTextIndex:
+    """
+    In-memory text index of the markdown files in `chapters/`, `outline/` and
+    `worldbuilding/`, kept per book.
+
+    Files are listed by the book manifest, loaded on first search and re-read
+    only when their size or modification time changes, so repeat searches
+    cost one manifest refresh. Edits made through the surgical tools call
+    `update` to refresh the entry directly.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, Dict[str, _IndexedFile]] = {}
+        self._lock = threading.Lock()
+
+    def _files(self, book_path: str) -> Dict[str, _IndexedFile]:
+        root = str(Path(book_path).resolve())
+        return self._books.setdefault(root, {})
+
+    def refresh(self, book_path: str) -> Dict[str, _IndexedFile]:
+        """
+        Bring the index for a book up to date with the files on disk.
+
+        Args:
+            book_path (str): Path to the book directory.
+
+        Returns:
+            dict: Indexed files keyed by path relative to the book.
+        """
+        base = Path(book_path).resolve()
+        seen = set()
+        # The book manifest lists the files and their stat data
+        entries = book_manifest.files(book_path, suffix=".md")
+        with self._lock:
+            files = self._files(book_path)
+            for stat in entries:
+                if stat["kind"] not in INDEXED_DIRS:
+                    continue
+                rel = stat["path"]
+                seen.add(rel)
+                entry = files.get(rel)
+                if (
+                    entry is not None
+                    and entry.mtime_ns == stat["mtime_ns"]
+                    and entry.size == stat["size"]
+                ):
+                    continue
+                try:
+                    text = (base / rel).read_text(encoding="utf-8")
+                except (OSError, UnicodeDecodeError):
+                    files.pop(rel, None)
+                    continue
+                files[rel] = _IndexedFile(text, stat["mtime_ns"], stat["size"])
+            for rel in set(files) - seen:
+                del files[rel]
+            return dict(files)
+
+    def update(self, book_path: str, file_path: str, text: str) -> None:
+        """Record new contents for a file just written by the edit tools."""
+        base = Path(book_path).resolve()
+        try:
+            rel = Path(file_path).resolve().relative_to(base).as_posix()
+            st = os.stat(file_path)
+        except (OSError, ValueError):
+            return
+        if rel.split("/")[0] not in INDEXED_DIRS or not rel.endswith(".md"):
+            return
+        with self._lock:
+            self._files(book_path)[rel] = _IndexedFile(text, st.st_mtime_ns, st.st_size)
+
+    def search(
+        self,
+        book_path: str,
+        query: str,
+        *,
+        use_regex: bool = False,
+        case_sensitive: bool = False,
+        path_prefix: Optional[str] = None,
+        max_results: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Find the lines of book files that match a phrase or regular expression.
+
+        Args:
+            book_path (str): Path to the book directory.
+            query (str): Phrase (matched literally) or regex pattern.
+            use_regex (bool): Treat `query` as a regular expression.
+            case_sensitive (bool): Match case exactly.
+            path_prefix (str, optional): Only search files under this path.
+            max_results (int): Maximum number of matching lines to return.
+
+        Returns:
+            dict: Matches as `{path, line, snippet}` in file and line order,
+            plus `files_searched` and `truncated`, or an `error` message.
+        """
+        if not query:
+            return {"query": query, "error": "Empty query", "matches": []}
+        flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+        try:
+            pattern = re.compile(query if use_regex else re.escape(query), flags)
+        except re.error as e:
+            return {"query": query, "error": f"Invalid regex: {e}", "matches": []}
+
+        literal = None
+        if not use_regex:
+            literal = query if case_sensitive else query.lower()
+        prefix = (path_prefix or "").strip("/")
+        files = self.refresh(book_path)
+        matches: List[Dict[str, Any]] = []
+        truncated = False
+        searched = 0
+        for rel in sorted(files):
+            if prefix and not (rel == prefix or rel.startswith(prefix + "/")):
+                continue
+            searched += 1
+            entry = files[rel]
+            if literal is not None and literal not in (
+                entry.text if case_sensitive else entry.lower
+            ):
+                continue
+            last_line = 0
+            for match in pattern.finditer(entry.text):
+                number = entry.line_at(match.start())
+                if number == last_line:
+                    continue
+                if len(matches) >= max_results:
+                    truncated = True
+                    break
+                last_line = number
+                line = entry.line_text(number)
+                column = match.start() - entry.line_starts[number - 1]
+                end = min(len(line), column + (match.end() - match.start()))
+                matches.append(
+                    {
+                        "path": rel,
+                        "line": number,
+                        "snippet": _snippet(line, column, end),
+                    }
+                )
+            if truncated:
+                break
+        return {
+            "query": query,
+            "matches": matches,
+            "files_searched": searched,
+            "truncated": truncated,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._books.clear()
+
+
+text_index = BookTextIndex()
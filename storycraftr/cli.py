@@ -44,7 +44,13 @@ load_openai_api_key()
 from storycraftr.state import debug_state
 from storycraftr.cmd.story.publish import publish
 from storycraftr.cmd.chat import chat
-from storycraftr.agent.agents import create_or_get_assistant, update_agent_files
+from storycraftr.agent.agents import (
+    create_or_get_assistant,
+    update_agent_files,
+    refresh_vector_store_cache,
+)
+from storycraftr.agent.sync import sync_coordinator
+from storycraftr.agent.response_cache import response_cache
 from storycraftr.utils.core import load_book_config
 from storycraftr.utils.core import clear_conversation_id
 
@@ -133,13 +139,36 @@ def project_not_initialized_error(book_path):
 
 @click.group()
 @click.option("--debug", is_flag=True, help="Enable debug mode.")
-def cli(debug):
+@click.option(
+    "--refresh-store-cache",
+    is_flag=True,
+    help="Ignore cached vector store ids and look them up again.",
+)
+@click.option(
+    "--sync-policy",
+    type=click.Choice(["immediate", "deferred", "background"]),
+    default=None,
+    help="When to sync book files to the vector store after changes "
+    "(defaults to STORYCRAFTR_SYNC_POLICY or 'immediate').",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write cached responses (STORYCRAFTR_RESPONSE_CACHE).",
+)
+def cli(debug, refresh_store_cache, sync_policy, no_cache):
     """
     StoryCraftr CLI - A tool to assist in writing books using AI tools.
     """
     debug_state.set_debug(debug)
     if debug:
         console.print("[yellow]Debug mode is ON[/yellow]")
+    if refresh_store_cache:
+        refresh_vector_store_cache()
+    if sync_policy:
+        sync_coordinator.set_policy(sync_policy)
+    if no_cache:
+        response_cache.set_enabled(False)
 
 
 @click.command()
@@ -2,13 +2,15 @@ import os
 import click
 import shlex
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from storycraftr.utils.core import load_book_config
 from storycraftr.agent.agents import (
     get_thread,
     create_or_get_assistant,
-    create_message,
+    stream_message,
 )
+from storycraftr.agent.sync import sync_coordinator
 import storycraftr.cmd.story as story_cmd
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import InMemoryHistory
@@ -74,17 +76,22 @@ def chat(book_path=None):
             )
 
             try:
-                # Generate the response
-                response = create_message(
-                    book_path,
-                    thread_id=thread.id,
-                    content=user_input,
-                    assistant=assistant,
-                )
-
-                # Render Markdown response
-                markdown_response = Markdown(response)
-                console.print(markdown_response)
+                # Stream the response, re-rendering the Markdown as deltas arrive
+                response = ""
+                with Live(
+                    Markdown(""),
+                    console=console,
+                    refresh_per_second=8,
+                    vertical_overflow="visible",
+                ) as live:
+                    for delta in stream_message(
+                        book_path,
+                        thread_id=thread.id,
+                        content=user_input,
+                        assistant=assistant,
+                    ):
+                        response += delta
+                        live.update(Markdown(response))
 
             except Exception as e:
                 console.print(f"[bold red]Error: {str(e)}[/bold red]")
@@ -95,6 +102,9 @@ def chat(book_path=None):
         except Exception as e:
             console.print(f"[bold red]Error: {str(e)}[/bold red]")
 
+    # Sync once for everything the session's commands changed (deferred policy)
+    sync_coordinator.flush()
+
 
 def execute_cli_command(user_input):
     """
@@ -24,17 +24,25 @@ def iterate():
 
 
 @iterate.command()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of chapters to process concurrently.",
+)
 @click.option(
     "--book-path", type=click.Path(), help="Path to the book directory", required=False
 )
 @click.argument("prompt", default="Check character names for consistency.")
-def check_names(prompt: str, book_path: str = None):
+def check_names(prompt: str, book_path: str = None, jobs: int = 1):
     """
     Check the consistency of character names across all chapters of the book.
 
     Args:
         prompt (str): The prompt to guide the checking of names.
         book_path (str, optional): The path to the book's directory. Defaults to the current working directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     book_path = book_path or os.getcwd()
 
@@ -42,19 +50,26 @@ def check_names(prompt: str, book_path: str = None):
         return
 
     console.print(f"[bold blue]Checking name consistency in: {book_path}[/bold blue]")
-    iterate_check_names(book_path)
+    iterate_check_names(book_path, jobs=jobs)
     console.print(
         f"[green bold]Name consistency check completed successfully![/green bold]"
     )
 
 
 @iterate.command()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of chapters to process concurrently.",
+)
 @click.option(
     "--book-path", type=click.Path(), help="Path to the book directory", required=False
 )
 @click.argument("original_name")
 @click.argument("new_name")
-def fix_name(original_name: str, new_name: str, book_path: str = None):
+def fix_name(original_name: str, new_name: str, book_path: str = None, jobs: int = 1):
     """
     Change a character's name across all chapters of the book.
 
@@ -62,6 +77,7 @@ def fix_name(original_name: str, new_name: str, book_path: str = None):
         original_name (str): The character's original name.
         new_name (str): The new name to replace the original one.
         book_path (str, optional): The path to the book's directory. Defaults to the current working directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     book_path = book_path or os.getcwd()
 
@@ -71,17 +87,26 @@ def fix_name(original_name: str, new_name: str, book_path: str = None):
     console.print(
         f"[bold blue]Changing name from '{original_name}' to '{new_name}' in: {book_path}[/bold blue]"
     )
-    fix_name_in_chapters(book_path, original_name, new_name)
+    fix_name_in_chapters(book_path, original_name, new_name, jobs=jobs)
     console.print(f"[green bold]Name change completed successfully![/green bold]")
 
 
 @iterate.command()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of chapters to process concurrently.",
+)
 @click.option(
     "--book-path", type=click.Path(), help="Path to the book directory", required=False
 )
 @click.argument("character_name")
 @click.argument("story_context")
-def refine_motivation(character_name: str, story_context: str, book_path: str = None):
+def refine_motivation(
+    character_name: str, story_context: str, book_path: str = None, jobs: int = 1
+):
     """
     Refine a character's motivation across all chapters of the book.
 
@@ -89,6 +114,7 @@ def refine_motivation(character_name: str, story_context: str, book_path: str =
         character_name (str): The character's name.
         story_context (str): The story context to refine the motivation within.
         book_path (str, optional): The path to the book's directory. Defaults to the current working directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     book_path = book_path or os.getcwd()
 
@@ -98,24 +124,32 @@ def refine_motivation(character_name: str, story_context: str, book_path: str =
     console.print(
         f"[bold blue]Refining motivation for '{character_name}' in: {book_path}[/bold blue]"
     )
-    refine_character_motivation(book_path, character_name, story_context)
+    refine_character_motivation(book_path, character_name, story_context, jobs=jobs)
     console.print(
         f"[green bold]Motivation refinement completed successfully![/green bold]"
     )
 
 
 @iterate.command()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of chapters to process concurrently.",
+)
 @click.option(
     "--book-path", type=click.Path(), help="Path to the book directory", required=False
 )
 @click.argument("argument")
-def strengthen_argument(argument: str, book_path: str = None):
+def strengthen_argument(argument: str, book_path: str = None, jobs: int = 1):
     """
     Strengthen the core argument of the story across all chapters.
 
     Args:
         argument (str): The core argument of the story to strengthen.
         book_path (str, optional): The path to the book's directory. Defaults to the current working directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     book_path = book_path or os.getcwd()
 
@@ -125,7 +159,7 @@ def strengthen_argument(argument: str, book_path: str = None):
     console.print(
         f"[bold blue]Strengthening the core argument: '{argument}' in: {book_path}[/bold blue]"
     )
-    strengthen_core_argument(book_path, argument)
+    strengthen_core_argument(book_path, argument, jobs=jobs)
     console.print(f"[green bold]Core argument strengthened successfully![/green bold]")
 
 
@@ -216,17 +250,25 @@ def split_chapter(position: int, prompt: str, book_path: str = None):
 
 
 @iterate.command()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of chapters to process concurrently.",
+)
 @click.option(
     "--book-path", type=click.Path(), help="Path to the book directory", required=False
 )
 @click.argument("prompt", type=str)
-def check_consistency(prompt: str, book_path: str = None):
+def check_consistency(prompt: str, book_path: str = None, jobs: int = 1):
     """
     Check the overall consistency of chapters in the book.
 
     Args:
         prompt (str): The custom prompt for consistency check.
         book_path (str, optional): The path to the book's directory. Defaults to the current working directory.
+        jobs (int, optional): Number of chapters to process concurrently. Defaults to 1.
     """
     book_path = book_path or os.getcwd()
 
@@ -236,7 +278,7 @@ def check_consistency(prompt: str, book_path: str = None):
     console.print(
         f"[bold blue]Checking overall consistency in: {book_path}[/bold blue]"
     )
-    check_consistency_across(book_path, prompt)
+    check_consistency_across(book_path, prompt, jobs=jobs)
     console.print(f"[green bold]Consistency check completed successfully![/green bold]")
 
 
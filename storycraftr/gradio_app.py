@@ -21,6 +21,9 @@ from storycraftr.agent.agents import (
 )
 from storycraftr.agent.agents import get_last_edited_file_for_book
 from storycraftr.utils.pdf import to_pdf
+from storycraftr.utils.journal import atomic_write_text
+from storycraftr.utils.locks import path_lock
+from storycraftr.utils.manifest import book_manifest
 
 # Story agent functions
 from storycraftr.agent.story.outline import (
@@ -155,10 +158,13 @@ def read_text_file(file_path: Path) -> str:
         return f"Error reading file: {e}"
 
 
-def write_text_file(file_path: Path, content: str) -> str:
+def write_text_file(file_path: Path, content: str, book_dir: Path = None) -> str:
     try:
         ensure_dir(file_path.parent)
-        file_path.write_text(content or "", encoding="utf-8")
+        # Same per-file lock as the assistant's edit tools, so a save from the
+        # editor cannot interleave with an edit in progress
+        with path_lock(str(book_dir or file_path.parent), str(file_path)):
+            atomic_write_text(file_path, content or "")
         return "Saved."
     except Exception as e:
         return f"Error saving file: {e}"
@@ -185,15 +191,8 @@ def get_book_files(root: Path) -> List[str]:
     rels: List[str] = []
     if not root.exists():
         return rels
-    for path in root.rglob("*"):
-        if path.is_file() and (
-            path.suffix.lower() in {".md", ".txt", ".json", ".tex"}
-            or path.name in {"storycraftr.json", "papercraftr.json"}
-        ):
-            try:
-                rels.append(str(path.relative_to(root)))
-            except Exception:
-                pass
+    # The book manifest tracks .md, .txt, .json and .tex files (config included)
+    rels = [str(Path(entry["path"])) for entry in book_manifest.files(str(root))]
 
     # Suggest common files even if they don't exist yet, so users can create/edit them directly
     suggested = [
@@ -224,11 +223,10 @@ def list_chapter_files(root: Path) -> List[str]:
     chapters_dir = root / "chapters"
     if not chapters_dir.exists():
         return rels
-    for path in chapters_dir.rglob("*.md"):
-        try:
-            rels.append(str(path.relative_to(root)))
-        except Exception:
-            pass
+    rels = [
+        str(Path(entry["path"]))
+        for entry in book_manifest.files(str(root), kind="chapters", suffix=".md")
+    ]
     rels.sort()
     return rels
 
@@ -404,7 +402,7 @@ def action_new_project(project_name: str, behavior_text: str, primary_language:
     behavior_path = project / "behaviors" / "default.txt"
 
     # Stage behavior file
-    msg = write_text_file(behavior_path, behavior_text or "")
+    msg = write_text_file(behavior_path, behavior_text or "", book_dir=project)
     if msg.startswith("Error"):
         return msg, ""
 
@@ -630,13 +628,17 @@ def action_load_file(current_book: str, rel_path: str) -> str:
 def action_save_file(current_book: str, rel_path: str, content: str) -> str:
     if not current_book or not rel_path:
         return "No file selected."
-    return write_text_file(Path(current_book) / rel_path, content)
+    return write_text_file(
+        Path(current_book) / rel_path, content, book_dir=Path(current_book)
+    )
 
 
 def action_create_file(current_book: str, rel_path: str) -> Tuple[str, List[str]]:
     if not current_book or not rel_path:
         return "Provide a relative path.", []
-    msg = write_text_file(Path(current_book) / rel_path, "")
+    msg = write_text_file(
+        Path(current_book) / rel_path, "", book_dir=Path(current_book)
+    )
     files = get_book_files(Path(current_book))
     return msg, files
 
@@ -5,7 +5,7 @@ from typing import Any, Dict, List
 # Kept as a template so callers can inject the target relative path.
 TOOL_USAGE_GUIDANCE_TEMPLATE: str = (
     "You can modify existing files using tools. When editing an existing file, prefer making surgical edits via fs_read_text and fs_apply_text_edits instead of outputting the entire file.\n"
-    "Target file (relative to book): {rel_path}. Steps: 1) fs_read_text to get current text (only if it hasnt been provided already), 2) decide minimal changes, 3) fs_apply_text_edits with precise edits (replace_text, replace_between, insert_before/insert_after)."
+    "Target file (relative to book): {rel_path}. Steps: 1) fs_read_text to get current text (only if it hasnt been provided already; for long files use fs_outline and read just the section or line range you need; use fs_search to find where a name or phrase appears across the book), 2) decide minimal changes, 3) fs_apply_text_edits with precise edits (replace_text, replace_between, insert_before/insert_after), passing the sha256 from fs_read_text as if_match. If it reports a conflict, read the file again and redo the edits."
 )
 
 
@@ -14,13 +14,103 @@ def tool_usage_guidance_for_file(rel_path: str) -> str:
     return TOOL_USAGE_GUIDANCE_TEMPLATE.format(rel_path=rel_path)
 
 
+def book_search_tool_schema() -> Dict[str, Any]:
+    """Return the schema of the local retrieval tool used when retrieval is local or hybrid."""
+    return {
+        "type": "function",
+        "name": "book_search",
+        "description": "Search the book's chapters, outline and worldbuilding notes by relevance and return the best-matching passages with their file and line range. Use it to look up canon (names, places, events, rules) before writing.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Keywords or a short question; word order and case do not matter.",
+                },
+                "max_results": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 20,
+                    "default": 5,
+                },
+                "path_prefix": {
+                    "type": "string",
+                    "description": "Only search under this relative path (e.g., worldbuilding/).",
+                },
+            },
+            "required": ["query"],
+        },
+    }
+
+
 def surgical_tools_schema() -> List[Dict[str, Any]]:
     """Return the schema definitions for the file-editing tools exposed to the model."""
     return [
         {
             "type": "function",
             "name": "fs_read_text",
-            "description": "Read a UTF-8 text file within the current book. Use before editing to get exact anchors.",
+            "description": "Read a UTF-8 text file within the current book. Use before editing to get exact anchors and the file's sha256. Read only what you need: a section by heading, a line range, or a byte range; omit them to read the whole file.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Relative path within the book (e.g., chapters/chapter-1.md).",
+                    },
+                    "section": {
+                        "type": "string",
+                        "description": "Heading title; returns that heading and its content up to the next heading of the same or higher level.",
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "First line to read (1-based).",
+                    },
+                    "end_line": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Last line to read (inclusive).",
+                    },
+                    "start_byte": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "First UTF-8 byte to read.",
+                    },
+                    "end_byte": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Byte offset to stop before.",
+                    },
+                },
+                "required": ["path"],
+            },
+        },
+        {
+            "type": "function",
+            "name": "fs_search",
+            "description": "Search the markdown files in chapters/, outline/ and worldbuilding/ for a phrase or regular expression. Returns file, line number and a short snippet per matching line. Much cheaper than reading files to find where something is mentioned.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Phrase to find, or a regex when use_regex is true.",
+                    },
+                    "use_regex": {"type": "boolean", "default": False},
+                    "case_sensitive": {"type": "boolean", "default": False},
+                    "path_prefix": {
+                        "type": "string",
+                        "description": "Only search under this relative path (e.g., chapters/).",
+                    },
+                    "max_results": {"type": "integer", "minimum": 1, "default": 50},
+                },
+                "required": ["query"],
+            },
+        },
+        {
+            "type": "function",
+            "name": "fs_outline",
+            "description": "List the markdown headings of a file with their levels, line ranges and byte offsets, without the text. Use it to pick a section to read.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -35,12 +125,16 @@ def surgical_tools_schema() -> List[Dict[str, Any]]:
         {
             "type": "function",
             "name": "fs_apply_text_edits",
-            "description": "Apply surgical text edits to a file (replace text, replace between markers, insert before/after). Create file if missing.",
+            "description": "Apply surgical text edits to a file (replace text, replace between markers, insert before/after). Create file if missing. Pass the sha256 from fs_read_text as if_match so edits made by someone else in the meantime are not lost.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "path": {"type": "string", "description": "Target file path relative to book."},
                     "create_if_missing": {"type": "boolean", "default": True},
+                    "if_match": {
+                        "type": "string",
+                        "description": "sha256 returned by fs_read_text. If the file changed since, the edits are replayed only when all anchors still match; otherwise a conflict is returned.",
+                    },
                     "edits": {
                         "type": "array",
                         "items": {
@@ -0,0 +1,216 @@
+import hashlib
+import re
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+from storycraftr.utils.outline import FENCE_RE, HEADING_RE
+
+# Token budget per chunk; tokens are approximated as words and punctuation marks
+CHUNK_TOKENS = 400
+# Once a chunk holds half its budget, it ends after any paragraph whose content
+# hash is divisible by this. Boundaries then depend on nearby text only, so an
+# edit shifts at most the chunks up to the next such paragraph.
+CUT_EVERY = 3
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Scene breaks: three or more of `*`, `-`, `_`, `#`, `~` or `=` (optionally
+# spaced, as in `* * *`), a run of `§`, or `⁂`
+_SCENE_BREAK_RE = re.compile(r"^(?:([*\-_#~=])(?:[ \t]*\1){2,}|§+|⁂)$")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of a text: words plus punctuation marks."""
+    return len(_TOKEN_RE.findall(text))
+
+
+class _Unit:
+    """A heading, a scene break, or a paragraph, with its trailing blank lines."""
+
+    __slots__ = (
+        "kind",
+        "lines",
+        "start_line",
+        "byte_offset",
+        "size",
+        "heading",
+        "tokens",
+    )
+
+    def __init__(
+        self, kind: str, start_line: int, byte_offset: int, heading: Tuple[str, ...]
+    ):
+        self.kind = kind
+        self.lines: List[str] = []
+        self.start_line = start_line
+        self.byte_offset = byte_offset
+        self.size = 0
+        self.heading = heading
+        self.tokens = 0
+
+    def add(self, line: str) -> None:
+        self.lines.append(line)
+        self.size += len(line.encode("utf-8"))
+        self.tokens += count_tokens(line)
+
+
+def _iter_units(lines: Iterable[str]) -> Iterator[_Unit]:
+    headings: List[Tuple[int, str]] = []
+    unit = None
+    in_fence = False
+    saw_blank = False
+    offset = 0
+    for number, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        fence = FENCE_RE.match(line)
+        path = tuple(title for _, title in headings)
+        start_new = None
+        if in_fence:
+            pass
+        elif fence:
+            if unit is None or saw_blank or unit.kind != "paragraph":
+                start_new = "paragraph"
+        elif (
+            stripped and _SCENE_BREAK_RE.match(stripped) and (unit is None or saw_blank)
+        ):
+            start_new = "break"
+        else:
+            heading = HEADING_RE.match(line.rstrip("\r\n"))
+            if heading:
+                level = len(heading.group(1))
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, heading.group(2).strip()))
+                path = tuple(title for _, title in headings)
+                start_new = "heading"
+            elif stripped and (unit is None or saw_blank or unit.kind != "paragraph"):
+                start_new = "paragraph"
+        if start_new or unit is None:
+            if unit is not None:
+                yield unit
+            unit = _Unit(start_new or "paragraph", number, offset, path)
+            saw_blank = False
+        unit.add(line)
+        if fence:
+            in_fence = not in_fence
+        elif not in_fence and not stripped:
+            saw_blank = True
+        offset += len(line.encode("utf-8"))
+    if unit is not None:
+        yield unit
+
+
+def _split_lines(unit: _Unit, max_tokens: int) -> Iterator[_Unit]:
+    """Split an oversized unit at line boundaries into pieces within the budget."""
+    piece = None
+    number, offset = unit.start_line, unit.byte_offset
+    for line in unit.lines:
+        tokens = count_tokens(line)
+        if piece is not None and piece.tokens and piece.tokens + tokens > max_tokens:
+            yield piece
+            piece = None
+        if piece is None:
+            piece = _Unit(unit.kind, number, offset, unit.heading)
+        piece.add(line)
+        number += 1
+        offset += len(line.encode("utf-8"))
+    if piece is not None:
+        yield piece
+
+
+def iter_chunks(
+    source: Union[str, Iterable[str]],
+    path: str = "",
+    max_tokens: int = CHUNK_TOKENS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split a markdown document into retrieval chunks, streaming.
+
+    Every heading starts a new chunk and every scene break (`***`, `* * *`,
+    `---`, `§` ...) ends one. Between those, whole paragraphs are packed up to
+    `max_tokens`; a chunk that reaches half its budget may also end after a
+    paragraph chosen by its content hash, so boundaries re-synchronise right
+    after an edit. A paragraph over the budget is split at line boundaries.
+    Headings inside fenced code blocks are ignored, as in `markdown_outline`.
+
+    Chunk ids hash the file path, the heading path, the chunk text and how
+    many earlier chunks in that section had the same text, but not its
+    offset, so editing one paragraph only changes the ids of the chunks it
+    touches.
+
+    Args:
+        source: The document text, or an iterable of lines with their line
+            endings (such as an open file), which is read lazily.
+        path (str): Path of the document, mixed into the chunk ids.
+        max_tokens (int): Token budget per chunk.
+
+    Yields:
+        dict: id, path, index, heading (titles from the top level down),
+        start_line and end_line (1-based, inclusive), byte_offset and end_byte
+        (UTF-8, end exclusive), tokens, text and sha256 (of the text). The
+        line and byte ranges of consecutive chunks tile the document.
+    """
+    lines = source.splitlines(keepends=True) if isinstance(source, str) else source
+    seen: Dict[Tuple, int] = {}
+    index = 0
+    chunk: List[_Unit] = []
+    tokens = 0
+
+    def _record(units: List[_Unit]) -> Dict[str, Any]:
+        nonlocal index
+        text = "".join(line for unit in units for line in unit.lines).rstrip()
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        heading = units[-1].heading
+        occurrence = seen.get((heading, digest), 0)
+        seen[(heading, digest)] = occurrence + 1
+        chunk_id = hashlib.sha256(
+            "\0".join([path, "\x1f".join(heading), digest, str(occurrence)]).encode(
+                "utf-8"
+            )
+        ).hexdigest()[:16]
+        last = units[-1]
+        record = {
+            "id": chunk_id,
+            "path": path,
+            "index": index,
+            "heading": list(heading),
+            "start_line": units[0].start_line,
+            "end_line": last.start_line + len(last.lines) - 1,
+            "byte_offset": units[0].byte_offset,
+            "end_byte": last.byte_offset + last.size,
+            "tokens": sum(unit.tokens for unit in units),
+            "text": text,
+            "sha256": digest,
+        }
+        index += 1
+        return record
+
+    for unit in _iter_units(lines):
+        # Consecutive headings (a chapter title straight above a scene title)
+        # stay together with the text that follows them
+        starts_section = unit.kind == "heading" and any(
+            u.kind != "heading" for u in chunk
+        )
+        if chunk and (starts_section or tokens + unit.tokens > max_tokens):
+            yield _record(chunk)
+            chunk, tokens = [], 0
+        pieces = (
+            [unit]
+            if unit.tokens <= max_tokens
+            else list(_split_lines(unit, max_tokens))
+        )
+        for piece in pieces[:-1]:
+            yield _record([piece])
+        piece = pieces[-1]
+        chunk.append(piece)
+        tokens += piece.tokens
+        cut = unit.kind == "break" or (
+            tokens >= max_tokens // 2
+            and unit.kind == "paragraph"
+            and zlib.crc32("".join(piece.lines).rstrip().encode("utf-8")) % CUT_EVERY
+            == 0
+        )
+        if cut:
+            yield _record(chunk)
+            chunk, tokens = [], 0
+    if chunk:
+        yield _record(chunk)
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from rich.console import Console
 from storycraftr.agent.agents import initialize_openai_client
+from storycraftr.utils.core import clear_vector_store_id
 
 console = Console()
 
@@ -60,6 +61,9 @@ def cleanup_vector_stores(book_path: str):
             )
             continue
 
+    # Cached ids now point at deleted stores
+    clear_vector_store_id(book_path)
+
     console.print(
         "[bold green]All vector stores and files have been deleted.[/bold green]"
     )
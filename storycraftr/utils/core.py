@@ -1,56 +1,82 @@
 import os
 import secrets  # Para generar números aleatorios seguros
-import yaml
 import json
-from typing import NamedTuple
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
 from rich.console import Console
 from rich.markdown import Markdown  # Importar soporte de Markdown de Rich
 from storycraftr.prompts.permute import longer_date_formats
 from storycraftr.state import debug_state  # Importar el estado de debug
+from storycraftr.utils.manifest import book_manifest
+from storycraftr.utils.prompt_log import log_prompt
 from pathlib import Path
-from types import SimpleNamespace
+import threading
 
 console = Console()
 
+# Where generate_prompt_with_hash puts its random date phrase. "end" keeps the
+# prompt prefix stable for provider-side prompt caching; "start" is the old layout.
+NONCE_POSITIONS = ("end", "start", "off")
 
-def generate_prompt_with_hash(original_prompt: str, date: str, book_path: str) -> str:
+
+def assemble_prompt(
+    format_output: str,
+    request: str,
+    tool_guidance: str = "",
+    book_context: str = "",
+) -> str:
+    """
+    Join the prompt sections from most stable to most volatile, so consecutive
+    requests share the longest possible prefix. The behavior instructions are
+    sent separately (as the request instructions) and come before all of these.
+
+    Args:
+        format_output (str): The formatted FORMAT_OUTPUT rules.
+        request (str): The per-call request.
+        tool_guidance (str, optional): Tool usage guidance for the file being edited.
+        book_context (str, optional): Book content inlined for context.
+
+    Returns:
+        str: The assembled prompt.
+    """
+    sections = [format_output, tool_guidance, book_context, request]
+    return "\n\n".join(section for section in sections if section)
+
+
+def generate_prompt_with_hash(
+    original_prompt: str, date: str, book_path: str, position: str | None = None
+) -> str:
     """
     Generates a modified prompt by combining a random phrase from a list,
-    a date, and the original prompt. Logs the prompt details in a YAML file.
+    a date, and the original prompt. Logs the prompt details in the book's
+    append-only prompt log (`.storycraftr/prompts/prompts.jsonl`).
 
     Args:
         original_prompt (str): The original prompt to be modified.
         date (str): The current date to be used in the prompt.
-        book_path (str): Path to the book's directory where prompts.yaml will be saved.
+        book_path (str): Path to the book's directory where the prompt is logged.
+        position (str, optional): "end", "start" or "off"; defaults to
+            STORYCRAFTR_PROMPT_NONCE or "end".
 
     Returns:
         str: The modified prompt with the date and random phrase.
     """
+    position = (
+        (position or os.getenv("STORYCRAFTR_PROMPT_NONCE", "end")).strip().lower()
+    )
+    if position not in NONCE_POSITIONS:
+        position = "end"
     # Selecciona una frase aleatoria segura de la lista
     random_phrase = secrets.choice(longer_date_formats).format(date=date)
-    modified_prompt = f"{random_phrase}\n\n{original_prompt}"
-
-    # Define la ruta del archivo YAML
-    yaml_path = Path(book_path) / "prompts.yaml"
-
-    # Nueva entrada de log con fecha y prompt original
-    log_entry = {"date": str(date), "original_prompt": original_prompt}
-
-    # Verifica si el archivo YAML existe y carga los datos
-    if yaml_path.exists():
-        with yaml_path.open("r", encoding="utf-8") as file:
-            existing_data = (
-                yaml.safe_load(file) or []
-            )  # Carga una lista vacía si está vacío
+    if position == "start":
+        modified_prompt = f"{random_phrase}\n\n{original_prompt}"
+    elif position == "end":
+        modified_prompt = f"{original_prompt}\n\n{random_phrase}"
     else:
-        existing_data = []
-
-    # Añade la nueva entrada al log
-    existing_data.append(log_entry)
+        modified_prompt = original_prompt
 
-    # Guarda los datos actualizados en el archivo YAML
-    with yaml_path.open("w", encoding="utf-8") as file:
-        yaml.dump(existing_data, file, default_flow_style=False)
+    # Nueva entrada de log con fecha y prompt original, añadida en O(1)
+    log_prompt(book_path, {"date": str(date), "original_prompt": original_prompt})
 
     # Imprime el prompt modificado en Markdown si el modo debug está activado
     if debug_state.is_debug():
@@ -63,11 +89,15 @@ class BookConfig(NamedTuple):
     """
     A NamedTuple representing the configuration of a book.
 
+    Instances are immutable: list values from the JSON file are stored as tuples.
+    Keys without a field of their own are kept in `extra` and can still be read
+    as attributes (e.g. `config.my_setting`).
+
     Attributes:
         book_path (str): The path to the book's directory.
         book_name (str): The name of the book.
         primary_language (str): The primary language of the book.
-        alternate_languages (list): A list of alternate languages.
+        alternate_languages (tuple): A tuple of alternate languages.
         default_author (str): The default author of the book.
         genre (str): The genre of the book.
         license (str): The license type for the book.
@@ -76,25 +106,90 @@ class BookConfig(NamedTuple):
         cli_name (str): The name of the CLI tool used.
         openai_url (str): The URL of the OpenAI API.
         openai_model (str): The OpenAI model to use.
+        authors (tuple): The paper authors (PaperCraftr only).
+        max_concurrency (int): Maximum concurrent model requests for the book.
+        requests_per_minute (int): Request limit for openai_url (0 = learn from response headers).
+        tokens_per_minute (int): Token limit for openai_url (0 = learn from response headers).
+        retrieval (str): Where the model looks up book content: "remote" (the
+            vector store's file_search), "local" (the book_search tool over a
+            local BM25 index) or "hybrid" (both).
+        embedding_model (str): Embeddings model used by hybrid retrieval's dense
+            index, served from openai_url; "local" hashes words locally instead.
+        context_tokens (int): Token budget for a file sent with a request that
+            edits it through the tools; longer files are sent as an outline
+            plus the passages relevant to the request (0 = always send the
+            whole file). Requests whose reply replaces the file ignore it.
+        extra (Mapping): Any other keys from the JSON file, read-only.
     """
 
-    book_path: str
-    book_name: str
-    primary_language: str
-    alternate_languages: list
-    default_author: str
-    genre: str
-    license: str
-    reference_author: str
-    keywords: str
-    cli_name: str
-    openai_url: str
-    openai_model: str
+    book_path: str = ""
+    book_name: str = "Untitled Paper"
+    primary_language: str = "en"
+    alternate_languages: tuple = ()
+    default_author: str = "Unknown Author"
+    genre: str = "research"
+    license: str = "CC BY"
+    reference_author: str = ""
+    keywords: str = ""
+    cli_name: str = "papercraftr"
+    openai_url: str = "https://api.openai.com/v1"
+    openai_model: str = "gpt-4o"
+    authors: tuple = ()
+    max_concurrency: int = 4
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    retrieval: str = "remote"
+    embedding_model: str = "text-embedding-3-small"
+    context_tokens: int = 6000
+    extra: Mapping = MappingProxyType({})
+
+    def __getattr__(self, name):
+        # Only called for names that are not fields, e.g. user-added keys
+        try:
+            return self.extra[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+# Parsed configs keyed by config file path, tagged with the (mtime, size) they were read at
+_BOOK_CONFIG_CACHE: dict = {}
+_BOOK_CONFIG_LOCK = threading.Lock()
+
+
+def _freeze(value):
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+def _parse_book_config(config_path: Path) -> BookConfig:
+    config_data = json.loads(config_path.read_text(encoding="utf-8"))
+    known, extra = {}, {}
+    for key, value in config_data.items():
+        target = known if key in BookConfig._fields and key != "extra" else extra
+        target[key] = _freeze(value)
+    return BookConfig(**known, extra=MappingProxyType(extra))
+
+
+def clear_book_config_cache() -> None:
+    """
+    Forget every cached configuration so the next load re-reads the files.
+    """
+    with _BOOK_CONFIG_LOCK:
+        _BOOK_CONFIG_CACHE.clear()
 
 
 def load_book_config(book_path: str):
     """
     Load configuration from the book path.
+
+    The parsed configuration is cached per file and reused until the file's
+    modification time or size changes, so the file is read at most once per edit.
+
+    Returns:
+        BookConfig: The immutable book configuration, or None if it cannot be loaded.
     """
     if not book_path:
         console.print(
@@ -118,35 +213,46 @@ def load_book_config(book_path: str):
                 )
                 return None
 
-        config_data = json.loads(config_path.read_text(encoding="utf-8"))
-
-        # Ensure required fields exist with default values
-        default_config = {
-            "book_name": "Untitled Paper",
-            "authors": [],
-            "primary_language": "en",
-            "alternate_languages": [],
-            "default_author": "Unknown Author",
-            "genre": "research",
-            "license": "CC BY",
-            "reference_author": "",
-            "keywords": "",
-            "cli_name": "papercraftr",
-            "openai_url": "https://api.openai.com/v1",
-            "openai_model": "gpt-4o",
-        }
-
-        # Update default config with actual config data
-        for key, value in config_data.items():
-            default_config[key] = value
-
-        return SimpleNamespace(**default_config)
+        stat = config_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cache_key = str(config_path.resolve())
+
+        with _BOOK_CONFIG_LOCK:
+            cached = _BOOK_CONFIG_CACHE.get(cache_key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        config = _parse_book_config(config_path)
+        with _BOOK_CONFIG_LOCK:
+            _BOOK_CONFIG_CACHE[cache_key] = (signature, config)
+        return config
 
     except Exception as e:
         console.print(f"[red]Error loading configuration: {str(e)}[/red]")
         return None
 
 
+def list_book_content_files(book_path: str) -> list:
+    """
+    List the markdown files under BOOK_CONTENT_DIRS without reading them.
+
+    The list comes from the book manifest: hidden files and folders, files
+    inside a `storycraftr` docs folder and the names in EXCLUDED_CONTENT_FILES
+    are skipped. Callers apply the more-than-three-lines rule themselves,
+    from the manifest's line counts or when they read the files.
+
+    Args:
+        book_path (str): Path to the book directory.
+
+    Returns:
+        list: File paths joined to `book_path`, sorted.
+    """
+    return [
+        os.path.join(book_path, *entry["path"].split("/"))
+        for entry in book_manifest.files(book_path, content=True)
+    ]
+
+
 def file_has_more_than_three_lines(file_path: str) -> bool:
     """
     Check if a file has more than three lines.
@@ -238,4 +344,120 @@ def clear_conversation_id(book_path: str, agent_name: str | None = None) -> None
             del data[agent_name]
             path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
     except Exception:
-        pass
\ No newline at end of file
+        pass
+
+
+# ---------------- Vector store id persistence (per book) ----------------
+
+
+def _vector_store_state_path(book_path: str) -> Path:
+    """
+    Return the path to the file caching the resolved vector store ids for a book.
+    """
+    return Path(book_path) / "vector_store.json"
+
+
+def load_vector_store_id(book_path: str, store_name: str) -> str | None:
+    """
+    Load the cached vector store id for the given store name, if present.
+    """
+    try:
+        path = _vector_store_state_path(book_path)
+        if not path.exists():
+            return None
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and isinstance(data.get(store_name), str):
+            return data[store_name]
+        return None
+    except Exception:
+        return None
+
+
+def save_vector_store_id(book_path: str, store_name: str, vector_store_id: str) -> None:
+    """
+    Persist the resolved vector store id for the given store name.
+    """
+    try:
+        path = _vector_store_state_path(book_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data: dict = {}
+        if path.exists():
+            try:
+                existing = json.loads(path.read_text(encoding="utf-8"))
+                if isinstance(existing, dict):
+                    data = existing
+            except Exception:
+                data = {}
+        data[str(store_name)] = str(vector_store_id)
+        path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    except Exception:
+        # Best-effort persistence; ignore errors silently
+        pass
+
+
+def clear_vector_store_id(book_path: str, store_name: str | None = None) -> None:
+    """
+    Remove the cached vector store id for the store name (or all of them if None).
+    """
+    try:
+        path = _vector_store_state_path(book_path)
+        if not path.exists():
+            return
+        if store_name is None:
+            path.unlink()
+            return
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and store_name in data:
+            del data[store_name]
+            path.write_text(
+                json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+    except Exception:
+        pass
+
+
+# ---------------- Vector store sync manifest (per book) ----------------
+
+
+def _sync_manifest_path(book_path: str) -> Path:
+    """
+    Return the path to the manifest mapping book files to uploaded file ids.
+    """
+    return Path(book_path) / "vector_store_sync.json"
+
+
+def load_sync_manifest(book_path: str) -> dict:
+    """
+    Load the vector store sync manifest for a book.
+
+    Returns:
+        dict: {"vector_store_id": str | None, "files": {rel_path: {"sha256", "file_id", "size"}}}
+    """
+    empty = {"vector_store_id": None, "files": {}}
+    try:
+        path = _sync_manifest_path(book_path)
+        if not path.exists():
+            return empty
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict) or not isinstance(data.get("files"), dict):
+            return empty
+        return {"vector_store_id": data.get("vector_store_id"), "files": data["files"]}
+    except Exception:
+        return empty
+
+
+def save_sync_manifest(book_path: str, manifest: dict) -> None:
+    """
+    Persist the vector store sync manifest for a book.
+    """
+    try:
+        path = _sync_manifest_path(book_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    except Exception:
+        # Best-effort persistence; a missing manifest only costs a full re-upload
+        pass
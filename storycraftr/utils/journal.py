@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from rich.console import Console
+
+console = Console()
+
+JOURNAL_NAME = os.path.join(".storycraftr", "journal.jsonl")
+BACKUPS_DIR_NAME = os.path.join(".storycraftr", "backups")
+# Rewrite the journal without finished entries once it grows past this size
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+_journal_lock = threading.Lock()
+# Ids of the batches this process is running, which are not resumable yet
+_running_batches: set = set()
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def find_book_root(path) -> Optional[str]:
+    """Return the nearest parent directory of `path` holding storycraftr.json."""
+    current = Path(path).resolve()
+    for candidate in [current, *current.parents]:
+        if (candidate / "storycraftr.json").is_file():
+            return str(candidate)
+    return None
+
+
+def _journal_path(book_root: str) -> Path:
+    return Path(book_root) / JOURNAL_NAME
+
+
+def _rel(book_root: str, path) -> str:
+    try:
+        return Path(path).resolve().relative_to(Path(book_root).resolve()).as_posix()
+    except ValueError:
+        return str(Path(path).resolve())
+
+
+def _append(book_root: str, record: Dict[str, Any]) -> None:
+    record.setdefault("ts", time.time())
+    path = _journal_path(book_root)
+    with _journal_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+def _read_records(path: Path) -> List[Dict[str, Any]]:
+    """Parse the journal at `path`; the caller holds `_journal_lock`."""
+    if not path.exists():
+        return []
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def read_journal(book_root: str) -> List[Dict[str, Any]]:
+    """Read the journal records of a book, skipping a torn last line."""
+    with _journal_lock:
+        return _read_records(_journal_path(book_root))
+
+
+def _fsync_dir(directory: Path) -> None:
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _snapshot(book_root: str, text: str) -> str:
+    """Keep a content-addressed copy of a file's previous text; returns its hash."""
+    digest = _sha256_text(text)
+    target = Path(book_root) / BACKUPS_DIR_NAME / digest[:2] / f"{digest}.md"
+    if not target.exists():
+        _write_file_atomic(target, text)
+    return digest
+
+
+def _write_file(path: Path, text: str, newline: Optional[str] = None) -> str:
+    """Write `text` to an fsynced temporary file next to `path`; returns its name."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline=newline) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            shutil.copymode(path, tmp)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return str(tmp)
+
+
+def atomic_write_text(
+    path,
+    text: str,
+    *,
+    book_path: Optional[str] = None,
+    backup: bool = False,
+    newline: Optional[str] = None,
+    batch: Optional[str] = None,
+) -> str:
+    """
+    Replace a file's contents so readers only ever see the old or new text.
+
+    The text goes to a temporary file in the same folder, is fsynced, and is
+    renamed over the target. Inside a book the write is recorded in
+    `.storycraftr/journal.jsonl` so a crash between the steps can be repaired
+    by `recover_writes`.
+
+    Args:
+        path: The file to write.
+        text (str): The new contents.
+        book_path (str, optional): Book root; found from `path` when omitted.
+        backup (bool): Copy the current contents to `<file>.back` and keep a
+            snapshot under `.storycraftr/backups/` before replacing it.
+        newline (str, optional): Passed to `open`, as for `Path.write_text`.
+        batch (str, optional): Id from `begin_batch` of the run this write
+            finishes a file for.
+
+    Returns:
+        str: The path written.
+    """
+    path = Path(path)
+    book_root = book_path or find_book_root(path.parent)
+    previous = None
+    if backup and path.exists():
+        try:
+            previous = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            previous = None
+
+    record: Dict[str, Any] = {}
+    if book_root:
+        record = {"op": "write", "id": uuid.uuid4().hex, "path": _rel(book_root, path)}
+        if batch:
+            record["batch"] = batch
+    if backup and previous is not None:
+        if book_root:
+            record["before"] = _snapshot(book_root, previous)
+        _write_file_atomic(Path(str(path) + ".back"), previous)
+
+    tmp = _write_file(path, text, newline)
+    if book_root:
+        record["tmp"] = _rel(book_root, tmp)
+        record["sha256"] = _sha256_text(text)
+        _append(book_root, dict(record))
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+    if book_root:
+        _append(book_root, {"op": "commit", "id": record["id"]})
+        _maybe_compact(book_root)
+    return str(path)
+
+
+def _write_file_atomic(path: Path, text: str) -> None:
+    tmp = _write_file(path, text)
+    os.replace(tmp, path)
+
+
+def atomic_append_text(path, text: str, **kwargs) -> str:
+    """Append to a file through `atomic_write_text`."""
+    path = Path(path)
+    current = path.read_text(encoding="utf-8") if path.exists() else ""
+    return atomic_write_text(path, current + text, **kwargs)
+
+
+def backup_file(path, book_path: Optional[str] = None) -> Optional[str]:
+    """
+    Copy a file to `<file>.back` atomically and snapshot it in the journal.
+
+    Returns:
+        str: The backup path, or None if the file does not exist.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    text = path.read_text(encoding="utf-8")
+    backup_path = Path(str(path) + ".back")
+    _write_file_atomic(backup_path, text)
+    book_root = book_path or find_book_root(path.parent)
+    if book_root:
+        digest = _snapshot(book_root, text)
+        _append(
+            book_root, {"op": "backup", "path": _rel(book_root, path), "before": digest}
+        )
+    return str(backup_path)
+
+
+def begin_batch(book_path: str, name: str, files: List[str]) -> str:
+    """
+    Record the start of a multi-file run. Pass the returned id as `batch` to
+    the writes that finish its files.
+    """
+    batch_id = uuid.uuid4().hex
+    _append(
+        book_path,
+        {
+            "op": "batch_begin",
+            "id": batch_id,
+            "name": name,
+            "files": [_rel(book_path, f) for f in files],
+        },
+    )
+    _running_batches.add(batch_id)
+    return batch_id
+
+
+def end_batch(book_path: str, batch_id: str, status: str = "done") -> None:
+    """Record the end of a batch started with `begin_batch`."""
+    _running_batches.discard(batch_id)
+    _append(book_path, {"op": "batch_end", "id": batch_id, "status": status})
+    _maybe_compact(book_path)
+
+
+def detach_batch(book_path: str, batch_id: str) -> None:
+    """
+    Stop running a batch but leave it unfinished in the journal, so a later
+    run can see what it completed and resume.
+    """
+    _running_batches.discard(batch_id)
+
+
+def _open_entries(records: List[Dict[str, Any]]):
+    writes: Dict[str, Dict[str, Any]] = {}
+    batches: Dict[str, Dict[str, Any]] = {}
+    committed: set = set()
+    for record in records:
+        op = record.get("op")
+        if op == "write":
+            writes[record["id"]] = record
+        elif op == "commit":
+            committed.add(record.get("id"))
+            writes.pop(record.get("id"), None)
+        elif op == "recovered":
+            writes.pop(record.get("id"), None)
+        elif op == "batch_begin":
+            batches[record["id"]] = dict(record, done=[])
+        elif op == "batch_end":
+            batches.pop(record.get("id"), None)
+    for record in records:
+        if record.get("op") == "write" and record.get("id") in committed:
+            batch = batches.get(record.get("batch"))
+            # Only the batch's own files count, whatever else was tagged
+            if (
+                batch is not None
+                and record["path"] in batch["files"]
+                and record["path"] not in batch["done"]
+            ):
+                batch["done"].append(record["path"])
+    return writes, batches
+
+
+def interrupted_batches(book_path: str) -> List[Dict[str, Any]]:
+    """
+    List batches that started but never finished, from the journal alone.
+
+    Returns:
+        list: Dicts with id, name, files, and `done` (files whose new
+        contents were fully written during the batch).
+    """
+    _, batches = _open_entries(read_journal(book_path))
+    return [
+        {key: batch[key] for key in ("id", "name", "files", "done")}
+        for batch in batches.values()
+        if batch["id"] not in _running_batches
+    ]
+
+
+def recover_writes(book_path: str) -> List[Dict[str, Any]]:
+    """
+    Finish or undo writes that were interrupted between the journal's start
+    and commit records.
+
+    A write whose temporary file is complete (its hash matches) is rolled
+    forward by renaming it into place; otherwise the temporary file is
+    removed and the original file, which was never touched, is kept.
+
+    Returns:
+        list: One `{path, action}` dict per repaired write.
+    """
+    writes, _ = _open_entries(read_journal(book_path))
+    repaired = []
+    for record in writes.values():
+        target = Path(book_path) / record["path"]
+        tmp = Path(book_path) / record.get("tmp", "")
+        action = "rolled_back"
+        if record.get("tmp") and tmp.is_file():
+            try:
+                complete = _sha256_text(tmp.read_text(encoding="utf-8")) == record.get(
+                    "sha256"
+                )
+            except (OSError, UnicodeDecodeError):
+                complete = False
+            if complete:
+                os.replace(tmp, target)
+                action = "rolled_forward"
+            else:
+                tmp.unlink(missing_ok=True)
+        elif target.is_file() and _sha256_text(
+            target.read_text(encoding="utf-8")
+        ) == record.get("sha256"):
+            # Renamed before the commit record was written
+            action = "rolled_forward"
+        _append(book_path, {"op": "recovered", "id": record["id"], "action": action})
+        repaired.append({"path": record["path"], "action": action})
+    if repaired:
+        console.print(
+            f"[yellow]Recovered {len(repaired)} interrupted write(s): "
+            + ", ".join(
+                f"{r['path']} ({r['action'].replace('_', ' ')})" for r in repaired
+            )
+            + "[/yellow]"
+        )
+    return repaired
+
+
+def _maybe_compact(book_root: str) -> None:
+    """Drop finished entries once the journal grows past JOURNAL_COMPACT_BYTES."""
+    path = _journal_path(book_root)
+    try:
+        if path.stat().st_size < JOURNAL_COMPACT_BYTES:
+            return
+    except OSError:
+        return
+    # One lock across read, filter and rewrite, so records appended by other
+    # threads meanwhile are not dropped
+    with _journal_lock:
+        records = _read_records(path)
+        writes, batches = _open_entries(records)
+        # Keep unfinished writes, open batches, and the writes (with their
+        # commits) that tell which files an open batch already finished
+        keep_ids = set(writes) | set(batches)
+        keep_ids.update(
+            r["id"]
+            for r in records
+            if r.get("op") == "write" and r.get("batch") in batches
+        )
+        kept = [r for r in records if r.get("id") in keep_ids]
+        _write_file_atomic(
+            path, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in kept)
+        )
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+LOCKS_DIR_NAME = os.path.join(".storycraftr", "locks")
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def _thread_lock(key: str) -> threading.Lock:
+    with _path_locks_guard:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = threading.Lock()
+        return lock
+
+
+def _lock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(handle) -> None:
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def path_lock(book_path: str, file_path: str):
+    """
+    Hold an exclusive lock on a book file for a read-modify-write.
+
+    A per-path thread lock serialises writers in this process and an advisory
+    lock on a sidecar file in `.storycraftr/locks/` serialises other
+    processes. The sidecar (rather than the file itself) keeps the lock valid
+    when the file is replaced instead of rewritten in place.
+
+    Args:
+        book_path (str): Path to the book directory.
+        file_path (str): The file to lock.
+    """
+    key = str(Path(file_path).resolve())
+    name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".lock"
+    with _thread_lock(key):
+        handle = None
+        try:
+            locks_dir = Path(book_path) / LOCKS_DIR_NAME
+            locks_dir.mkdir(parents=True, exist_ok=True)
+            handle = open(locks_dir / name, "a+b")
+            _lock_file(handle)
+        except OSError:
+            # Read-only or unusual filesystems: fall back to the thread lock
+            if handle is not None:
+                handle.close()
+            handle = None
+        try:
+            yield
+        finally:
+            if handle is not None:
+                try:
+                    _unlock_file(handle)
+                finally:
+                    handle.close()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from storycraftr.utils.outline import markdown_outline
+
+# Book folders (and file names to skip) whose markdown makes up the book content
+# that is uploaded to the vector store or indexed locally
+BOOK_CONTENT_DIRS = ("chapters", "outline", "worldbuilding")
+EXCLUDED_CONTENT_FILES = frozenset({"iterate.md", "chat.md", "getting_started.md"})
+
+MANIFEST_PATH = os.path.join(".storycraftr", "manifest.json")
+MANIFEST_VERSION = 1
+# Files the manifest tracks; only markdown is read for hashes, counts and headings
+TRACKED_SUFFIXES = (".md", ".txt", ".json", ".tex")
+CONFIG_FILES = frozenset({"storycraftr.json", "papercraftr.json"})
+_CHAPTER_RE = re.compile(r"^chapters/chapter-(\d+)\.md$")
+
+
+def _kind(rel: str) -> str:
+    parts = rel.split("/")
+    if len(parts) == 1:
+        return "config" if rel in CONFIG_FILES else "other"
+    return parts[0] if parts[0] in BOOK_CONTENT_DIRS + ("book",) else "other"
+
+
+def _is_content(rel: str) -> bool:
+    parts = rel.split("/")
+    return (
+        len(parts) > 1
+        and parts[0] in BOOK_CONTENT_DIRS
+        and rel.endswith(".md")
+        and parts[-1] not in EXCLUDED_CONTENT_FILES
+        # Files inside a storycraftr docs folder are not book content
+        and "storycraftr" not in parts[1:-1]
+    )
+
+
+def _analyze(full_path: str) -> Dict[str, Any]:
+    """Hash, line and word counts and headings of a markdown file."""
+    data = Path(full_path).read_bytes()
+    stats: Dict[str, Any] = {"sha256": hashlib.sha256(data).hexdigest()}
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return dict(stats, lines=0, words=0, headings=[], error="not UTF-8")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    stats["lines"] = text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+    stats["words"] = len(text.split())
+    stats["headings"] = [
+        {
+            "level": entry["level"],
+            "title": entry["title"],
+            "start_line": entry["start_line"],
+        }
+        for entry in markdown_outline(text)
+    ]
+    return stats
+
+
+class BookManifest:
+    """
+    Per-book record of the files in a book, the single place that lists them.
+
+    Every tracked file (markdown, text, JSON and TeX outside hidden folders)
+    gets an entry with its path relative to the book, kind (its top folder, or
+    `config`/`other` at the root), chapter number, size, mtime, whether it is
+    book content, and for markdown its sha256, line and word counts and
+    headings. The manifest is saved to `.storycraftr/manifest.json`; a refresh
+    walks the tree and stats each file, and only reads files whose size or
+    modification time changed, in this process or since the manifest was saved.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, root: Path) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads((root / MANIFEST_PATH).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return {}
+        files = data.get("files")
+        return files if isinstance(files, dict) else {}
+
+    def _save(self, root: Path, files: Dict[str, Dict[str, Any]]) -> None:
+        path = root / MANIFEST_PATH
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MANIFEST_VERSION, "files": files},
+                    f,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, path)
+        except OSError:
+            # The manifest is a cache; the next process rebuilds it
+            pass
+
+    def refresh(self, book_path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring a book's manifest up to date with its files.
+
+        Args:
+            book_path (str): Path to the book directory.
+
+        Returns:
+            dict: Entries keyed by path relative to the book (with `/`).
+        """
+        root = Path(book_path).resolve()
+        base = str(root)
+        if not root.is_dir():
+            return {}
+        with self._lock:
+            known = self._books.get(base)
+            if known is None:
+                known = self._load(root)
+            files: Dict[str, Dict[str, Any]] = {}
+            changed = False
+            for dirpath, dirnames, filenames in os.walk(base):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+                for filename in filenames:
+                    if filename.startswith(".") or not filename.lower().endswith(
+                        TRACKED_SUFFIXES
+                    ):
+                        continue
+                    full = os.path.join(dirpath, filename)
+                    rel = full[len(base) + 1 :].replace(os.sep, "/")
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    entry = known.get(rel)
+                    if entry and (entry.get("mtime_ns"), entry.get("size")) == (
+                        st.st_mtime_ns,
+                        st.st_size,
+                    ):
+                        files[rel] = entry
+                        continue
+                    match = _CHAPTER_RE.match(rel)
+                    entry = {
+                        "path": rel,
+                        "kind": _kind(rel),
+                        "chapter": int(match.group(1)) if match else None,
+                        "content": _is_content(rel),
+                        "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns,
+                    }
+                    if filename.lower().endswith(".md"):
+                        try:
+                            entry.update(_analyze(full))
+                        except OSError:
+                            continue
+                    files[rel] = entry
+                    changed = True
+            changed = changed or set(files) != set(known)
+            self._books[base] = files
+            if changed:
+                self._save(root, files)
+            return dict(files)
+
+    def files(
+        self,
+        book_path: str,
+        *,
+        kind: Optional[str] = None,
+        content: Optional[bool] = None,
+        suffix: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        List manifest entries, sorted by path.
+
+        Args:
+            book_path (str): Path to the book directory.
+            kind (str, optional): Only entries of this kind (e.g. "chapters").
+            content (bool, optional): Only book content files (or only others).
+            suffix (str, optional): Only paths with this suffix (e.g. ".md").
+
+        Returns:
+            list: Manifest entries.
+        """
+        entries = self.refresh(book_path)
+        return [
+            entry
+            for rel, entry in sorted(entries.items())
+            if (kind is None or entry["kind"] == kind)
+            and (content is None or entry["content"] == content)
+            and (suffix is None or rel.endswith(suffix))
+        ]
+
+    def chapters(self, book_path: str) -> List[Dict[str, Any]]:
+        """Entries of the numbered `chapters/chapter-N.md` files, in chapter order."""
+        entries = [
+            entry
+            for entry in self.refresh(book_path).values()
+            if entry["chapter"] is not None
+        ]
+        return sorted(entries, key=lambda entry: entry["chapter"])
+
+    def clear(self, book_path: Optional[str] = None) -> None:
+        """Forget the in-memory manifest of one book, or of all books."""
+        with self._lock:
+            if book_path is None:
+                self._books.clear()
+            else:
+                self._books.pop(str(Path(book_path).resolve()), None)
+
+
+book_manifest = BookManifest()
@@ -1,6 +1,5 @@
 import os
 import re
-import shutil
 from pathlib import Path
 from storycraftr.agent.agents import (
     create_or_get_assistant,
@@ -8,6 +7,9 @@ from storycraftr.agent.agents import (
     create_message,
 )
 from storycraftr.utils.core import load_book_config
+from storycraftr.utils.journal import atomic_append_text, atomic_write_text
+from storycraftr.utils.locks import path_lock
+from storycraftr.utils.manifest import book_manifest
 from rich.console import Console
 from rich.progress import Progress
 
@@ -15,7 +17,14 @@ console = Console()
 
 
 def save_to_markdown(
-    book_path, file_name, header, content, progress: Progress = None, task=None, skip_if_exists: bool = False
+    book_path,
+    file_name,
+    header,
+    content,
+    progress: Progress = None,
+    task=None,
+    skip_if_exists: bool = False,
+    batch: str = None,
 ) -> str:
     """
     Save the generated content to a specified markdown file, creating a backup if the file exists.
@@ -27,6 +36,7 @@ def save_to_markdown(
         content (str): The content to save in the file.
         progress (Progress, optional): Rich Progress object for updating progress.
         task (optional): Task associated with progress for updates.
+        batch (str, optional): Journal batch id of the run this save belongs to.
 
     Returns:
         str: The path to the saved markdown file.
@@ -52,7 +62,6 @@ def save_to_markdown(
             console.print(
                 f"[bold yellow]Backing up {file_path} to {backup_path}...[/bold yellow]"
             )
-        shutil.copyfile(file_path, backup_path)
 
     # Save the new content to the markdown file
     if progress and task:
@@ -60,8 +69,16 @@ def save_to_markdown(
     else:
         console.print(f"[bold blue]Saving content to {file_path}...[/bold blue]")
 
-    with file_path.open("w", encoding="utf-8") as f:
-        f.write(f"# {header}\n\n{content}")
+    # Backup and write go through the journaled atomic write path, under the
+    # per-file lock the edit tools take, so a tool edit cannot land in between
+    with path_lock(book_path, str(file_path)):
+        atomic_write_text(
+            file_path,
+            f"# {header}\n\n{content}",
+            book_path=book_path,
+            backup=True,
+            batch=batch,
+        )
 
     if progress and task:
         progress.update(task, description=f"Content saved successfully to {file_name}")
@@ -89,8 +106,8 @@ def append_to_markdown(book_path, folder_name, file_name, content):
     file_path = Path(book_path) / folder_name / file_name
 
     if file_path.exists():
-        with file_path.open("a", encoding="utf-8") as f:
-            f.write(f"\n\n{content}")
+        with path_lock(book_path, str(file_path)):
+            atomic_append_text(file_path, f"\n\n{content}", book_path=book_path)
         console.print(f"Appended content to {file_path}")
     else:
         raise FileNotFoundError(f"File {file_path} does not exist.")
@@ -158,11 +175,10 @@ def consolidate_book_md(
         if section_path.exists():
             files_to_process.append(section_path)
 
-    # Add chapters in order
-    chapter_files = sorted(
-        [f for f in chapters_dir.iterdir() if re.match(r"chapter-\d+\.md", f.name)],
-        key=lambda x: int(re.findall(r"\d+", x.name)[0]),
-    )
+    # Add chapters in order, as listed by the book manifest
+    chapter_files = [
+        Path(book_path) / entry["path"] for entry in book_manifest.chapters(book_path)
+    ]
     files_to_process.extend(chapter_files)
 
     # Add epilogue if it exists
@@ -285,7 +301,6 @@ def consolidate_paper_md(
     # Add title and metadata from config
     config = load_book_config(book_path)
     if config:
-        # Access attributes using getattr to handle SimpleNamespace objects safely
         book_name = getattr(config, "book_name", "Untitled Paper")
         authors = getattr(config, "authors", [])
         keywords = getattr(config, "keywords", [])
@@ -300,7 +315,7 @@ def consolidate_paper_md(
         # Add keywords
         if keywords:
             consolidated_content.append("## Keywords\n\n")
-            if isinstance(keywords, list):
+            if isinstance(keywords, (list, tuple)):
                 consolidated_content.append(", ".join(keywords) + "\n\n")
             else:
                 consolidated_content.append(f"{keywords}\n\n")
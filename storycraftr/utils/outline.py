@@ -0,0 +1,79 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# ATX headings (level marks, title) and fenced code block delimiters, shared
+# with the chunker so both agree on where sections start
+HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+
+
+def markdown_outline(text: str) -> List[Dict[str, Any]]:
+    """
+    Return the heading tree of a markdown document as a flat, ordered list.
+
+    Headings inside fenced code blocks are ignored. Each entry spans from its
+    heading line to the line before the next heading of the same or a higher
+    level (or the end of the document).
+
+    Args:
+        text (str): The markdown text.
+
+    Returns:
+        list: Dicts with level, title, start_line and end_line (1-based,
+        inclusive) and byte_offset/end_byte (UTF-8, end exclusive).
+    """
+    lines = text.splitlines(keepends=True)
+    headings: List[Dict[str, Any]] = []
+    offset = 0
+    in_fence = False
+    for number, line in enumerate(lines, start=1):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = HEADING_RE.match(line.rstrip("\r\n"))
+            if match:
+                headings.append(
+                    {
+                        "level": len(match.group(1)),
+                        "title": match.group(2).strip(),
+                        "start_line": number,
+                        "byte_offset": offset,
+                    }
+                )
+        offset += len(line.encode("utf-8"))
+
+    line_offsets = [0]
+    for line in lines:
+        line_offsets.append(line_offsets[-1] + len(line.encode("utf-8")))
+    for index, heading in enumerate(headings):
+        end_line = len(lines)
+        for following in headings[index + 1 :]:
+            if following["level"] <= heading["level"]:
+                end_line = following["start_line"] - 1
+                break
+        heading["end_line"] = end_line
+        heading["end_byte"] = line_offsets[end_line]
+    return headings
+
+
+def find_section(text: str, heading: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the outline entry whose title matches `heading`.
+
+    Matching ignores case, surrounding whitespace and leading '#' marks; an
+    exact title match wins over a title that merely starts with `heading`.
+
+    Returns:
+        dict: The outline entry, or None if no heading matches.
+    """
+    wanted = heading.strip().lstrip("#").strip().lower()
+    if not wanted:
+        return None
+    outline = markdown_outline(text)
+    for entry in outline:
+        if entry["title"].lower() == wanted:
+            return entry
+    for entry in outline:
+        if entry["title"].lower().startswith(wanted):
+            return entry
+    return None
@@ -0,0 +1,222 @@
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import yaml
+from dotenv import load_dotenv
+from rich.console import Console
+
+# Read .env before the settings below are picked up
+load_dotenv()
+
+console = Console()
+
+PROMPT_LOG_DIR_NAME = os.path.join(".storycraftr", "prompts")
+ACTIVE_LOG_NAME = "prompts.jsonl"
+LEGACY_YAML_NAME = "prompts.yaml"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+MAX_BYTES = _env_int("STORYCRAFTR_PROMPT_LOG_MAX_BYTES", 10 * 1024 * 1024)
+MAX_AGE_DAYS = _env_int("STORYCRAFTR_PROMPT_LOG_MAX_AGE_DAYS", 30)
+KEEP_ROTATED = _env_int("STORYCRAFTR_PROMPT_LOG_KEEP", 20)
+COMPRESS = str(os.getenv("STORYCRAFTR_PROMPT_LOG_COMPRESS", "true")).lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+_lock = threading.Lock()
+# Creation time of each active log, keyed by (path, inode), to check its age
+# without reading it on every append
+_created: Dict[tuple, float] = {}
+_migrated: set = set()
+
+
+def prompt_log_dir(book_path: str) -> Path:
+    return Path(book_path) / PROMPT_LOG_DIR_NAME
+
+
+def _first_timestamp(path: Path) -> Optional[float]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return float(json.loads(f.readline()).get("ts"))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _rotate_if_needed(book_path: str, path: Path, now: float) -> None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    key = (str(path), st.st_ino)
+    created = _created.get(key)
+    if created is None:
+        created = _created[key] = _first_timestamp(path) or now
+    too_big = MAX_BYTES > 0 and st.st_size >= MAX_BYTES
+    too_old = MAX_AGE_DAYS > 0 and now - created >= MAX_AGE_DAYS * 86400
+    if too_big or too_old:
+        rotate_prompt_log(book_path, now=now)
+
+
+def rotate_prompt_log(book_path: str, now: Optional[float] = None) -> Optional[str]:
+    """
+    Move the active prompt log aside (compressed unless disabled) and prune
+    the oldest rotated logs beyond STORYCRAFTR_PROMPT_LOG_KEEP.
+
+    Returns:
+        str: The rotated file, or None if there was nothing to rotate.
+    """
+    directory = prompt_log_dir(book_path)
+    active = directory / ACTIVE_LOG_NAME
+    now = now or time.time()
+    stamp = (
+        time.strftime("%Y%m%dT%H%M%S", time.gmtime(now))
+        + f"{int(now * 1e6) % 1000000:06d}"
+    )
+    rotated = directory / f"prompts-{stamp}-{os.getpid()}.jsonl"
+    serial = 0
+    while rotated.exists() or Path(str(rotated) + ".gz").exists():
+        serial += 1
+        rotated = directory / f"prompts-{stamp}-{os.getpid()}-{serial}.jsonl"
+    try:
+        # Rename first so concurrent writers move on to a fresh file at once
+        os.replace(active, rotated)
+    except OSError:
+        return None
+    if COMPRESS:
+        try:
+            with open(rotated, "rb") as src, gzip.open(
+                str(rotated) + ".gz", "wb"
+            ) as dst:
+                dst.writelines(src)
+            rotated.unlink()
+            rotated = Path(str(rotated) + ".gz")
+        except OSError as e:
+            console.print(f"[yellow]Could not compress {rotated}: {e}[/yellow]")
+    if KEEP_ROTATED > 0:
+        rotated_logs = [
+            p for p in _rotated_logs(directory) if "-imported." not in p.name
+        ]
+        for old in rotated_logs[:-KEEP_ROTATED]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    return str(rotated)
+
+
+def _rotated_logs(directory: Path):
+    # Timestamps in the names sort chronologically; the migrated YAML sorts first
+    return sorted(
+        p
+        for p in directory.glob("prompts-*")
+        if p.name.endswith(".jsonl") or p.name.endswith(".jsonl.gz")
+    )
+
+
+def migrate_prompts_yaml(book_path: str) -> int:
+    """
+    Import a legacy `prompts.yaml` into the prompt log once, then rename it to
+    `prompts.yaml.migrated`.
+
+    Returns:
+        int: Number of entries imported.
+    """
+    legacy = Path(book_path) / LEGACY_YAML_NAME
+    if not legacy.exists():
+        return 0
+    try:
+        with legacy.open("r", encoding="utf-8") as file:
+            entries = yaml.safe_load(file) or []
+    except (OSError, yaml.YAMLError) as e:
+        console.print(f"[red]Could not import {legacy}: {e}[/red]")
+        return 0
+    directory = prompt_log_dir(book_path)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / "prompts-00000000T000000-imported.jsonl"
+    with open(target, "a", encoding="utf-8") as f:
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict):
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+    os.replace(legacy, str(legacy) + ".migrated")
+    console.print(
+        f"[green]Imported {len(entries)} prompt(s) from {legacy} into {directory}.[/green]"
+    )
+    return len(entries)
+
+
+def log_prompt(book_path: str, entry: Dict[str, Any]) -> None:
+    """
+    Append one prompt record to the book's log in O(1).
+
+    Each record is a single JSON line written with one `write` system call on
+    an O_APPEND descriptor, so concurrent writers never interleave records.
+
+    Args:
+        book_path (str): Path to the book directory.
+        entry (dict): JSON-serialisable record; a `ts` field is added.
+    """
+    now = time.time()
+    record = {"ts": now, **entry}
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    directory = prompt_log_dir(book_path)
+    active = directory / ACTIVE_LOG_NAME
+    with _lock:
+        root = str(Path(book_path).resolve())
+        if root not in _migrated:
+            _migrated.add(root)
+            migrate_prompts_yaml(book_path)
+        directory.mkdir(parents=True, exist_ok=True)
+        _rotate_if_needed(book_path, active, now)
+        fd = os.open(active, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+
+def read_prompt_log(
+    book_path: str, since: Optional[float] = None, include_rotated: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over logged prompts, oldest first.
+
+    Args:
+        book_path (str): Path to the book directory.
+        since (float, optional): Only yield records with `ts` at or after this
+            Unix time (imported YAML records have no `ts` and are skipped).
+        include_rotated (bool): Also read rotated and imported logs.
+
+    Yields:
+        dict: One record per logged prompt; malformed lines are skipped.
+    """
+    directory = prompt_log_dir(book_path)
+    paths = _rotated_logs(directory) if include_rotated else []
+    paths.append(directory / ACTIVE_LOG_NAME)
+    for path in paths:
+        opener = gzip.open if path.name.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if since is not None and float(record.get("ts") or 0) < since:
+                        continue
+                    yield record
+        except FileNotFoundError:
+            continue
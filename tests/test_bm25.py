@@ -0,0 +1,130 @@
+import json
+import os
+from types import SimpleNamespace
+from unittest import mock
+
+from storycraftr.agent import agents
+from storycraftr.agent.bm25 import BM25Index, score_passages
+from storycraftr.utils.core import BookConfig
+
+from tests.test_tool_loop import FakeClient
+
+
+def _book(tmp_path):
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "worldbuilding").mkdir()
+    (tmp_path / "chapters" / "chapter-1.md").write_text(
+        "# Chapter 1\n\nElena walked to the harbour.\n\nThe gulls were loud.\n\nShe waited.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "worldbuilding" / "history.md").write_text(
+        "# History\n\nThe lighthouse of Varn was built by the guild.\n\nIt burned twice.\n",
+        encoding="utf-8",
+    )
+    # Three lines or fewer: not book content, as in load_markdown_files
+    (tmp_path / "chapters" / "stub.md").write_text(
+        "# Stub\nlighthouse\n", encoding="utf-8"
+    )
+    return str(tmp_path)
+
+
+def test_search_ranks_passages(tmp_path):
+    book = _book(tmp_path)
+
+    result = BM25Index().search(book, "Lighthouse guild")
+
+    top = result["results"][0]
+    assert top["path"] == "worldbuilding/history.md"
+    assert top["start_line"] == 1 and "built by the guild" in top["text"]
+    assert all(r["path"] != "chapters/stub.md" for r in result["results"])
+    assert (
+        BM25Index().search(book, "harbour", path_prefix="worldbuilding")["results"]
+        == []
+    )
+    assert "error" in BM25Index().search(book, "  ,, ")
+
+
+def test_score_passages_ranks_without_an_index():
+    passages = [
+        "The gulls were loud.",
+        "Elena walked to the harbour.",
+        "Elena saw the harbour lights.",
+    ]
+
+    scores = score_passages(passages, "harbour lights")
+
+    assert sorted(scores, key=scores.get, reverse=True) == [2, 1]
+    assert score_passages(passages, "") == {} and score_passages([], "harbour") == {}
+
+
+def test_index_is_persisted_and_updated_by_hash(tmp_path):
+    book = _book(tmp_path)
+    first = BM25Index()
+    # The stub is tracked (so it is not re-read) but has no passages
+    assert first.refresh(book) == {
+        "added": 3,
+        "updated": 0,
+        "removed": 0,
+        "unchanged": 0,
+    }
+
+    # A new process reuses the saved segments without re-reading unchanged files
+    second = BM25Index()
+    with mock.patch("storycraftr.agent.bm25.iter_chunks") as chunk:
+        assert second.refresh(book)["unchanged"] == 3
+        chunk.assert_not_called()
+
+    chapter = tmp_path / "chapters" / "chapter-1.md"
+    chapter.write_text(
+        chapter.read_text(encoding="utf-8") + "\nA lighthouse keeper appeared.\n",
+        encoding="utf-8",
+    )
+    os.remove(tmp_path / "worldbuilding" / "history.md")
+
+    assert second.refresh(book) == {
+        "added": 0,
+        "updated": 1,
+        "removed": 1,
+        "unchanged": 1,
+    }
+    assert (
+        second.search(book, "lighthouse")["results"][0]["path"]
+        == "chapters/chapter-1.md"
+    )
+    manifest = json.loads(
+        (tmp_path / ".storycraftr" / "index" / "bm25" / "manifest.json").read_text()
+    )
+    assert sorted(manifest["files"]) == ["chapters/chapter-1.md", "chapters/stub.md"]
+    segments = list(
+        (tmp_path / ".storycraftr" / "index" / "bm25" / "segments").glob("*.json")
+    )
+    assert len(segments) == 2
+
+
+def test_local_retrieval_uses_book_search_without_a_vector_store(tmp_path):
+    book = _book(tmp_path)
+    client = FakeClient(
+        first_output=[
+            {
+                "type": "function_call",
+                "name": "book_search",
+                "arguments": json.dumps({"query": "lighthouse"}),
+                "call_id": "c1",
+            }
+        ]
+    )
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+    with mock.patch.object(
+        agents, "initialize_async_openai_client", return_value=client
+    ), mock.patch.object(agents, "initialize_openai_client"), mock.patch.object(
+        agents, "load_book_config", return_value=BookConfig(retrieval="local")
+    ), mock.patch.object(
+        agents, "get_vector_store_id_by_name"
+    ) as lookup:
+        assert agents.create_message(book, "conv", "Who built it?", assistant) == "Done"
+
+    lookup.assert_not_called()
+    tools = [t.get("name") or t["type"] for t in client.calls[0]["tools"]]
+    assert "book_search" in tools and "file_search" not in tools
+    output = json.loads(client.calls[1]["input"][0]["output"])
+    assert output["results"][0]["path"] == "worldbuilding/history.md"
@@ -0,0 +1,92 @@
+import io
+import random
+
+from storycraftr.utils.chunker import count_tokens, iter_chunks
+
+WORDS = [
+    "the",
+    "lighthouse",
+    "Elena",
+    "harbour",
+    "said",
+    ",",
+    ".",
+    "walked",
+    "quietly",
+    "storm",
+]
+
+
+def _manuscript(chapters=60, seed=7):
+    rng = random.Random(seed)
+    parts = []
+    for c in range(chapters):
+        parts.append(f"# Chapter {c}\n\n")
+        for s in range(3):
+            parts.append(f"## Scene {s}\n\n")
+            for _ in range(12):
+                parts.append(
+                    " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 150)))
+                    + "\n\n"
+                )
+            parts.append("* * *\n\n")
+    return "".join(parts)
+
+
+def test_chunks_tile_a_large_manuscript_within_budget():
+    text = _manuscript()
+    data = text.encode("utf-8")
+
+    chunks = list(iter_chunks(text, "chapters/book.md", max_tokens=300))
+
+    assert len(chunks) > 500
+    assert b"".join(data[c["byte_offset"] : c["end_byte"]] for c in chunks) == data
+    assert all(b["start_line"] == a["end_line"] + 1 for a, b in zip(chunks, chunks[1:]))
+    assert max(c["tokens"] for c in chunks) <= 300
+    assert len({c["id"] for c in chunks}) == len(chunks)
+    # A chapter title stays with the first scene's title and text
+    assert chunks[0]["heading"] == ["Chapter 0", "Scene 0"]
+    assert chunks[0]["text"].startswith("# Chapter 0\n\n## Scene 0\n\n")
+    # Scene breaks end a chunk; headings start one
+    assert all(
+        c["text"].endswith("* * *")
+        or nxt["text"].startswith("#")
+        or nxt["heading"] == c["heading"]
+        for c, nxt in zip(chunks, chunks[1:])
+    )
+
+
+def test_editing_one_paragraph_changes_only_nearby_ids():
+    text = _manuscript()
+    before = [c["id"] for c in iter_chunks(text, "chapters/book.md")]
+    lines = text.splitlines(keepends=True)
+    paragraphs = [i for i, line in enumerate(lines) if len(line) > 60]
+
+    for target in (paragraphs[40], paragraphs[len(paragraphs) // 2]):
+        edited = list(lines)
+        edited[target] = edited[target].replace("the", "a", 1)
+        after = [c["id"] for c in iter_chunks("".join(edited), "chapters/book.md")]
+        assert len(set(after) - set(before)) <= 2
+
+        inserted = list(lines)
+        inserted.insert(target, "A brand new paragraph.\n\n")
+        after = [c["id"] for c in iter_chunks("".join(inserted), "chapters/book.md")]
+        assert len(set(after) - set(before)) <= 2
+
+
+def test_streams_lines_and_respects_fences_and_long_paragraphs():
+    doc = (
+        "# Notes\n\n"
+        "```\n# not a heading\n\n---\n```\n\n"
+        + "".join(f"line {i} of a very long paragraph\n" for i in range(200))
+        + "\n---\n\nAfter the break.\n"
+    )
+
+    chunks = list(iter_chunks(io.StringIO(doc), "outline/notes.md", max_tokens=100))
+
+    assert all(c["heading"] == ["Notes"] for c in chunks)
+    assert "# not a heading" in chunks[0]["text"]
+    assert max(c["tokens"] for c in chunks) <= 100
+    assert chunks[-2]["text"].endswith("---")
+    assert chunks[-1]["text"] == "After the break."
+    assert sum(c["tokens"] for c in chunks) == count_tokens(doc)
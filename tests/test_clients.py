@@ -0,0 +1,35 @@
+from storycraftr.agent.clients import ClientRegistry, PoolStats
+
+
+def test_registry_reuses_client_for_same_endpoint_and_key():
+    registry = ClientRegistry()
+    first = registry.get("http://localhost:1234/v1", "key-a")
+    second = registry.get("http://localhost:1234/v1/", "key-a")
+
+    assert first is second
+    registry.close_all()
+
+
+def test_registry_separates_keys_and_urls():
+    registry = ClientRegistry()
+    a = registry.get("http://localhost:1234/v1", "key-a")
+    b = registry.get("http://localhost:1234/v1", "key-b")
+    c = registry.get("http://localhost:5678/v1", "key-a")
+
+    assert a is not b
+    assert a is not c
+    assert len(registry.stats()) == 3
+    registry.close_all()
+
+
+def test_pool_stats_counts_opened_and_reused():
+    stats = PoolStats()
+    stats.record_request(True)
+    stats.record_request(False)
+    stats.record_request(False)
+
+    assert stats.as_dict() == {
+        "requests": 3,
+        "connections_opened": 1,
+        "connections_reused": 2,
+    }
@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+from storycraftr.agent import agents
+from storycraftr.agent.context import assemble_file_context
+from storycraftr.utils.chunker import count_tokens
+from storycraftr.utils.core import BookConfig
+
+from tests.test_tool_loop import FakeClient
+
+
+def _chapter(scenes=40):
+    parts = ["# Chapter 3\n\n"]
+    for s in range(scenes):
+        parts.append(f"## Scene {s}\n\n")
+        subject = (
+            "the lighthouse keeper hid the brass key"
+            if s == 27
+            else "rain fell on the quiet market"
+        )
+        for p in range(4):
+            parts.append(
+                f"Paragraph {p} of scene {s}: {subject}, and nobody noticed. " * 6
+                + "\n\n"
+            )
+    return "".join(parts)
+
+
+def test_short_files_are_inlined_whole():
+    text = "# Chapter 1\n\nShort.\n"
+
+    context, stats = assemble_file_context(
+        text, "chapters/chapter-1.md", "Refine it", budget_tokens=100
+    )
+
+    assert context == f"Here is the existing content to improve (for context):\n{text}"
+    assert stats["partial"] is False and stats["saved_tokens"] == 0
+
+
+def test_long_files_send_the_outline_and_relevant_passages():
+    text = _chapter()
+
+    context, stats = assemble_file_context(
+        text,
+        "chapters/chapter-3.md",
+        "Make the brass key scene tenser",
+        budget_tokens=1500,
+        sha256="abc",
+    )
+
+    assert stats["partial"] and stats["chunks"] < stats["chunks_total"]
+    assert count_tokens(context) <= 1500
+    assert stats["saved_tokens"] > stats["file_tokens"] // 2
+    assert "if_match): abc" in context
+    assert "  - ## Scene 1 (lines 13-22)" in context
+    # The opening passage and the one about the key are included; gaps are marked
+    assert "[Lines 1-" in context
+    assert "the lighthouse keeper hid the brass key" in context
+    assert "omitted]" in context
+
+
+def test_create_message_reports_the_context_savings(tmp_path):
+    (tmp_path / "chapters").mkdir()
+    chapter = tmp_path / "chapters" / "chapter-3.md"
+    chapter.write_text(_chapter(), encoding="utf-8")
+    client = FakeClient(first_output=[])
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+    with mock.patch.object(
+        agents, "initialize_async_openai_client", return_value=client
+    ), mock.patch.object(agents, "initialize_openai_client"), mock.patch.object(
+        agents,
+        "load_book_config",
+        return_value=BookConfig(retrieval="local", context_tokens=1000),
+    ):
+        agents.create_message(
+            str(tmp_path),
+            "conv",
+            "Tighten the brass key scene",
+            assistant,
+            file_path=str(chapter),
+        )
+
+    sent = json.dumps(client.calls[0]["input"])
+    assert "brass key" in sent and "of scene 5:" not in sent
+    assert agents.LAST_TIMINGS_BY_BOOK[str(tmp_path)]["context_saved_tokens"] > 0
+    assert "context: sent ~" in agents.LAST_ACTIVITY_BY_BOOK[str(tmp_path)]
@@ -0,0 +1,74 @@
+import json
+import os
+from unittest import mock
+
+from storycraftr.utils import core
+from storycraftr.utils.core import BookConfig, load_book_config
+
+
+def _write_config(book, data):
+    path = book / "storycraftr.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return path
+
+
+def test_load_book_config_returns_immutable_book_config(tmp_path):
+    _write_config(
+        tmp_path,
+        {"book_name": "Test", "alternate_languages": ["es"], "unknown_key": 1},
+    )
+
+    config = load_book_config(str(tmp_path))
+
+    assert isinstance(config, BookConfig)
+    assert config.book_name == "Test"
+    assert config.alternate_languages == ("es",)
+    assert config.openai_model == "gpt-4o"
+    # Keys without a field are kept, read-only
+    assert config.extra == {"unknown_key": 1} and config.unknown_key == 1
+    assert not hasattr(config, "missing_key")
+
+
+def test_load_book_config_reads_file_once_per_change(tmp_path):
+    path = _write_config(tmp_path, {"book_name": "First"})
+
+    with mock.patch.object(
+        core, "_parse_book_config", wraps=core._parse_book_config
+    ) as parse:
+        assert load_book_config(str(tmp_path)).book_name == "First"
+        assert load_book_config(str(tmp_path)).book_name == "First"
+        assert parse.call_count == 1
+
+        _write_config(tmp_path, {"book_name": "Second!"})
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert load_book_config(str(tmp_path)).book_name == "Second!"
+        assert parse.call_count == 2
+
+
+def test_assemble_prompt_orders_stable_sections_first():
+    prompt = core.assemble_prompt(
+        "FORMAT", "REQUEST", tool_guidance="TOOLS", book_context="CONTEXT"
+    )
+
+    assert prompt == "FORMAT\n\nTOOLS\n\nCONTEXT\n\nREQUEST"
+    assert core.assemble_prompt("FORMAT", "REQUEST") == "FORMAT\n\nREQUEST"
+
+
+def test_prompt_nonce_goes_last_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv("STORYCRAFTR_PROMPT_NONCE", raising=False)
+
+    prompt = core.generate_prompt_with_hash("STABLE", "May 1, 2025", str(tmp_path))
+    assert prompt.startswith("STABLE\n\n") and "May 1, 2025" in prompt
+
+    start = core.generate_prompt_with_hash(
+        "STABLE", "May 1, 2025", str(tmp_path), "start"
+    )
+    assert start.endswith("\n\nSTABLE")
+
+    monkeypatch.setenv("STORYCRAFTR_PROMPT_NONCE", "off")
+    assert (
+        core.generate_prompt_with_hash("STABLE", "May 1, 2025", str(tmp_path))
+        == "STABLE"
+    )
@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from storycraftr.agent.dense_index import DenseIndex, fuse_results, hashing_embedder
+
+
+def _book(tmp_path):
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "chapters" / "chapter-1.md").write_text(
+        "# Chapter 1\n\nElena sailed past the lighthouse at dawn.\n\nThe market was busy.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "chapters" / "chapter-2.md").write_text(
+        "# Chapter 2\n\nThe guild met in the cellar.\n\nNobody spoke of the fire.\n",
+        encoding="utf-8",
+    )
+    return str(tmp_path)
+
+
+def _counting(embed):
+    seen = []
+
+    def wrapped(texts):
+        seen.extend(texts)
+        return embed(texts)
+
+    return wrapped, seen
+
+
+def test_index_is_memory_mapped_and_searchable(tmp_path):
+    book = _book(tmp_path)
+    embed = hashing_embedder()
+    index = DenseIndex()
+
+    assert index.refresh(book, embed, "local")["embedded"] == 2
+
+    reopened = DenseIndex().open(book)
+    assert isinstance(reopened.vectors, np.memmap)
+    assert reopened.vectors.dtype == np.float32 and reopened.vectors.shape[0] == 2
+    results = DenseIndex().search(book, embed(["guild cellar"])[0], max_results=1)
+    assert results[0]["path"] == "chapters/chapter-2.md"
+    assert "cellar" in results[0]["text"]
+    assert (
+        DenseIndex().search(
+            book, embed(["guild"])[0], path_prefix="chapters/chapter-1.md"
+        )[0]["path"]
+        == "chapters/chapter-1.md"
+    )
+
+
+def test_only_changed_chunks_are_embedded(tmp_path):
+    book = _book(tmp_path)
+    embed, seen = _counting(hashing_embedder())
+    DenseIndex().refresh(book, embed, "local")
+    seen.clear()
+
+    chapter = tmp_path / "chapters" / "chapter-1.md"
+    chapter.write_text(
+        chapter.read_text(encoding="utf-8") + "\n# Later\n", encoding="utf-8"
+    )
+    assert DenseIndex().refresh(book, embed, "local")["files_changed"] == 1
+    # The new heading starts its own chunk; only it is embedded, the rest is reused
+    assert seen == ["# Later"]
+
+    seen.clear()
+    assert DenseIndex().refresh(book, embed, "local")["embedded"] == 0
+    # A different model invalidates every stored vector
+    assert DenseIndex().refresh(book, embed, "other")["embedded"] == 3
+
+
+def test_fuse_results_rewards_agreement():
+    a = [
+        {"path": "a.md", "start_line": 1, "end_line": 2},
+        {"path": "b.md", "start_line": 1, "end_line": 2},
+    ]
+    b = [
+        {"path": "b.md", "start_line": 1, "end_line": 2},
+        {"path": "c.md", "start_line": 1, "end_line": 2},
+    ]
+
+    fused = fuse_results(a, b, max_results=2)
+
+    assert [r["path"] for r in fused] == ["b.md", "a.md"]
+
+
+def test_hybrid_book_search_fuses_bm25_and_dense(tmp_path):
+    from storycraftr.agent import agents
+    from storycraftr.utils.core import BookConfig
+
+    book = _book(tmp_path)
+    config = BookConfig(retrieval="hybrid", embedding_model="local")
+
+    result = agents._book_search(
+        book, "hybrid", config, {"query": "lighthouse", "max_results": 1}
+    )
+
+    assert [r["path"] for r in result["results"]] == ["chapters/chapter-1.md"]
+    assert (tmp_path / ".storycraftr" / "index" / "dense" / "vectors.npy").exists()
@@ -0,0 +1,91 @@
+import threading
+
+from storycraftr.agent.agents import _fs_apply_text_edits, _read_text_file
+from storycraftr.utils.locks import path_lock
+from storycraftr.utils.markdown import save_to_markdown
+
+
+def _insert(anchor, line):
+    return [{"type": "insert_after", "anchor": anchor, "insert": line}]
+
+
+def test_stale_hash_replays_edits_when_anchors_still_match(tmp_path):
+    chapter = tmp_path / "ch.md"
+    chapter.write_text("# Title\nFirst.\nSecond.\n", encoding="utf-8")
+    seen = _read_text_file(str(tmp_path), "ch.md")["sha256"]
+    chapter.write_text("# Title\nFirst.\nSecond.\nThird.\n", encoding="utf-8")
+
+    result = _fs_apply_text_edits(
+        str(tmp_path),
+        "ch.md",
+        [{"type": "replace_text", "find": "First.", "replace": "One."}],
+        if_match=seen,
+    )
+
+    assert result["rebased"] is True and result["changes"] == 1
+    assert chapter.read_text(encoding="utf-8") == "# Title\nOne.\nSecond.\nThird.\n"
+    assert result["sha256"] == _read_text_file(str(tmp_path), "ch.md")["sha256"]
+
+
+def test_stale_hash_with_missing_anchor_is_a_conflict(tmp_path):
+    chapter = tmp_path / "ch.md"
+    chapter.write_text("# Title\nFirst.\n", encoding="utf-8")
+    seen = _read_text_file(str(tmp_path), "ch.md")["sha256"]
+    chapter.write_text("# Title\nRewritten.\n", encoding="utf-8")
+
+    result = _fs_apply_text_edits(
+        str(tmp_path),
+        "ch.md",
+        [
+            _insert("# Title", "\nNew.")[0],
+            {"type": "replace_text", "find": "First.", "replace": "One."},
+        ],
+        if_match=seen,
+    )
+
+    assert result["conflict"] is True and result["unresolved_edits"] == [1]
+    assert chapter.read_text(encoding="utf-8") == "# Title\nRewritten.\n"
+
+    fresh = _read_text_file(str(tmp_path), "ch.md")["sha256"]
+    ok = _fs_apply_text_edits(
+        str(tmp_path), "ch.md", _insert("Rewritten.", " Yes."), if_match=fresh
+    )
+    assert "rebased" not in ok and ok["changes"] == 1
+
+
+def test_concurrent_edits_to_one_file_are_not_lost(tmp_path):
+    chapter = tmp_path / "ch.md"
+    chapter.write_text("# Title\n", encoding="utf-8")
+    barrier = threading.Barrier(8)
+
+    def worker(n):
+        barrier.wait()
+        _fs_apply_text_edits(str(tmp_path), "ch.md", _insert("# Title", f"\nline {n}"))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = chapter.read_text(encoding="utf-8")
+    assert all(f"line {n}" in text for n in range(8))
+
+
+def test_whole_file_saves_wait_for_an_edit_in_progress(tmp_path):
+    chapter = tmp_path / "chapters" / "ch.md"
+    chapter.parent.mkdir()
+    chapter.write_text("# Title\n", encoding="utf-8")
+
+    with path_lock(str(tmp_path), str(chapter)):
+        saver = threading.Thread(
+            target=save_to_markdown,
+            args=(str(tmp_path), "chapters/ch.md", "Saved", "Body"),
+        )
+        saver.start()
+        saver.join(0.2)
+        assert saver.is_alive()
+        assert chapter.read_text(encoding="utf-8") == "# Title\n"
+    saver.join()
+
+    assert chapter.read_text(encoding="utf-8") == "# Saved\n\nBody"
@@ -0,0 +1,124 @@
+import random
+
+from storycraftr.agent.edit_plan import apply_edit_plan, apply_edits_sequentially
+
+WORDS = [
+    "Mara",
+    "mara",
+    "storm",
+    "the",
+    "harbor",
+    "light",
+    "said",
+    '"Run"',
+    "“Run”",
+    "don't",
+    "don’t",
+    "well-known",
+    "well—known",
+    "a",
+    "aa",
+    "#",
+]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "\n\n", "\t", ", ", ". "]
+
+
+def _text(rng, words):
+    out = []
+    for _ in range(words):
+        out.append(rng.choice(WORDS))
+        out.append(rng.choice(SEPARATORS))
+    return "".join(out)
+
+
+def _anchor(rng, text):
+    if text and rng.random() < 0.8:
+        start = rng.randrange(len(text))
+        anchor = text[start : start + rng.randint(1, 14)]
+        if anchor.strip():
+            return anchor
+    return rng.choice(WORDS)
+
+
+def _edit(rng, text):
+    options = {
+        "case_sensitive": rng.random() < 0.7,
+        "loose_whitespace": rng.random() < 0.7,
+        "normalize_quotes": rng.random() < 0.7,
+    }
+    if rng.random() < 0.5:
+        options["occurrence"] = rng.choice([None, 1, 1, 2, 3])
+    kind = rng.choice(
+        ["replace_text", "replace_between", "insert_before", "insert_after"]
+    )
+    if kind == "replace_text":
+        return {
+            "type": kind,
+            "find": _anchor(rng, text),
+            "replace": _text(rng, rng.randint(0, 2)),
+            **options,
+        }
+    if kind == "replace_between":
+        return {
+            "type": kind,
+            "start_marker": _anchor(rng, text),
+            "end_marker": _anchor(rng, text),
+            "replacement": _text(rng, rng.randint(0, 2)),
+            "include_markers": rng.random() < 0.5,
+            **options,
+        }
+    return {
+        "type": kind,
+        "anchor": _anchor(rng, text),
+        "insert": _text(rng, rng.randint(0, 2)),
+        **options,
+    }
+
+
+def test_plan_matches_sequential_semantics_on_random_plans():
+    rng = random.Random(20241018)
+    compiled = 0
+    for _ in range(3000):
+        text = _text(rng, rng.randint(0, 60))
+        edits = [_edit(rng, text) for _ in range(rng.randint(1, 6))]
+
+        plan = apply_edit_plan(text, edits)
+
+        assert (plan["content"], plan["changes"]) == apply_edits_sequentially(
+            text, edits
+        ), edits
+        compiled += plan["compiled"]
+    # The single-pass path must actually be exercised, not just the fallback
+    assert compiled > 300
+
+
+def test_dependent_edits_fall_back_to_sequential_order():
+    text = "Alpha beta gamma."
+    edits = [
+        {"type": "replace_text", "find": "beta", "replace": "delta"},
+        {"type": "replace_text", "find": "delta", "replace": "epsilon"},
+        {"type": "insert_after", "anchor": "Alpha", "insert": "!"},
+    ]
+
+    plan = apply_edit_plan(text, edits)
+
+    assert plan == {"content": "Alpha! epsilon gamma.", "changes": 3, "compiled": False}
+
+
+def test_large_independent_plan_is_compiled():
+    paragraphs = [f"Paragraph {i} opens here. The tide rolls in.\n" for i in range(400)]
+    text = "".join(paragraphs)
+    edits = [
+        {
+            "type": "replace_text",
+            "find": f"Paragraph {i} opens",
+            "replace": f"Section {i} begins",
+            "occurrence": 1,
+        }
+        for i in range(0, 400, 10)
+    ]
+
+    plan = apply_edit_plan(text, edits)
+
+    assert plan["compiled"] is True and plan["changes"] == 40
+    assert (plan["content"], plan["changes"]) == apply_edits_sequentially(text, edits)
@@ -0,0 +1,116 @@
+import hashlib
+import json
+
+from storycraftr.utils.journal import (
+    atomic_write_text,
+    begin_batch,
+    detach_batch,
+    end_batch,
+    interrupted_batches,
+    read_journal,
+    recover_writes,
+)
+
+
+def _book(tmp_path):
+    (tmp_path / "storycraftr.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "chapters").mkdir()
+    return tmp_path
+
+
+def _torn_write(book, name, text, complete):
+    """Journal a write whose process died before the rename."""
+    tmp = book / "chapters" / f".{name}.1.abcd.tmp"
+    tmp.write_text(text if complete else text[: len(text) // 2], encoding="utf-8")
+    record = {
+        "op": "write",
+        "id": name,
+        "path": f"chapters/{name}",
+        "tmp": f"chapters/{tmp.name}",
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+    }
+    with open(book / ".storycraftr" / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return tmp
+
+
+def test_atomic_write_journals_and_keeps_backups(tmp_path):
+    book = _book(tmp_path)
+    chapter = book / "chapters" / "one.md"
+    atomic_write_text(chapter, "v1")
+    atomic_write_text(chapter, "v2", backup=True)
+
+    assert chapter.read_text(encoding="utf-8") == "v2"
+    assert (book / "chapters" / "one.md.back").read_text(encoding="utf-8") == "v1"
+    ops = [r["op"] for r in read_journal(str(book))]
+    assert ops == ["write", "commit", "write", "commit"]
+    before = read_journal(str(book))[2]["before"]
+    snapshot = book / ".storycraftr" / "backups" / before[:2] / f"{before}.md"
+    assert snapshot.read_text(encoding="utf-8") == "v1"
+
+
+def test_recover_rolls_complete_writes_forward_and_torn_ones_back(tmp_path):
+    book = _book(tmp_path)
+    atomic_write_text(book / "chapters" / "a.md", "old a")
+    atomic_write_text(book / "chapters" / "b.md", "old b")
+    done_tmp = _torn_write(book, "a.md", "new a", complete=True)
+    torn_tmp = _torn_write(book, "b.md", "new b is long", complete=False)
+
+    repaired = recover_writes(str(book))
+
+    assert {r["path"]: r["action"] for r in repaired} == {
+        "chapters/a.md": "rolled_forward",
+        "chapters/b.md": "rolled_back",
+    }
+    assert (book / "chapters" / "a.md").read_text(encoding="utf-8") == "new a"
+    assert (book / "chapters" / "b.md").read_text(encoding="utf-8") == "old b"
+    assert not done_tmp.exists() and not torn_tmp.exists()
+    assert recover_writes(str(book)) == []
+
+
+def test_interrupted_batch_lists_finished_files(tmp_path):
+    book = _book(tmp_path)
+    files = [str(book / "chapters" / n) for n in ("a.md", "b.md")]
+    batch = begin_batch(str(book), "iterate", files)
+    atomic_write_text(files[0], "done", batch=batch)
+    # Other writes while the batch runs (tool edits, UI saves) do not count
+    atomic_write_text(files[1], "tool edit")
+    atomic_write_text(book / "chapters" / "c.md", "stray", batch=batch)
+    detach_batch(str(book), batch)
+
+    assert interrupted_batches(str(book)) == [
+        {
+            "id": batch,
+            "name": "iterate",
+            "files": ["chapters/a.md", "chapters/b.md"],
+            "done": ["chapters/a.md"],
+        }
+    ]
+    end_batch(str(book), batch)
+    assert interrupted_batches(str(book)) == []
+
+
+def test_compaction_keeps_records_appended_by_other_threads(tmp_path, monkeypatch):
+    import threading
+
+    from storycraftr.utils import journal
+
+    monkeypatch.setattr(journal, "JOURNAL_COMPACT_BYTES", 1)
+    book = _book(tmp_path)
+    files = [str(book / "chapters" / f"{n}.md") for n in range(40)]
+    batch = begin_batch(str(book), "iterate", files)
+
+    def worker(paths):
+        for path in paths:
+            atomic_write_text(path, "done", batch=batch)
+
+    threads = [threading.Thread(target=worker, args=(files[i::8],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    detach_batch(str(book), batch)
+
+    [interrupted] = interrupted_batches(str(book))
+    assert sorted(interrupted["done"]) == sorted(f"chapters/{n}.md" for n in range(40))
+    assert recover_writes(str(book)) == []
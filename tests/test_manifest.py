@@ -0,0 +1,93 @@
+from unittest import mock
+
+from storycraftr.agent import agents
+from storycraftr.utils.core import list_book_content_files
+from storycraftr.utils.manifest import BookManifest, book_manifest
+
+
+def _book(tmp_path):
+    (tmp_path / "storycraftr.json").write_text("{}", encoding="utf-8")
+    (tmp_path / "chapters").mkdir()
+    for n in (1, 2, 10):
+        (tmp_path / "chapters" / f"chapter-{n}.md").write_text(
+            f"# Chapter {n}\n\n## Arrival\n\nElena reached the harbour at dawn.\n",
+            encoding="utf-8",
+        )
+    (tmp_path / "chapters" / "cover.md").write_text("# Cover\n", encoding="utf-8")
+    (tmp_path / "outline").mkdir()
+    (tmp_path / "outline" / "iterate.md").write_text(
+        "# Notes\n\n\n\n", encoding="utf-8"
+    )
+    (tmp_path / ".storycraftr").mkdir()
+    (tmp_path / ".storycraftr" / "cache.json").write_text("{}", encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_entries_describe_each_file(tmp_path):
+    book = _book(tmp_path)
+
+    entries = BookManifest().refresh(book)
+
+    assert sorted(entries) == [
+        "chapters/chapter-1.md",
+        "chapters/chapter-10.md",
+        "chapters/chapter-2.md",
+        "chapters/cover.md",
+        "outline/iterate.md",
+        "storycraftr.json",
+    ]
+    chapter = entries["chapters/chapter-2.md"]
+    assert (chapter["kind"], chapter["chapter"], chapter["content"]) == (
+        "chapters",
+        2,
+        True,
+    )
+    assert (chapter["lines"], chapter["words"]) == (5, 11)
+    assert [h["title"] for h in chapter["headings"]] == ["Chapter 2", "Arrival"]
+    assert entries["storycraftr.json"]["kind"] == "config"
+    assert entries["outline/iterate.md"]["content"] is False
+    assert [e["chapter"] for e in BookManifest().chapters(book)] == [1, 2, 10]
+
+
+def test_refresh_reads_only_changed_files(tmp_path):
+    book = _book(tmp_path)
+    BookManifest().refresh(book)
+
+    # A new process stats the files and trusts the saved manifest
+    manifest = BookManifest()
+    with mock.patch("storycraftr.utils.manifest._analyze") as analyze:
+        manifest.refresh(book)
+        analyze.assert_not_called()
+
+    (tmp_path / "chapters" / "chapter-1.md").write_text(
+        "# Chapter 1\n\nRewritten.\n", encoding="utf-8"
+    )
+    (tmp_path / "chapters" / "chapter-10.md").unlink()
+    with mock.patch(
+        "storycraftr.utils.manifest._analyze", wraps=lambda path: {"lines": 3}
+    ) as analyze:
+        entries = manifest.refresh(book)
+        assert [
+            call.args[0].endswith("chapter-1.md") for call in analyze.call_args_list
+        ] == [True]
+    assert "chapters/chapter-10.md" not in entries
+    assert [e["chapter"] for e in BookManifest().chapters(book)] == [1, 2]
+
+
+def test_content_listing_and_markdown_loading_use_the_manifest(tmp_path):
+    book = _book(tmp_path)
+    book_manifest.refresh(book)
+
+    # Unchanged files are neither re-read nor re-hashed
+    with mock.patch("storycraftr.utils.manifest._analyze") as analyze:
+        listed = list_book_content_files(book)
+        loaded = agents.load_markdown_files(book)
+        analyze.assert_not_called()
+    assert [p[len(book) + 1 :] for p in listed] == [
+        "chapters/chapter-1.md",
+        "chapters/chapter-10.md",
+        "chapters/chapter-2.md",
+        "chapters/cover.md",
+    ]
+    # cover.md has a single line, so it is not loaded
+    assert loaded == listed[:3]
@@ -18,59 +18,45 @@ def mock_console():
 
 
 # Test para save_to_markdown
-@mock.patch("shutil.copyfile")
-@mock.patch("os.path.exists", return_value=True)
-@mock.patch("builtins.open", new_callable=mock.mock_open)
-def test_save_to_markdown_backup(mock_open, mock_exists, mock_copy, mock_console):
-    book_path = "test_book"
-    file_name = "test.md"
+def test_save_to_markdown_backup(tmp_path, mock_console):
+    (tmp_path / "test.md").write_text("Old content", encoding="utf-8")
     header = "Test Header"
     content = "Test content"
 
-    save_to_markdown(book_path, file_name, header, content)
+    save_to_markdown(str(tmp_path), "test.md", header, content)
 
     # Verificar que se realizó una copia de seguridad
-    mock_copy.assert_called_with(
-        os.path.join(book_path, file_name), os.path.join(book_path, file_name) + ".back"
-    )
-    mock_open.assert_called_with(
-        os.path.join(book_path, file_name), "w", encoding="utf-8"
-    )
-    mock_open().write.assert_called_with(f"# {header}\n\n{content}")
+    assert (tmp_path / "test.md.back").read_text(encoding="utf-8") == "Old content"
+    assert (tmp_path / "test.md").read_text(
+        encoding="utf-8"
+    ) == f"# {header}\n\n{content}"
+    assert not list(tmp_path.glob(".test.md.*.tmp"))
 
 
-@mock.patch("os.path.exists", return_value=False)
-@mock.patch("builtins.open", new_callable=mock.mock_open)
-def test_save_to_markdown_no_backup(mock_open, mock_exists, mock_console):
-    book_path = "test_book"
-    file_name = "test.md"
+def test_save_to_markdown_no_backup(tmp_path, mock_console):
     header = "Test Header"
     content = "Test content"
 
-    save_to_markdown(book_path, file_name, header, content)
+    save_to_markdown(str(tmp_path), "test.md", header, content)
 
     # Verificar que no se hizo copia de seguridad
-    mock_open.assert_called_with(
-        os.path.join(book_path, file_name), "w", encoding="utf-8"
-    )
-    mock_open().write.assert_called_with(f"# {header}\n\n{content}")
+    assert not (tmp_path / "test.md.back").exists()
+    assert (tmp_path / "test.md").read_text(
+        encoding="utf-8"
+    ) == f"# {header}\n\n{content}"
 
 
 # Test para append_to_markdown
-@mock.patch("os.path.exists", return_value=True)
-@mock.patch("builtins.open", new_callable=mock.mock_open)
-def test_append_to_markdown_success(mock_open, mock_exists, mock_console):
-    book_path = "test_book"
-    folder_name = "test_folder"
-    file_name = "test.md"
+def test_append_to_markdown_success(tmp_path, mock_console):
+    (tmp_path / "test_folder").mkdir()
+    (tmp_path / "test_folder" / "test.md").write_text("Start", encoding="utf-8")
     content = "Appended content"
 
-    append_to_markdown(book_path, folder_name, file_name, content)
+    append_to_markdown(str(tmp_path), "test_folder", "test.md", content)
 
-    mock_open.assert_called_with(
-        os.path.join(book_path, folder_name, file_name), "a", encoding="utf-8"
-    )
-    mock_open().write.assert_called_with(f"\n\n{content}")
+    assert (tmp_path / "test_folder" / "test.md").read_text(
+        encoding="utf-8"
+    ) == f"Start\n\n{content}"
 
 
 @mock.patch("os.path.exists", return_value=False)
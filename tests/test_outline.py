@@ -0,0 +1,82 @@
+import hashlib
+
+from storycraftr.agent.agents import _fs_apply_text_edits, _fs_outline, _read_text_file
+from storycraftr.utils.outline import find_section, markdown_outline
+
+DOC = """# Chapter One
+Intro line.
+
+## The Storm
+Rain fell.
+```
+# not a heading
+```
+
+## Aftermath
+Quiet.
+# Chapter Two
+Épilogue.
+"""
+
+
+def test_outline_levels_ranges_and_offsets():
+    outline = markdown_outline(DOC)
+
+    assert [(h["level"], h["title"]) for h in outline] == [
+        (1, "Chapter One"),
+        (2, "The Storm"),
+        (2, "Aftermath"),
+        (1, "Chapter Two"),
+    ]
+    assert (outline[0]["start_line"], outline[0]["end_line"]) == (1, 11)
+    assert (outline[1]["start_line"], outline[1]["end_line"]) == (4, 9)
+    data = DOC.encode("utf-8")
+    storm = data[outline[1]["byte_offset"] : outline[1]["end_byte"]].decode("utf-8")
+    assert storm.startswith("## The Storm") and storm.endswith("```\n\n")
+    assert outline[-1]["end_byte"] == len(data)
+    assert find_section(DOC, "## aftermath")["start_line"] == 10
+    assert find_section(DOC, "chapter")["title"] == "Chapter One"
+    assert find_section(DOC, "missing") is None
+
+
+def test_ranged_and_section_reads(tmp_path):
+    (tmp_path / "ch.md").write_text(DOC, encoding="utf-8")
+
+    section = _read_text_file(str(tmp_path), "ch.md", section="Aftermath")
+    assert section["content"] == "## Aftermath\nQuiet.\n"
+    assert section["start_line"] == 10 and section["total_lines"] == 13
+
+    lines = _read_text_file(str(tmp_path), "ch.md", start_line=12, end_line=99)
+    assert lines["content"] == "# Chapter Two\nÉpilogue.\n" and lines["end_line"] == 13
+
+    # A byte range that splits "É" drops the partial character
+    start = DOC.encode("utf-8").index("É".encode("utf-8")) + 1
+    chunk = _read_text_file(str(tmp_path), "ch.md", start_byte=start)
+    assert chunk["content"] == "pilogue.\n"
+
+    assert "error" in _read_text_file(str(tmp_path), "ch.md", section="Nope")
+    assert len(_fs_outline(str(tmp_path), "ch.md")["headings"]) == 4
+
+
+def test_edit_result_reports_hash_and_spans(tmp_path):
+    (tmp_path / "ch.md").write_text(DOC, encoding="utf-8")
+
+    result = _fs_apply_text_edits(
+        str(tmp_path),
+        "ch.md",
+        [
+            {
+                "type": "replace_text",
+                "find": "Quiet.",
+                "replace": "Quiet.\nToo quiet.",
+                "occurrence": 1,
+            }
+        ],
+    )
+
+    written = (tmp_path / "ch.md").read_text(encoding="utf-8")
+    assert "preview" not in result
+    assert result["sha256"] == hashlib.sha256(written.encode("utf-8")).hexdigest()
+    assert result["spans"] == [
+        {"start_line": 12, "end_line": 12, "old_lines": 0, "new_lines": 1}
+    ]
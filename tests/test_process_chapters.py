@@ -0,0 +1,183 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from storycraftr.agent import agents
+
+
+def _book(tmp_path, count=5):
+    for folder in ("chapters", "outline", "worldbuilding"):
+        (tmp_path / folder).mkdir()
+    for i in range(1, count + 1):
+        (tmp_path / "chapters" / f"chapter-{i}.md").write_text(
+            f"# Chapter {i}\n", encoding="utf-8"
+        )
+    (tmp_path / "chapters" / "cover.md").write_text("# Cover\n", encoding="utf-8")
+    return tmp_path
+
+
+def _patches(acreate):
+    return (
+        mock.patch.object(
+            agents, "create_or_get_assistant", return_value=SimpleNamespace(name="a")
+        ),
+        mock.patch.object(
+            agents,
+            "get_thread",
+            side_effect=lambda book_path, agent_name: SimpleNamespace(id=agent_name),
+        ),
+        mock.patch.object(agents, "acreate_message", side_effect=acreate),
+        mock.patch.object(agents, "mark_book_dirty"),
+    )
+
+
+def test_parallel_jobs_isolate_workers_and_sync_once(tmp_path):
+    book = _book(tmp_path)
+    active, peak, threads = 0, 0, set()
+
+    async def fake_acreate(book_path, thread_id, content, assistant, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        threads.add(thread_id)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return f"done {kwargs['file_path']}"
+
+    saved = []
+    save = lambda book_path, path, suffix, text, **kw: saved.append(path)
+    p1, p2, p3, p4 = _patches(fake_acreate)
+    with p1, p2, p3, p4 as dirty:
+        agents.process_chapters(
+            save, str(book), "prompt", "Task", "Suffix", agent_name="check", jobs=3
+        )
+
+    assert len(saved) == 5
+    assert peak == 3
+    assert threads <= {"check-1", "check-2", "check-3"}
+    dirty.assert_called_once()
+
+
+def test_parallel_failure_does_not_stop_other_files(tmp_path):
+    book = _book(tmp_path, count=3)
+
+    async def fake_acreate(book_path, thread_id, content, assistant, **kwargs):
+        if kwargs["file_path"].endswith("chapter-2.md"):
+            raise ValueError("boom")
+        return "ok"
+
+    saved = []
+    save = lambda book_path, path, suffix, text, **kw: saved.append(path)
+    p1, p2, p3, p4 = _patches(fake_acreate)
+    with p1, p2, p3, p4 as dirty:
+        with pytest.raises(RuntimeError, match="chapter-2.md"):
+            agents.process_chapters(save, str(book), "prompt", "Task", "Suffix", jobs=2)
+
+    assert len(saved) == 2
+    dirty.assert_called_once()
+
+
+def test_interrupted_run_resumes_after_finished_files(tmp_path):
+    from storycraftr.utils.markdown import save_to_markdown
+
+    book = _book(tmp_path, count=3)
+    fail = True
+    seen = []
+
+    async def fake_acreate(book_path, thread_id, content, assistant, **kwargs):
+        seen.append(kwargs["file_path"])
+        if fail and kwargs["file_path"].endswith("chapter-2.md"):
+            raise ValueError("boom")
+        return "ok"
+
+    p1, p2, p3, p4 = _patches(fake_acreate)
+    with p1, p2, p3, p4:
+        with pytest.raises(RuntimeError):
+            agents.process_chapters(
+                save_to_markdown,
+                str(book),
+                "prompt",
+                "Task",
+                "Suffix",
+                agent_name="resume",
+                jobs=2,
+            )
+        fail = False
+        seen.clear()
+        agents.process_chapters(
+            save_to_markdown,
+            str(book),
+            "prompt",
+            "Task",
+            "Suffix",
+            agent_name="resume",
+            jobs=2,
+        )
+
+    assert [path.rsplit("/", 1)[-1] for path in seen] == ["chapter-2.md"]
+    assert agents.interrupted_batches(str(book)) == []
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_long_chapters_are_sent_whole_when_the_reply_replaces_them(tmp_path, jobs):
+    from storycraftr.utils.core import BookConfig
+
+    from tests.test_tool_loop import _response
+
+    book = _book(tmp_path, count=2)
+    long_text = "# Chapter 1\n\n" + "".join(
+        f"Paragraph {i}: the keeper climbed the stairs again.\n\n" for i in range(300)
+    )
+    (book / "chapters" / "chapter-1.md").write_text(long_text, encoding="utf-8")
+
+    async def echo(**kwargs):
+        # The model "rewrites" the chapter from what it was sent
+        return _response("r", [], text=kwargs["input"][0]["content"])
+
+    client = SimpleNamespace(responses=SimpleNamespace(create=echo))
+    saved = {}
+    save = lambda book_path, path, suffix, text, **kw: saved.__setitem__(path, text)
+    with mock.patch.object(
+        agents,
+        "create_or_get_assistant",
+        return_value=SimpleNamespace(name="a", model="m", instructions=""),
+    ), mock.patch.object(
+        agents,
+        "get_thread",
+        side_effect=lambda book_path, agent_name: SimpleNamespace(id="t"),
+    ), mock.patch.object(
+        agents, "mark_book_dirty"
+    ), mock.patch.object(
+        agents, "initialize_async_openai_client", return_value=client
+    ), mock.patch.object(
+        agents, "initialize_openai_client"
+    ), mock.patch.object(
+        agents,
+        "load_book_config",
+        return_value=BookConfig(retrieval="local", context_tokens=200),
+    ):
+        agents.process_chapters(save, str(book), "Refine", "Task", "Suffix", jobs=jobs)
+
+    reply = next(text for path, text in saved.items() if path.endswith("chapter-1.md"))
+    assert long_text.strip() in reply
+    assert "omitted]" not in reply
+
+
+def test_check_consistency_runs_files_concurrently(tmp_path):
+    from storycraftr.agent.story.iterate import check_consistency_across
+
+    book = _book(tmp_path, count=4)
+    threads = set()
+
+    async def fake_acreate(book_path, thread_id, content, assistant, **kwargs):
+        threads.add(thread_id)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    p1, p2, p3, p4 = _patches(fake_acreate)
+    with p1, p2, p3, p4:
+        check_consistency_across(str(book), "plot", jobs=2)
+
+    assert threads == {"check-consistency-1", "check-consistency-2"}
@@ -0,0 +1,57 @@
+import gzip
+import json
+import time
+
+import yaml
+
+from storycraftr.utils import prompt_log
+from storycraftr.utils.core import generate_prompt_with_hash
+
+
+def test_prompts_are_appended_and_read_back(tmp_path):
+    for i in range(3):
+        generate_prompt_with_hash(f"prompt {i}", "May 1, 2025", str(tmp_path))
+
+    active = tmp_path / ".storycraftr" / "prompts" / "prompts.jsonl"
+    assert len(active.read_text(encoding="utf-8").splitlines()) == 3
+    records = list(prompt_log.read_prompt_log(str(tmp_path)))
+    assert [r["original_prompt"] for r in records] == [
+        "prompt 0",
+        "prompt 1",
+        "prompt 2",
+    ]
+    assert records[0]["date"] == "May 1, 2025"
+    assert list(prompt_log.read_prompt_log(str(tmp_path), since=time.time() + 60)) == []
+
+
+def test_legacy_yaml_is_imported_once(tmp_path):
+    legacy = [{"date": "Jan 1", "original_prompt": "old"}]
+    (tmp_path / "prompts.yaml").write_text(yaml.dump(legacy), encoding="utf-8")
+
+    prompt_log.log_prompt(str(tmp_path), {"original_prompt": "new"})
+    prompt_log.log_prompt(str(tmp_path), {"original_prompt": "newer"})
+
+    assert not (tmp_path / "prompts.yaml").exists()
+    assert (tmp_path / "prompts.yaml.migrated").exists()
+    prompts = [r["original_prompt"] for r in prompt_log.read_prompt_log(str(tmp_path))]
+    assert prompts == ["old", "new", "newer"]
+
+
+def test_rotation_compresses_and_prunes(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_log, "MAX_BYTES", 200)
+    monkeypatch.setattr(prompt_log, "KEEP_ROTATED", 2)
+    for i in range(12):
+        prompt_log.log_prompt(str(tmp_path), {"original_prompt": f"p{i}" + "x" * 80})
+        time.sleep(0.001)
+
+    directory = tmp_path / ".storycraftr" / "prompts"
+    rotated = sorted(p.name for p in directory.glob("prompts-*"))
+    assert len(rotated) == 2 and all(name.endswith(".jsonl.gz") for name in rotated)
+    with gzip.open(directory / rotated[0], "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["original_prompt"].startswith("p")
+    # Only the newest records survive pruning, still in order
+    prompts = [
+        r["original_prompt"][:3] for r in prompt_log.read_prompt_log(str(tmp_path))
+    ]
+    assert prompts == sorted(prompts, key=lambda p: int(p[1:].rstrip("x")))
+    assert prompts[-1] == "p11"
@@ -0,0 +1,78 @@
+import os
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from storycraftr.agent import agents
+from storycraftr.agent.response_cache import ResponseCache
+from storycraftr.utils.core import BookConfig
+from storycraftr.utils.prompt_log import read_prompt_log
+
+
+def test_key_ignores_instruction_whitespace_and_tracks_files():
+    cache = ResponseCache(enabled=True)
+    base = cache.make_key("m", "Be  concise.\n", "prompt", {"file:a.md": "1"})
+
+    assert base == cache.make_key("m", "Be concise.", "prompt", {"file:a.md": "1"})
+    assert base != cache.make_key("m", "Be concise.", "prompt", {"file:a.md": "2"})
+    assert base != cache.make_key("m2", "Be concise.", "prompt", {"file:a.md": "1"})
+    assert base != cache.make_key(
+        "m", "Be concise.", "prompt", {"file:a.md": "1"}, tools=[{"name": "x"}]
+    )
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResponseCache(enabled=True, ttl=60, max_entries=2)
+    cache.put(str(tmp_path), "a", "A")
+    cache.put(str(tmp_path), "b", "B")
+    entries = tmp_path / ".storycraftr" / "responses"
+    old = time.time() - 30
+    os.utime(entries / "a.json", (old, old))
+    os.utime(entries / "b.json", (old - 1, old - 1))
+
+    assert cache.get(str(tmp_path), "b")["text"] == "B"  # refreshes b
+    cache.put(str(tmp_path), "c", "C")
+
+    assert cache.get(str(tmp_path), "a") is None
+    assert cache.get(str(tmp_path), "b")["text"] == "B"
+    assert cache.stats()["evictions"] == 1
+
+    expired = ResponseCache(enabled=True, ttl=0)
+    assert expired.get(str(tmp_path), "c") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_identical_requests_replay_from_cache(tmp_path):
+    cache = ResponseCache(enabled=True)
+    client = mock.Mock()
+
+    async def create(**kwargs):
+        client.calls.append(kwargs)
+        return SimpleNamespace(output_text="Answer", output=[], model_dump=lambda: {})
+
+    client.calls = []
+    client.responses.create = create
+
+    async def no_lookup(book_path, name, sync_client, fn):
+        return await fn(None)
+
+    assistant = SimpleNamespace(name="book", model="m", instructions="Write well.")
+    with mock.patch.object(agents, "response_cache", cache), mock.patch.object(
+        agents, "initialize_async_openai_client", return_value=client
+    ), mock.patch.object(agents, "initialize_openai_client"), mock.patch.object(
+        agents, "load_book_config", return_value=BookConfig()
+    ), mock.patch.object(
+        agents, "_acall_with_vector_store", side_effect=no_lookup
+    ):
+        first = agents.create_message(str(tmp_path), "conv", "Hi", assistant)
+        second = agents.create_message(str(tmp_path), "conv", "Hi", assistant)
+        cache.set_enabled(False)
+        agents.create_message(str(tmp_path), "conv", "Hi", assistant)
+
+    assert first == second == "Answer"
+    assert len(client.calls) == 2
+    # The replayed request is logged too, marked as cached
+    logged = list(read_prompt_log(str(tmp_path)))
+    assert [r.get("cached", False) for r in logged] == [False, True, False]
+    assert logged[0]["original_prompt"] == logged[1]["original_prompt"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "stores": 1, "evictions": 0}
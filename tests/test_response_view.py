@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+from storycraftr.agent.response_view import ResponseView
+
+
+RAW = {
+    "id": "resp_1",
+    "output": [
+        {"type": "reasoning", "summary": []},
+        {"type": "file_search_call", "queries": ["Elena", "the harbour"]},
+        {
+            "type": "function_call",
+            "name": "fs_read_text",
+            "arguments": '{"path": "chapters/chapter-1.md"}',
+            "call_id": "call_1",
+        },
+        {
+            "type": "message",
+            "content": [
+                {"type": "output_text", "text": "First part."},
+                {"type": "output_text", "text": "First part."},
+                {"type": "output_text", "text": "Second part."},
+            ],
+        },
+    ],
+    "reasoning": {"summary": "  Checked the chapter.  "},
+    "usage": {"input_tokens": 900, "input_tokens_details": {"cached_tokens": 512}},
+}
+
+
+def test_view_reads_dict_responses():
+    view = ResponseView(RAW)
+
+    assert view.id == "resp_1"
+    assert view.output is RAW["output"]
+    assert view.text == "First part.\nSecond part."
+    assert view.tool_calls == [
+        {
+            "name": "fs_read_text",
+            "arguments": '{"path": "chapters/chapter-1.md"}',
+            "call_id": "call_1",
+        }
+    ]
+    assert view.model_calls == [
+        {"name": "fs_read_text", "arguments": '{"path": "chapters/chapter-1.md"}'}
+    ]
+    assert view.file_search_queries == [["Elena", "the harbour"]]
+    assert view.reasoning_summary == "Checked the chapter."
+    assert view.usage == {"input_tokens": 900, "cached_tokens": 512}
+
+
+def test_view_reads_sdk_objects_without_model_dump():
+    def _fail():
+        raise AssertionError("model_dump should not be called")
+
+    item = SimpleNamespace(
+        type="function_call", name="fs_outline", arguments="{}", call_id="call_2"
+    )
+    raw = SimpleNamespace(
+        id="resp_2",
+        output=[item],
+        output_text="Hello",
+        usage=SimpleNamespace(
+            input_tokens=10, input_tokens_details=SimpleNamespace(cached_tokens=4)
+        ),
+        model_dump=_fail,
+    )
+    view = ResponseView.of(raw)
+
+    assert ResponseView.of(view) is view
+    assert view.text == "Hello"
+    assert view.tool_calls[0]["call_id"] == "call_2"
+    assert view.usage == {"input_tokens": 10, "cached_tokens": 4}
+    assert view.reasoning_summary is None
+
+
+def test_view_handles_legacy_shapes_and_missing_fields():
+    raw = {
+        "output": [
+            {"type": "message", "content": [{"type": "text", "text": {"value": "Old"}}]}
+        ],
+        "required_action": {
+            "type": "submit_tool_outputs",
+            "submit_tool_outputs": {
+                "tool_calls": [
+                    {
+                        "id": "call_3",
+                        "function": {"name": "fs_search", "arguments": "{}"},
+                    }
+                ]
+            },
+        },
+    }
+    view = ResponseView(raw)
+
+    assert view.text == "Old"
+    assert view.tool_calls == [
+        {"name": "fs_search", "arguments": "{}", "call_id": "call_3"}
+    ]
+    assert view.usage == {"input_tokens": 0, "cached_tokens": 0}
+    assert ResponseView(None).text == "" and ResponseView(None).output == []
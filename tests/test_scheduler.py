@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+
+from storycraftr.agent.scheduler import (
+    AsyncSchedulingTransport,
+    RateLimiter,
+    RequestScheduler,
+    SchedulingTransport,
+    _parse_duration,
+    current_priority,
+    request_priority,
+)
+
+
+def _scheduler():
+    return RequestScheduler(max_retries=3, base_delay=0.001, max_delay=0.01)
+
+
+def test_parse_reset_durations():
+    assert _parse_duration("1s") == 1
+    assert _parse_duration("6m0s") == 360
+    assert _parse_duration("250ms") == 0.25
+    assert _parse_duration("2") == 2
+    assert _parse_duration("soon") is None
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    statuses = iter([429, 503, 200])
+    seen = []
+
+    def handler(request):
+        status = next(statuses)
+        seen.append(status)
+        return httpx.Response(status, headers={"retry-after-ms": "1"}, json={})
+
+    scheduler = _scheduler()
+    client = httpx.Client(
+        transport=SchedulingTransport(
+            httpx.MockTransport(handler), scheduler, "http://x/v1"
+        )
+    )
+    response = client.post("http://x/v1/responses", json={"input": "hi"})
+
+    assert response.status_code == 200
+    assert seen == [429, 503, 200]
+    assert scheduler.stats() == {
+        "requests": 3,
+        "throttled": 0,
+        "retries": 2,
+        "rate_limited": 1,
+    }
+
+
+def test_gives_up_after_max_retries_async():
+    def handler(request):
+        return httpx.Response(500, json={})
+
+    scheduler = _scheduler()
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncSchedulingTransport(
+                httpx.MockTransport(handler), scheduler, "http://x/v1"
+            )
+        ) as client:
+            return await client.get("http://x/v1/vector_stores")
+
+    assert asyncio.run(run()).status_code == 500
+    assert scheduler.stats()["requests"] == 4
+
+
+def test_configured_limits_and_headers_throttle():
+    limiter = RateLimiter(requests_per_minute=60)
+    assert limiter._try_acquire("interactive", 0) == 0
+    limiter.requests.tokens = 0
+    assert limiter._try_acquire("interactive", 0) > 0
+
+    learned = RateLimiter()
+    learned.observe(
+        200,
+        {
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2s",
+        },
+    )
+    assert learned.tokens.per_minute == 1000
+    assert 1 < learned._try_acquire("interactive", 0) <= 2
+
+
+def test_batch_lane_yields_to_waiting_interactive_requests():
+    limiter = RateLimiter()
+    limiter._set_waiting("interactive", 1)
+    assert limiter._try_acquire("batch", 0) > 0
+    assert limiter._try_acquire("interactive", 0) == 0
+
+    assert current_priority() == "interactive"
+    with request_priority("batch"):
+        assert current_priority() == "batch"
+    assert current_priority() == "interactive"
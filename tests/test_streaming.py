@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from storycraftr.agent import agents
+from storycraftr.utils.core import BookConfig
+
+
+def _completed(text):
+    return SimpleNamespace(
+        output_text=text,
+        output=[],
+        model_dump=lambda: {"output_text": text, "output": []},
+    )
+
+
+class FakeStream:
+    def __init__(self, events):
+        self._events = iter(events)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._events)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncClient:
+    def __init__(self, events):
+        self.calls = []
+        self.responses = SimpleNamespace(create=self._create)
+        self._events = events
+
+    async def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return FakeStream(self._events)
+        return _completed("Hello world")
+
+
+def _events(*deltas, failed=False):
+    events = [
+        SimpleNamespace(type="response.output_text.delta", delta=d) for d in deltas
+    ]
+    if failed:
+        events.append(
+            SimpleNamespace(
+                type="response.failed",
+                response=SimpleNamespace(error=SimpleNamespace(message="overloaded")),
+            )
+        )
+    else:
+        events.append(
+            SimpleNamespace(
+                type="response.completed", response=_completed("".join(deltas))
+            )
+        )
+    return events
+
+
+async def _no_lookup(book_path, name, client, fn):
+    return await fn(None)
+
+
+@pytest.fixture
+def fake_env():
+    started = []
+
+    def install(events):
+        client = FakeAsyncClient(events)
+        started.extend(
+            [
+                mock.patch.object(
+                    agents, "initialize_async_openai_client", return_value=client
+                ),
+                mock.patch.object(agents, "initialize_openai_client"),
+                mock.patch.object(
+                    agents, "load_book_config", return_value=BookConfig()
+                ),
+                mock.patch.object(
+                    agents, "_acall_with_vector_store", side_effect=_no_lookup
+                ),
+            ]
+        )
+        for patcher in started:
+            patcher.start()
+        return client
+
+    yield install
+    for patcher in started:
+        patcher.stop()
+
+
+def test_stream_message_yields_deltas_and_records_timings(tmp_path, fake_env):
+    client = fake_env(_events("Hel", "lo ", "world"))
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+
+    deltas = list(agents.stream_message(str(tmp_path), "conv_1", "Say hi", assistant))
+
+    assert deltas == ["Hel", "lo ", "world"]
+    assert client.calls[0]["stream"] is True
+    timings = agents.get_last_timings_for_book(str(tmp_path))
+    assert timings["streamed"] is True
+    assert timings["time_to_first_token"] is not None
+    assert timings["time_to_first_token"] <= timings["total"]
+
+
+def test_stream_message_raises_on_failed_stream(tmp_path, fake_env):
+    fake_env(_events("partial", failed=True))
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+
+    with pytest.raises(RuntimeError, match="overloaded"):
+        list(agents.stream_message(str(tmp_path), "conv_1", "Say hi", assistant))
+
+
+def test_create_message_without_streaming_records_timings(tmp_path, fake_env):
+    client = fake_env([])
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+
+    text = agents.create_message(
+        str(tmp_path), thread_id="conv_2", content="Say hi", assistant=assistant
+    )
+
+    assert text == "Hello world"
+    assert "stream" not in client.calls[0]
+    assert agents.get_last_timings_for_book(str(tmp_path))["streamed"] is False
@@ -0,0 +1,51 @@
+import time
+
+from storycraftr.agent.sync import SyncCoordinator
+
+
+def test_immediate_policy_syncs_right_away():
+    calls = []
+    coordinator = SyncCoordinator(
+        policy="immediate", sync_fn=lambda b, a: calls.append(b)
+    )
+
+    coordinator.mark_dirty("book-a", object())
+
+    assert calls == ["book-a"]
+    assert coordinator.pending() == []
+
+
+def test_deferred_policy_syncs_each_book_once_on_flush():
+    calls = []
+    coordinator = SyncCoordinator(
+        policy="deferred", sync_fn=lambda b, a: calls.append(b)
+    )
+
+    for _ in range(3):
+        coordinator.mark_dirty("book-a", object())
+    coordinator.mark_dirty("book-b", object())
+    assert calls == []
+    assert coordinator.pending() == ["book-a", "book-b"]
+
+    coordinator.flush("book-a")
+    assert calls == ["book-a"]
+    coordinator.flush()
+    assert sorted(calls) == ["book-a", "book-b"]
+    assert coordinator.pending() == []
+
+
+def test_background_policy_coalesces_marks_after_quiet_period():
+    calls = []
+    coordinator = SyncCoordinator(
+        policy="background", quiet_period=0.05, sync_fn=lambda b, a: calls.append(b)
+    )
+
+    for _ in range(5):
+        coordinator.mark_dirty("book-a", object())
+
+    deadline = time.monotonic() + 2
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+
+    assert calls == ["book-a"]
@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest import mock
+
+from storycraftr.agent.agents import _fs_apply_text_edits
+from storycraftr.agent.text_index import BookTextIndex, text_index
+
+
+def _book(tmp_path):
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "worldbuilding").mkdir()
+    (tmp_path / "chapters" / "chapter-1.md").write_text(
+        "# One\nMara walks in.\nThe storm breaks.\nmara again, mara.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "worldbuilding" / "places.md").write_text(
+        "# Places\nThe Storm Coast.\n", encoding="utf-8"
+    )
+    (tmp_path / "notes.md").write_text("Mara outside the index\n", encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_phrase_and_regex_search(tmp_path):
+    book = _book(tmp_path)
+    index = BookTextIndex()
+
+    result = index.search(book, "mara")
+    assert [(m["path"], m["line"]) for m in result["matches"]] == [
+        ("chapters/chapter-1.md", 2),
+        ("chapters/chapter-1.md", 4),
+    ]
+    assert result["matches"][0]["snippet"] == "Mara walks in."
+
+    storms = index.search(book, r"\bstorm\b", use_regex=True, case_sensitive=True)
+    assert storms["matches"] == [
+        {"path": "chapters/chapter-1.md", "line": 3, "snippet": "The storm breaks."}
+    ]
+    scoped = index.search(book, "storm", path_prefix="worldbuilding/")
+    assert [m["path"] for m in scoped["matches"]] == ["worldbuilding/places.md"]
+    assert index.search(book, "storm", max_results=1)["truncated"] is True
+    assert "error" in index.search(book, "(", use_regex=True)
+
+
+def test_index_rereads_only_changed_files(tmp_path):
+    book = _book(tmp_path)
+    index = BookTextIndex()
+    index.search(book, "x")
+
+    with mock.patch.object(
+        Path, "read_text", autospec=True, side_effect=Path.read_text
+    ) as reads:
+        index.search(book, "x")
+        assert reads.call_count == 0
+        (tmp_path / "outline").mkdir()
+        (tmp_path / "outline" / "plot.md").write_text(
+            "Mara returns\n", encoding="utf-8"
+        )
+        (tmp_path / "worldbuilding" / "places.md").unlink()
+        result = index.search(book, "mara returns")
+        assert reads.call_count == 1
+
+    assert result["matches"][0]["path"] == "outline/plot.md"
+    assert result["files_searched"] == 2
+
+
+def test_edits_update_the_shared_index(tmp_path):
+    book = _book(tmp_path)
+    text_index.search(book, "storm")
+
+    _fs_apply_text_edits(
+        book,
+        "chapters/chapter-1.md",
+        [{"type": "replace_text", "find": "storm", "replace": "calm", "occurrence": 1}],
+    )
+
+    with mock.patch.object(Path, "read_text", side_effect=AssertionError("re-read")):
+        result = text_index.search(book, "calm")
+    assert [(m["path"], m["line"]) for m in result["matches"]] == [
+        ("chapters/chapter-1.md", 3)
+    ]
@@ -0,0 +1,144 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import openai
+from unittest import mock
+
+from storycraftr.agent import agents
+from storycraftr.utils.core import BookConfig
+
+
+def _response(response_id, output, text=""):
+    usage = {"input_tokens": 1000, "input_tokens_details": {"cached_tokens": 600}}
+    data = {"id": response_id, "output": output, "output_text": text, "usage": usage}
+    return SimpleNamespace(
+        id=response_id,
+        output=output,
+        output_text=text,
+        usage=usage,
+        model_dump=lambda: data,
+    )
+
+
+TOOL_CALL = {
+    "type": "function_call",
+    "name": "fs_read_text",
+    "arguments": json.dumps({"path": "chapters/chapter-1.md"}),
+    "call_id": "call_1",
+}
+
+
+class FakeClient:
+    def __init__(self, reject_chaining=False, first_output=(TOOL_CALL,)):
+        self.calls = []
+        self.reject_chaining = reject_chaining
+        self.first_output = list(first_output)
+        self.responses = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("previous_response_id") and self.reject_chaining:
+            raise openai.BadRequestError(
+                "previous_response_id is not supported",
+                response=httpx.Response(400, request=httpx.Request("POST", "http://x")),
+                body=None,
+            )
+        if len(self.calls) == 1:
+            return _response("resp_1", self.first_output)
+        return _response("resp_2", [], text="Done")
+
+
+def _run(tmp_path, client):
+    (tmp_path / "chapters").mkdir()
+    (tmp_path / "chapters" / "chapter-1.md").write_text(
+        "# One\n" * 200, encoding="utf-8"
+    )
+    (tmp_path / "worldbuilding").mkdir()
+    for name in ("history", "geography"):
+        (tmp_path / "worldbuilding" / f"{name}.md").write_text(
+            f"# {name}\n", encoding="utf-8"
+        )
+
+    async def no_lookup(book_path, name, sync_client, fn):
+        return await fn(None)
+
+    assistant = SimpleNamespace(name="book", model="m", instructions="")
+    with mock.patch.object(
+        agents, "initialize_async_openai_client", return_value=client
+    ), mock.patch.object(agents, "initialize_openai_client"), mock.patch.object(
+        agents, "load_book_config", return_value=BookConfig()
+    ), mock.patch.object(
+        agents, "_acall_with_vector_store", side_effect=no_lookup
+    ):
+        return agents.create_message(str(tmp_path), "conv", "Improve it", assistant)
+
+
+def test_tool_loop_chains_on_previous_response(tmp_path):
+    client = FakeClient()
+
+    assert _run(tmp_path, client) == "Done"
+
+    follow_up = client.calls[1]
+    assert follow_up["previous_response_id"] == "resp_1"
+    assert [item["type"] for item in follow_up["input"]] == ["function_call_output"]
+    timings = agents.get_last_timings_for_book(str(tmp_path))
+    assert len(timings["request_bytes"]) == 2
+    assert timings["input_tokens"] == 2000 and timings["cached_tokens"] == 1200
+    assert agents.get_prompt_cache_stats()["cached_tokens"] >= 1200
+
+
+def test_tool_loop_falls_back_to_full_transcript(tmp_path):
+    client = FakeClient(reject_chaining=True)
+
+    assert _run(tmp_path, client) == "Done"
+
+    assert len(client.calls) == 3
+    resent = client.calls[2]
+    assert "previous_response_id" not in resent
+    assert resent["input"][0]["role"] == "user"
+    assert resent["input"][-1]["type"] == "function_call_output"
+
+
+def _call(call_id, name, **args):
+    return {
+        "type": "function_call",
+        "name": name,
+        "arguments": json.dumps(args),
+        "call_id": call_id,
+    }
+
+
+def test_parallel_tool_calls_run_in_one_round_trip(tmp_path):
+    client = FakeClient(
+        first_output=[
+            _call("c1", "fs_read_text", path="worldbuilding/history.md"),
+            _call("c2", "fs_read_text", path="worldbuilding/geography.md"),
+            _call(
+                "c3",
+                "fs_apply_text_edits",
+                path="chapters/chapter-1.md",
+                edits=[
+                    {
+                        "type": "replace_text",
+                        "find": "# One",
+                        "replace": "The end.",
+                        "occurrence": 1,
+                    }
+                ],
+            ),
+            _call("c4", "fs_read_text", path="chapters/chapter-1.md"),
+        ]
+    )
+
+    assert _run(tmp_path, client) == "Done"
+
+    assert client.calls[0]["parallel_tool_calls"] is True
+    outputs = client.calls[1]["input"]
+    assert [item["call_id"] for item in outputs] == ["c1", "c2", "c3", "c4"]
+    assert "# history" in outputs[0]["output"]
+    # Same-path calls keep their order: the read sees the edit
+    assert "The end." in json.loads(outputs[3]["output"])["content"]
+    assert "saved 3 model round-trip(s)" in agents.get_last_activity_for_book(
+        str(tmp_path)
+    )
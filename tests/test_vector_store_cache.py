@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from storycraftr.agent import agents
+
+
+def _client_with_stores(*stores):
+    client = mock.Mock()
+    client.vector_stores.list.return_value = iter(
+        [SimpleNamespace(name=name, id=vs_id) for name, vs_id in stores]
+    )
+    return client
+
+
+def test_vector_store_id_is_cached_in_memory_and_on_disk(tmp_path):
+    book = tmp_path / "my-book"
+    book.mkdir()
+    client = _client_with_stores(("other Docs", "vs_0"), ("my-book Docs", "vs_1"))
+
+    assert agents.get_vector_store_id_by_name("my-book", client, str(book)) == "vs_1"
+    assert agents.get_vector_store_id_by_name("my-book", client, str(book)) == "vs_1"
+    assert client.vector_stores.list.call_count == 1
+    assert (book / "vector_store.json").exists()
+
+    # A fresh process (empty memory layer) reads the id from disk
+    agents._VECTOR_STORE_IDS.clear()
+    other_client = mock.Mock()
+    assert (
+        agents.get_vector_store_id_by_name("my-book", other_client, str(book)) == "vs_1"
+    )
+    other_client.vector_stores.list.assert_not_called()
+
+
+def test_stale_vector_store_id_is_invalidated_on_not_found(tmp_path):
+    book = tmp_path / "my-book"
+    book.mkdir()
+    agents.invalidate_vector_store_id(str(book))
+    client = _client_with_stores(("my-book Docs", "vs_old"))
+    agents.get_vector_store_id_by_name("my-book", client, str(book))
+    client.vector_stores.list.return_value = iter(
+        [SimpleNamespace(name="my-book Docs", id="vs_new")]
+    )
+
+    not_found = agents.openai.NotFoundError(
+        "missing", response=mock.Mock(status_code=404), body=None
+    )
+    seen = []
+
+    def call(vector_store_id):
+        seen.append(vector_store_id)
+        if vector_store_id == "vs_old":
+            raise not_found
+        return vector_store_id
+
+    assert (
+        agents._call_with_vector_store(str(book), "my-book", client, call) == "vs_new"
+    )
+    assert seen == ["vs_old", "vs_new"]
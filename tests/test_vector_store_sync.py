@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from storycraftr.agent import agents
+
+CHAPTER = "# Chapter\n\nline one\nline two\nline three\n"
+
+
+class FakeClient:
+    """Minimal in-memory stand-in for the files and vector store APIs."""
+
+    def __init__(self):
+        self.remote = set()
+        self.uploaded = []
+        self.deleted = []
+        self.files = mock.Mock()
+        self.files.create.side_effect = self._create
+        self.vector_stores = mock.Mock()
+        self.vector_stores.files.list.side_effect = lambda **kw: [
+            SimpleNamespace(id=file_id) for file_id in sorted(self.remote)
+        ]
+        self.vector_stores.files.delete.side_effect = self._delete
+
+    def _create(self, file, purpose):
+        file_id = f"file_{len(self.uploaded)}"
+        self.uploaded.append(file[0])
+        self.remote.add(file_id)
+        return SimpleNamespace(id=file_id)
+
+    def _delete(self, vector_store_id, file_id):
+        self.deleted.append(file_id)
+        self.remote.discard(file_id)
+
+
+def _book(tmp_path):
+    for folder in ("chapters", "outline"):
+        (tmp_path / folder).mkdir()
+    (tmp_path / "chapters" / "chapter-1.md").write_text(CHAPTER, encoding="utf-8")
+    (tmp_path / "chapters" / "chapter-2.md").write_text(
+        CHAPTER + "two\n", encoding="utf-8"
+    )
+    (tmp_path / "outline" / "plot_points.md").write_text(
+        CHAPTER + "plot\n", encoding="utf-8"
+    )
+    return tmp_path
+
+
+def test_sync_uploads_only_changes(tmp_path):
+    book = _book(tmp_path)
+    client = FakeClient()
+
+    first = agents.sync_vector_store_files(str(book), "vs_1", client)
+    assert first["added"] == 3 and first["unchanged"] == 0
+
+    second = agents.sync_vector_store_files(str(book), "vs_1", client)
+    assert second == {
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+        "unchanged": 3,
+        "bytes_uploaded": 0,
+    }
+
+    (book / "chapters" / "chapter-2.md").write_text(
+        CHAPTER + "edited\n", encoding="utf-8"
+    )
+    (book / "outline" / "plot_points.md").unlink()
+    third = agents.sync_vector_store_files(str(book), "vs_1", client)
+
+    assert third["updated"] == 1
+    assert third["removed"] == 1
+    assert third["unchanged"] == 1
+    assert third["bytes_uploaded"] == len((CHAPTER + "edited\n").encode("utf-8"))
+    assert len(client.remote) == 2
+
+
+def test_sync_deletes_untracked_remote_files(tmp_path):
+    book = _book(tmp_path)
+    client = FakeClient()
+    client.remote.add("file_orphan")
+
+    result = agents.sync_vector_store_files(str(book), "vs_1", client)
+
+    assert result["removed"] == 1
+    assert "file_orphan" in client.deleted